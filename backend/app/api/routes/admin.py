@@ -1,7 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse
 from sqlalchemy.orm import Session
 
 from app.api import deps
+from app.core.profiling import profiler
 from app.models.user import User, UserRole  # Импорт UserRole для Enum
 from app.schemas.user import UsersResponse, UserSchema
 
@@ -143,3 +145,107 @@ async def get_system_stats(
         "active_users": active_users,
         "admin_users": admin_users
     }
+
+
+@router.post("/profiling/cpu")
+async def start_cpu_profiling(
+    route: str = Query(..., description="Route template, e.g. /charts/api/chart-data or /charts/indicators/{ticker}"),
+    count: int = Query(1, ge=1, le=100, description="Number of next matching requests to profile"),
+    interval: float = Query(0.005, ge=0.001, le=1.0, description="Sampling interval in seconds"),
+    current_user: User = Depends(deps.get_admin_user)
+):
+    """
+    Profile the next N requests to a route with a sampling profiler (admin only).
+    Results are folded stacks ready for flamegraph.pl / speedscope.
+    """
+    session = profiler.arm(route, count, interval, str(current_user.username))
+    return session.to_dict()
+
+@router.get("/profiling/sessions")
+async def get_profiling_sessions(
+    current_user: User = Depends(deps.get_admin_user)
+):
+    """
+    List armed profiling sessions (admin only)
+    """
+    return {
+        "sessions": [s.to_dict() for s in profiler.sessions()],
+        "memory_tracking": profiler.memory_tracking
+    }
+
+@router.delete("/profiling/sessions/{session_id}")
+async def cancel_profiling_session(
+    session_id: str,
+    current_user: User = Depends(deps.get_admin_user)
+):
+    """
+    Cancel an armed profiling session (admin only)
+    """
+    if not profiler.cancel(session_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profiling session not found"
+        )
+    return {"message": f"Profiling session {session_id} cancelled"}
+
+@router.post("/profiling/memory/start")
+async def start_memory_profiling(
+    nframes: int = Query(10, ge=1, le=50, description="Traceback depth kept by tracemalloc"),
+    current_user: User = Depends(deps.get_admin_user)
+):
+    """
+    Start tracemalloc; a diffed snapshot is stored after every upload (admin only)
+    """
+    profiler.start_memory_tracking(nframes)
+    return {"message": "Memory tracking started", "nframes": nframes}
+
+@router.post("/profiling/memory/snapshot")
+async def take_memory_snapshot(
+    label: str = Query("manual"),
+    current_user: User = Depends(deps.get_admin_user)
+):
+    """
+    Take a tracemalloc snapshot diffed against the previous one (admin only)
+    """
+    name = profiler.memory_snapshot(label)
+    if name is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Memory tracking is not started"
+        )
+    return {"profile": name}
+
+@router.post("/profiling/memory/stop")
+async def stop_memory_profiling(
+    current_user: User = Depends(deps.get_admin_user)
+):
+    """
+    Stop tracemalloc (admin only)
+    """
+    profiler.stop_memory_tracking()
+    return {"message": "Memory tracking stopped"}
+
+@router.get("/profiling/profiles")
+async def get_profiles(
+    current_user: User = Depends(deps.get_admin_user)
+):
+    """
+    List stored profiles, newest first (admin only)
+    """
+    return {"profiles": profiler.list_profiles()}
+
+@router.get("/profiling/profiles/{name}", response_class=PlainTextResponse)
+async def get_profile(
+    name: str,
+    current_user: User = Depends(deps.get_admin_user)
+):
+    """
+    Download a stored profile (admin only)
+    """
+    content = profiler.read_profile(name)
+    if content is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profile not found"
+        )
+    return PlainTextResponse(content)
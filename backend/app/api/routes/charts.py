@@ -1,41 +1,229 @@
 # backend/app/api/routes/charts.py
-from fastapi import APIRouter, UploadFile, File, HTTPException, Query, Depends, Path
-from typing import Optional, List, Dict, BinaryIO, Union, Any
-from typing_extensions import TypedDict
-import pandas as pd
+from fastapi import APIRouter, UploadFile, File, HTTPException, Query, Depends, Path, Request, Header
+from fastapi.responses import StreamingResponse
+from typing import TYPE_CHECKING, Optional, List, Dict, BinaryIO, Union, Any, Tuple
+from typing_extensions import NotRequired, TypedDict
 import json
 from datetime import datetime
 import logging
 from pathlib import Path
 from pydantic import BaseModel
 import urllib.parse
+import bisect
+import asyncio
+import tempfile
 from app.models.user import User
 from app.api import deps
+from app.core.cache import (
+    CachedPayload,
+    coalesce,
+    dump_json,
+    file_mtime,
+    file_version,
+    http_validators,
+    not_modified,
+    payload_cache,
+)
+from app.core.events import EVENT_HEARTBEAT_SECONDS, broadcaster, format_sse
+from app.core.profiling import sampled
+from app.api.warmup import record_group_request
+from app.core.metrics import REGISTRY, data_store_collector, record_cache, stage_timer, ticker_timer
 
 from app.utils.data_processing import (
     process_linear_data,
     process_candlestick_data, 
-    calculate_indicators,
     save_json_data,
-    save_indicators_to_json,
-    load_json_data, 
+    recompute_ticker_indicators,
+    record_indicators_change,
+    changes_since,
+    linear_group,
+)
+
+from app.utils.chart_formats import (
+    ARROW_MEDIA_TYPE,
+    BINARY_MEDIA_TYPE,
+    ChartEntry,
+    aligned_to_json,
+    arrow_available,
+    encode_aligned_arrow,
+    encode_aligned_binary,
+    encode_arrow,
+    encode_binary,
+    to_columnar,
+)
+
+from app.utils.group_aggregates import (
+    AlignedMatrix,
+    aligned_matrix_path,
+    groups_dir,
+    load_aligned_matrix,
+    load_volume_stack,
+    rebuild_volume_stack,
+    update_aligned_matrix,
+    volume_stack_path,
+)
+
+from app.utils.indicator_registry import INDICATORS, make_instance
+from app.utils.catalog import (
+    all_entries,
+    catalog_state,
+    clear_catalog,
+    entries_version,
+    get_entry,
+    group_entries,
+    list_tickers,
+    remove_entry,
+)
+from app.utils.range_index import drop_range_index, load_range_index
+from app.utils.date_index import drop_date_index
+from app.utils.bulk_upload import (
+    BULK_UPLOAD_KINDS,
+    BULK_UPLOAD_WORKERS,
+    expand_archive,
+    is_archive,
+    merge_ticker_frames,
+    read_ticker_frames,
+    save_upload,
+)
+from app.utils.upload_registry import (
+    cached_upload,
+    clear_registry,
+    file_digest,
+    forget_ticker,
+    frame_digest,
+    path_digest,
+    remember_sheet,
+    remember_upload,
+    sheet_unchanged,
 )
 
 from app.utils.config_manager import (
     update_indicators_config
 )
-# Set up logging
-logging.basicConfig(
-    filename='log.txt',
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
+
+# pandas (и openpyxl через него) импортируется только в эндпоинтах загрузки
+# и пересчета индикаторов: эндпоинты чтения графиков стартуют без них
+if TYPE_CHECKING:
+    import pandas as pd
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 DATA_DIR = Path("data")
 DATA_DIR.mkdir(exist_ok=True)
 
+REGISTRY.register_collector(data_store_collector(DATA_DIR))
+
+# Весь каталог тикеров и его версия (generation) - для каталожных ответов и прогрева
+_meta_cache: Dict[str, Any] = {"version": None, "data": {}}
+
+
+def load_meta() -> Dict[str, Any]:
+    """Весь каталог {тикер: запись}; перечитывается только после изменений каталога"""
+    version, _ = catalog_state(DATA_DIR)
+    hit = _meta_cache["version"] == version
+    record_cache("meta", hit)
+    if not hit:
+        _meta_cache.update(version=version, data=all_entries(DATA_DIR))
+    return _meta_cache["data"]
+
+
+def invalidate_cached_payloads(*scopes: str) -> None:
+    """
+    Сбрасывает закэшированные ответы для тикеров/групп и каталожные ответы
+    (в этом процессе, в общем L2 и у других экземпляров); без аргументов - все.
+    """
+    payload_cache.invalidate_scopes(scopes)
+
+def publish_ticker_update(ticker: str, group: str, records: List[Dict[str, Any]], version: Optional[int]) -> None:
+    """Сообщает подписчикам /api/events о новых строках тикера"""
+    if not records:
+        return
+    dates = [r['date'] for r in records]
+    broadcaster.publish(
+        "data",
+        ticker=ticker,
+        group=group,
+        new_version=version,
+        date_range=[min(dates), max(dates)],
+    )
+
+
+def delta_window(
+    ticker_info: Dict[str, Any], since_version: Optional[int], since_date: Optional[str]
+) -> Tuple[bool, Optional[str]]:
+    """
+    Окно дельта-запроса: (full, from_date).
+    full - отдать все строки; иначе строки с датой >= from_date (from_date=None - ничего).
+    """
+    if since_date is not None:
+        return False, since_date
+    if since_version is not None:
+        return changes_since(ticker_info, since_version)
+    return True, None
+
+
+def slice_from_date(dates: List[str], full: bool, from_date: Optional[str]) -> int:
+    """Индекс первой строки окна в отсортированном списке дат"""
+    if full:
+        return 0
+    if from_date is None:
+        return len(dates)
+    return bisect.bisect_left(dates, from_date)
+
+
+def unchanged_ticker_details(ticker: str, group: str, rows_in_file: int) -> Dict[str, Any]:
+    """Строка tickers_details для листа, пропущенного без изменений"""
+    return {
+        'ticker': ticker,
+        'group': group,
+        'new_records': 0,
+        'existing_records': rows_in_file,
+        'total_in_file': rows_in_file,
+        'total_in_db_now': (get_entry(ticker, DATA_DIR) or {}).get('total_records'),
+        'unchanged': True
+    }
+
+
+def ingest_ticker_frame(
+    kind: str, ticker: str, group: str, df: "pd.DataFrame"
+) -> Tuple[Dict[str, int], Dict[str, Any]]:
+    """
+    Проверка строк тикера, дозапись, индикаторы и строка выровненной матрицы.
+    Стек объемов группы вызывающий пересчитывает один раз после всех тикеров.
+    """
+    with ticker_timer(ticker):
+        # Обрабатываем данные и получаем статистику
+        with stage_timer("validation"):
+            if kind == "line":
+                records, stats = process_linear_data(df)
+            else:
+                candlestick_data, stats = process_candlestick_data(df, ticker)
+                records = candlestick_data['data']
+        
+        # Сохраняем данные (добавляем к существующим)
+        save_stats = save_json_data(records, ticker, group, kind)
+        
+        # РАСЧЕТ ИНДИКАТОРОВ после сохранения данных
+        # Полные данные тикера читаются сразу в числовые столбцы
+        with stage_timer("indicators"):
+            if recompute_ticker_indicators(ticker):
+                logger.info(f"Indicators calculated and saved for {ticker}")
+        with stage_timer("group_aggregates"):
+            update_aligned_matrix(group, ticker, DATA_DIR)
+        invalidate_cached_payloads(ticker, group)
+    publish_ticker_update(ticker, group, records, save_stats.get('data_version'))
+    return stats, save_stats
+
+
+def rebuild_group_stacks(groups: set[str]) -> None:
+    """Групповые агрегаты пересчитываем один раз на группу, а не на каждый тикер"""
+    with stage_timer("group_aggregates"):
+        for group in groups:
+            rebuild_volume_stack(group, DATA_DIR)
+            invalidate_cached_payloads(group)
+
+
 @router.post("/upload")
 async def upload_linear_data(
     file: UploadFile = File(...),
@@ -43,7 +231,18 @@ async def upload_linear_data(
 ) -> Dict[str, Any]:  
     try:
         file_content: BinaryIO = file.file
-        df = pd.read_excel(file_content) # type: ignore
+        # Тот же файл уже загружали - отдаем сохраненную статистику без разбора
+        upload_digest = file_digest(file_content)
+        cached_statistics = cached_upload("line", upload_digest, DATA_DIR)
+        if cached_statistics is not None:
+            logger.info(f"Duplicate upload {file.filename}: returning cached statistics")
+            return {
+                "message": "Data already uploaded",
+                "statistics": {**cached_statistics, "duplicate_upload": True}
+            }
+        import pandas as pd
+        with stage_timer("excel_parse"):
+            df = pd.read_excel(file_content) # type: ignore
         required_columns = {'date', 'ticker', 'volume', 'price'}
         
         if not all(col in df.columns for col in required_columns):
@@ -51,47 +250,41 @@ async def upload_linear_data(
                 status_code=400,
                 detail="Missing required columns: date, ticker, volume, price"
             )
+        
+        # Тикер повторяется в каждой строке - храним кодами категорий
+        df['ticker'] = df['ticker'].astype(str).astype('category')
             
         # Статистика обработки
         total_records_in_file = len(df)
         tickers_count = 0
         total_new_records = 0
         total_existing_records = 0
+        unchanged_sheets = 0
         processed_tickers: List[Dict[str, Any]] = []
+        touched_groups: set[str] = set()
         
         # Process data for each ticker
-        for ticker, group_df in df.groupby('ticker'): # type: ignore
+        for ticker, group_df in df.groupby('ticker', observed=True): # type: ignore
             ticker_str = str(ticker) # type: ignore
             tickers_count += 1
             
             # Determine group from ticker name
-            if '95' in ticker_str:
-                group = '95'
-            elif '92' in ticker_str:
-                group = '92'
-            elif 'ДТ' in ticker_str:
-                group = 'ДТ'
-            else:
-                group = 'Other'
-                
-            # Обрабатываем данные и получаем статистику
-            group_df['date'] = pd.to_datetime(group_df['date']).dt.strftime('%Y-%m-%d') # type: ignore  
-
-            processed_data, stats = process_linear_data(group_df)
-            total_new_records += stats['new_records']
-            total_existing_records += stats['existing_records']
+            group = linear_group(ticker_str)
             
-            # Сохраняем данные (добавляем к существующим)
-            save_stats = save_json_data(processed_data, ticker_str, group, "line")
+            with stage_timer("validation"):
+                group_df['date'] = pd.to_datetime(group_df['date']).dt.strftime('%Y-%m-%d') # type: ignore  
+                sheet_digest = frame_digest(group_df)
+            if sheet_unchanged("line", ticker_str, sheet_digest, DATA_DIR):
+                unchanged_sheets += 1
+                total_existing_records += len(group_df)
+                processed_tickers.append(unchanged_ticker_details(ticker_str, group, len(group_df)))
+                continue
             
-            # РАСЧЕТ ИНДИКАТОРОВ после сохранения данных
-            # Загружаем полные данные для расчета индикаторов
-            full_data = load_json_data(ticker_str)
-            if full_data and isinstance(full_data, list) and len(full_data) > 0:
-                df_full = pd.DataFrame(full_data)
-                df_with_indicators = calculate_indicators(df_full)
-                save_indicators_to_json(ticker_str, df_full, df_with_indicators)
-                logging.info(f"Indicators calculated and saved for {ticker_str}")
+            stats, save_stats = ingest_ticker_frame("line", ticker_str, group, group_df)
+            remember_sheet("line", ticker_str, sheet_digest, DATA_DIR)
+            total_new_records += stats['new_records']
+            total_existing_records += stats['existing_records']
+            touched_groups.add(group)
             
             processed_tickers.append({
                 'ticker': ticker_str,
@@ -101,30 +294,37 @@ async def upload_linear_data(
                 'total_in_file': stats['total_processed'],
                 'total_in_db_now': save_stats['total_records_now']
             })
+        
+        rebuild_group_stacks(touched_groups)
             
-        logging.info(
+        logger.info(
             f"Successfully processed file: {file.filename}. "
             f"Total records: {total_records_in_file}, "
             f"New records added: {total_new_records}, "
             f"Existing records skipped: {total_existing_records}, "
-            f"Tickers processed: {tickers_count}"
+            f"Tickers processed: {tickers_count}, "
+            f"Unchanged tickers skipped: {unchanged_sheets}"
         )
         
+        statistics = {
+            "filename": file.filename,
+            "total_records_in_file": total_records_in_file,
+            "new_records_added": total_new_records,
+            "existing_records_skipped": total_existing_records,
+            "tickers_processed": tickers_count,
+            "unchanged_tickers_skipped": unchanged_sheets,
+            "processing_date": datetime.now().isoformat(),
+            "tickers_details": processed_tickers
+        }
+        remember_upload("line", upload_digest, statistics, DATA_DIR)
+        
         return {
             "message": "Data processed successfully",
-            "statistics": {
-                "filename": file.filename,
-                "total_records_in_file": total_records_in_file,
-                "new_records_added": total_new_records,
-                "existing_records_skipped": total_existing_records,
-                "tickers_processed": tickers_count,
-                "processing_date": datetime.now().isoformat(),
-                "tickers_details": processed_tickers
-            }
+            "statistics": statistics
         }
         
     except Exception as e:
-        logging.error(f"Error processing file {file.filename}: {str(e)}")
+        logger.error(f"Error processing file {file.filename}: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -135,7 +335,18 @@ async def upload_candlestick_data(
 ) -> Dict[str, Any]:
     try:
         file_content: BinaryIO = file.file
-        excel_file = pd.ExcelFile(file_content)  # type: ignore
+        # Тот же файл уже загружали - отдаем сохраненную статистику без разбора
+        upload_digest = file_digest(file_content)
+        cached_statistics = cached_upload("candlestick", upload_digest, DATA_DIR)
+        if cached_statistics is not None:
+            logger.info(f"Duplicate candlestick upload {file.filename}: returning cached statistics")
+            return {
+                "message": "Candlestick data already uploaded",
+                "statistics": {**cached_statistics, "duplicate_upload": True}
+            }
+        import pandas as pd
+        with stage_timer("excel_parse"):
+            excel_file = pd.ExcelFile(file_content)  # type: ignore
         
         # Статистика обработки
         total_sheets = len(excel_file.sheet_names)
@@ -143,34 +354,31 @@ async def upload_candlestick_data(
         total_new_records = 0
         total_existing_records = 0
         total_skipped_invalid = 0
+        unchanged_sheets = 0
         processed_tickers: List[Dict[str, Any]] = []
+        touched_groups: set[str] = set()
         
         # Process data for each sheet (ticker)
         for sheet_name in excel_file.sheet_names:
-            df = pd.read_excel(excel_file, sheet_name=sheet_name) # type: ignore
+            with stage_timer("excel_parse"):
+                df = pd.read_excel(excel_file, sheet_name=sheet_name) # type: ignore
             processed_sheets += 1
             
-            # Обрабатываем данные и получаем статистику
-            candlestick_data, stats = process_candlestick_data(df, str(sheet_name))
+            # Лист не изменился с прошлой загрузки - даты и индикаторы не трогаем
+            sheet_digest = frame_digest(df)
+            if sheet_unchanged("candlestick", str(sheet_name), sheet_digest, DATA_DIR):
+                unchanged_sheets += 1
+                total_existing_records += len(df)
+                processed_tickers.append(unchanged_ticker_details(str(sheet_name), str(sheet_name), len(df)))
+                continue
+            
+            # group = ticker
+            stats, save_stats = ingest_ticker_frame("candlestick", str(sheet_name), str(sheet_name), df)
+            remember_sheet("candlestick", str(sheet_name), sheet_digest, DATA_DIR)
             total_new_records += stats['new_records']
             total_existing_records += stats['existing_records']
             total_skipped_invalid += stats['skipped_invalid']
-            
-            # Сохраняем данные (добавляем к существующим)
-            save_stats = save_json_data(
-               candlestick_data['data'], 
-                str(sheet_name),  # Приводим к строке
-                str(sheet_name),  # Приводим к строке
-                "candlestick"
-            )
-            
-            # РАСЧЕТ ИНДИКАТОРОВ после сохранения данных
-            full_data = load_json_data(str(sheet_name))
-            if full_data and isinstance(full_data, list) and len(full_data) > 0:
-                df_full = pd.DataFrame(full_data)
-                df_with_indicators = calculate_indicators(df_full)
-                save_indicators_to_json(str(sheet_name), df_full, df_with_indicators)
-                logging.info(f"Indicators calculated and saved for {sheet_name}")
+            touched_groups.add(str(sheet_name))
             
             processed_tickers.append({
                 'ticker': sheet_name,
@@ -181,31 +389,201 @@ async def upload_candlestick_data(
                 'total_in_file': stats['total_processed'],
                 'total_in_db_now': save_stats['total_records_now']
             })
+        
+        rebuild_group_stacks(touched_groups)
             
-        logging.info(
+        logger.info(
             f"Successfully processed candlestick file: {file.filename}. "
             f"Total sheets: {total_sheets}, "
             f"New records added: {total_new_records}, "
             f"Existing records skipped: {total_existing_records}, "
-            f"Invalid records skipped: {total_skipped_invalid}"
+            f"Invalid records skipped: {total_skipped_invalid}, "
+            f"Unchanged sheets skipped: {unchanged_sheets}"
         )
         
+        statistics = {
+            "filename": file.filename,
+            "total_sheets": total_sheets,
+            "new_records_added": total_new_records,
+            "existing_records_skipped": total_existing_records,
+            "invalid_records_skipped": total_skipped_invalid,
+            "sheets_processed": processed_sheets,
+            "unchanged_sheets_skipped": unchanged_sheets,
+            "processing_date": datetime.now().isoformat(),
+            "tickers_details": processed_tickers
+        }
+        remember_upload("candlestick", upload_digest, statistics, DATA_DIR)
+        
         return {
             "message": "Candlestick data processed successfully",
+            "statistics": statistics
+        }
+        
+    except Exception as e:
+        logger.error(f"Error processing candlestick file {file.filename}: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+def ingest_bulk_frames(kind: str, parsed: List[Dict[str, "pd.DataFrame"]]) -> Dict[str, Any]:
+    """
+    Объединение и запись тикеров массовой загрузки (выполняется в потоке).
+    Тикер, чьи строки совпадают с уже загруженными (реестр загрузок), пропускается.
+    """
+    merged = merge_ticker_frames(parsed, kind)
+    
+    total_new_records = 0
+    total_existing_records = 0
+    total_skipped_invalid = 0
+    unchanged_sheets = 0
+    processed_tickers: List[Dict[str, Any]] = []
+    touched_groups: set[str] = set()
+    
+    # Запись последовательная: групповые файлы общие для тикеров
+    for ticker, ticker_df in merged.items():
+        group = linear_group(ticker) if kind == "line" else ticker
+        sheet_digest = frame_digest(ticker_df)
+        if sheet_unchanged(kind, ticker, sheet_digest, DATA_DIR):
+            unchanged_sheets += 1
+            total_existing_records += len(ticker_df)
+            processed_tickers.append(unchanged_ticker_details(ticker, group, len(ticker_df)))
+            continue
+        
+        stats, save_stats = ingest_ticker_frame(kind, ticker, group, ticker_df)
+        remember_sheet(kind, ticker, sheet_digest, DATA_DIR)
+        total_new_records += stats['new_records']
+        total_existing_records += stats['existing_records']
+        total_skipped_invalid += stats['skipped_invalid']
+        touched_groups.add(group)
+        
+        processed_tickers.append({
+            'ticker': ticker,
+            'group': group,
+            'new_records': stats['new_records'],
+            'existing_records': stats['existing_records'],
+            'skipped_invalid': stats['skipped_invalid'],
+            'total_in_file': stats['total_processed'],
+            'total_in_db_now': save_stats['total_records_now']
+        })
+    
+    rebuild_group_stacks(touched_groups)
+    return {
+        "new_records_added": total_new_records,
+        "existing_records_skipped": total_existing_records,
+        "invalid_records_skipped": total_skipped_invalid,
+        "tickers_processed": len(merged),
+        "unchanged_tickers_skipped": unchanged_sheets,
+        "tickers_details": processed_tickers
+    }
+
+
+@router.post("/upload-bulk")
+async def upload_bulk_data(
+    files: List[UploadFile] = File(...),
+    kind: str = Query("candlestick", description="candlestick | line"),
+    admin_user: User = Depends(deps.get_admin_user)
+) -> Dict[str, Any]:
+    """
+    Массовая загрузка: несколько файлов и/или ZIP-архивов (xlsx, xls, csv, parquet).
+    Файлы разбираются параллельно (не более BULK_UPLOAD_WORKERS одновременно),
+    строки тикера из всех файлов объединяются, и каждый тикер записывается
+    и пересчитывается один раз. Уже загруженные файлы (по SHA-256) не разбираются.
+    """
+    if kind not in BULK_UPLOAD_KINDS:
+        raise HTTPException(status_code=400, detail=f"kind must be one of: {', '.join(BULK_UPLOAD_KINDS)}")
+    
+    try:
+        with tempfile.TemporaryDirectory(prefix="bulk-upload-") as tmp:
+            work_dir = Path(tmp)
+            
+            # Сохраняем загрузки на диск потоково, архивы распаковываем
+            member_paths: List[Path] = []
+            for position, upload in enumerate(files):
+                saved = await asyncio.to_thread(
+                    save_upload, upload.file, work_dir / f"upload-{position}", upload.filename or "upload"
+                )
+                if is_archive(saved):
+                    try:
+                        member_paths.extend(
+                            await asyncio.to_thread(expand_archive, saved, work_dir / f"archive-{position}")
+                        )
+                    except ValueError as e:
+                        raise HTTPException(status_code=400, detail=str(e))
+                else:
+                    member_paths.append(saved)
+            
+            # Файлы, уже загруженные раньше (этим или другим эндпоинтом), пропускаем
+            def split_known() -> Tuple[List[str], List[Tuple[Path, str]]]:
+                duplicates: List[str] = []
+                fresh: List[Tuple[Path, str]] = []
+                for path in member_paths:
+                    digest = path_digest(path)
+                    if cached_upload(kind, digest, DATA_DIR) is not None:
+                        duplicates.append(path.name)
+                    else:
+                        fresh.append((path, digest))
+                return duplicates, fresh
+            
+            duplicate_files, new_members = await asyncio.to_thread(split_known)
+            
+            # Разбор файлов в пуле потоков с ограничением параллельности
+            semaphore = asyncio.Semaphore(BULK_UPLOAD_WORKERS)
+            
+            async def read_member(path: Path) -> Dict[str, "pd.DataFrame"]:
+                async with semaphore:
+                    return await asyncio.to_thread(read_ticker_frames, path, kind)
+            
+            with stage_timer("excel_parse"):
+                results = await asyncio.gather(*(read_member(p) for p, _ in new_members), return_exceptions=True)
+        
+        parsed: List[Dict[str, "pd.DataFrame"]] = []
+        parsed_members: List[Tuple[Path, str]] = []
+        failed_files: List[Dict[str, str]] = []
+        for (path, digest), result in zip(new_members, results):
+            if isinstance(result, BaseException):
+                logger.warning(f"Bulk upload: skipping {path.name}: {result}")
+                failed_files.append({'file': path.name, 'error': str(result)})
+            else:
+                parsed.append(result)
+                parsed_members.append((path, digest))
+        
+        # Запись, индикаторы и агрегаты групп - вне event loop
+        ingest_statistics = await asyncio.to_thread(sampled(ingest_bulk_frames), kind, parsed)
+        
+        processing_date = datetime.now().isoformat()
+        
+        def remember_members() -> None:
+            for path, digest in parsed_members:
+                remember_upload(
+                    kind, digest, {"filename": path.name, "bulk_upload": True, "processing_date": processing_date}, DATA_DIR
+                )
+        
+        await asyncio.to_thread(remember_members)
+        
+        logger.info(
+            f"Successfully processed bulk upload ({kind}): "
+            f"Files: {len(member_paths)}, duplicates: {len(duplicate_files)}, failed: {len(failed_files)}, "
+            f"Tickers: {ingest_statistics['tickers_processed']}, "
+            f"New records added: {ingest_statistics['new_records_added']}, "
+            f"Existing records skipped: {ingest_statistics['existing_records_skipped']}"
+        )
+        
+        return {
+            "message": "Bulk data processed successfully",
             "statistics": {
-                "filename": file.filename,
-                "total_sheets": total_sheets,
-                "new_records_added": total_new_records,
-                "existing_records_skipped": total_existing_records,
-                "invalid_records_skipped": total_skipped_invalid,
-                "sheets_processed": processed_sheets,
-                "processing_date": datetime.now().isoformat(),
-                "tickers_details": processed_tickers
+                "kind": kind,
+                "files_received": len(files),
+                "files_processed": len(parsed),
+                "duplicate_files": duplicate_files,
+                "failed_files": failed_files,
+                **ingest_statistics,
+                "processing_date": processing_date,
             }
         }
-        
+    
+    except HTTPException:
+        raise
     except Exception as e:
-        logging.error(f"Error processing candlestick file {file.filename}: {str(e)}")
+        logger.error(f"Error processing bulk upload: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
     
 
@@ -216,150 +594,227 @@ async def reset_data(
     admin_user: User = Depends(deps.get_admin_user)
 ):
     try:
-        logging.info(f"=== RESET STARTED ===")
-        logging.info(f"Reset request for ticker: {ticker}")
-        
         if ticker:
             # Декодируем тикер если он пришел в URL encoded формате
             decoded_ticker = urllib.parse.unquote(ticker)
-            logging.info(f"Decoded ticker: '{decoded_ticker}'")
+            logger.info("Reset started", extra={"ticker": decoded_ticker})
+            ticker_group = (get_entry(decoded_ticker, DATA_DIR) or {}).get('group')
             
             # Удаляем файл данных
             file_path = DATA_DIR / f"{decoded_ticker}.json"
             if file_path.exists():
                 file_path.unlink()
-                logging.info(f"✓ Deleted data file: {file_path}")
             else:
-                logging.warning(f"✗ Data file not found: {file_path}")
+                logger.warning(f"Data file not found: {file_path}")
             
             # Удаляем файл индикаторов
             indicators_dir = DATA_DIR / "indicators"
             indicators_file = indicators_dir / f"{decoded_ticker}_indicators.json"
             if indicators_file.exists():
                 indicators_file.unlink()
-                logging.info(f"✓ Deleted indicators file: {indicators_file}")
-            else:
-                logging.warning(f"✗ Indicators file not found: {indicators_file}")
-            
-            # Удаляем из meta.json 
-            meta_path = DATA_DIR / "meta.json"
-            if meta_path.exists():
-                try:
-                    # Читаем meta.json
-                    with open(meta_path, 'r', encoding='utf-8') as f:
-                        meta_data = json.load(f)
-                    
-                    logging.info(f"📋 Meta.json BEFORE - Keys: {list(meta_data.keys())}")
-                    logging.info(f"🔍 Looking for ticker: '{decoded_ticker}'")
-                    
-                    # Простой поиск - проверяем прямое совпадение
-                    if decoded_ticker in meta_data:
-                        logging.info(f"✅ Found ticker '{decoded_ticker}' in meta.json, deleting...")
-                        del meta_data[decoded_ticker]
-                        
-                        # Записываем обратно
-                        with open(meta_path, 'w', encoding='utf-8') as f:
-                            json.dump(meta_data, f, indent=2, ensure_ascii=False)
-                        
-                        logging.info(f"✅ Successfully removed '{decoded_ticker}' from meta.json")
-                        logging.info(f"📋 Meta.json AFTER - Keys: {list(meta_data.keys())}")
-                        
-                    else:
-                        logging.warning(f"❌ Ticker '{decoded_ticker}' NOT FOUND in meta.json")
-                        
-                        # Покажем что там есть для отладки
-                        all_tickers = list(meta_data.keys())
-                        logging.info(f"📝 All tickers in meta.json: {all_tickers}")
-                        
-                        # Поиск похожих
-                        similar = [t for t in all_tickers if decoded_ticker.lower() in t.lower()]
-                        if similar:
-                            logging.info(f"🔎 Similar tickers found: {similar}")
-                            
-                except Exception as e:
-                    logging.error(f"💥 Error updating meta.json: {str(e)}")
-                    import traceback
-                    logging.error(f"Stack trace: {traceback.format_exc()}")
-            else:
-                logging.error("❌ meta.json file not found!")
             
-            logging.info(f"=== RESET COMPLETED for: {decoded_ticker} ===")
+            # Удаляем из каталога
+            if not remove_entry(decoded_ticker, DATA_DIR):
+                logger.warning(f"Ticker '{decoded_ticker}' not found in catalog")
+            
+            drop_range_index(decoded_ticker, DATA_DIR)
+            drop_date_index(decoded_ticker, DATA_DIR)
+            forget_ticker(decoded_ticker, DATA_DIR)
+            
+            if ticker_group is not None:
+                update_aligned_matrix(ticker_group, decoded_ticker, DATA_DIR)
+                rebuild_volume_stack(ticker_group, DATA_DIR)
+                invalidate_cached_payloads(decoded_ticker, ticker_group)
+            else:
+                invalidate_cached_payloads(decoded_ticker)
+            broadcaster.publish("reset", ticker=decoded_ticker, group=ticker_group)
+            logger.info("Reset completed", extra={"ticker": decoded_ticker})
             return {"message": f"Data reset for {decoded_ticker}"}
             
         else:
-            # Delete all data files
-            for file in DATA_DIR.glob("*.json"):
-                if file.name != "meta.json":
-                    file.unlink()
-                    logging.info(f"Deleted data file: {file.name}")
+            # Delete data and indicator files of every catalogued ticker
+            deleted_data = 0
+            deleted_indicators = 0
+            for entry in all_entries(DATA_DIR).values():
+                data_file = DATA_DIR / entry['data_file']
+                if data_file.exists():
+                    data_file.unlink()
+                    deleted_data += 1
+                indicators_file = DATA_DIR / entry['indicators_file']
+                if indicators_file.exists():
+                    indicators_file.unlink()
+                    deleted_indicators += 1
             
-            # Delete all indicator files
-            indicators_dir = DATA_DIR / "indicators"
-            if indicators_dir.exists():
-                for file in indicators_dir.glob("*.json"):
+            # Delete all group aggregates
+            if groups_dir(DATA_DIR).exists():
+                for file in groups_dir(DATA_DIR).iterdir():
                     file.unlink()
-                    logging.info(f"Deleted indicator file: {file.name}")
+            drop_range_index(data_dir=DATA_DIR)
+            drop_date_index(data_dir=DATA_DIR)
+            clear_registry(DATA_DIR)
             
-            # Reset meta.json to empty
-            meta_path = DATA_DIR / "meta.json"
-            if meta_path.exists():
-                with open(meta_path, 'w', encoding='utf-8') as f:
-                    json.dump({}, f, indent=2, ensure_ascii=False)
-                logging.info("Reset meta.json to empty")
+            clear_catalog(DATA_DIR)
             
-            logging.info("Reset all data completed")
+            invalidate_cached_payloads()
+            broadcaster.publish("reset", ticker=None, group=None)
+            logger.info(
+                "Reset all data completed",
+                extra={"data_files": deleted_data, "indicator_files": deleted_indicators},
+            )
             return {"message": "All data reset"}
             
     except Exception as e:
-        logging.error(f"💥 Error during reset: {str(e)}")
-        import traceback
-        logging.error(f"Stack trace: {traceback.format_exc()}")
+        logger.exception("Error during reset")
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/api/available-groups")
-async def get_available_groups() -> Dict[str, Dict[str, Any]]:
-    """Возвращает все доступные группы из meta.json"""
+async def get_available_groups(request: Request) -> Dict[str, Dict[str, Any]]:
+    """Возвращает все доступные группы каталога"""
     try:
-        meta_path = DATA_DIR / "meta.json"
-        if not meta_path.exists():
-            return {}
-        
-        with open(meta_path, 'r', encoding='utf-8') as f:
-            meta_data = json.load(f)
+        meta_data = load_meta()
         
-        groups: Dict[str, Dict[str, Any]] = {}
-        
-        for ticker, ticker_info in meta_data.items():
-            group_name = ticker_info.get('group')
-            chart_type = ticker_info.get('type', 'line')
+        def build() -> Dict[str, Dict[str, Any]]:
+            groups: Dict[str, Dict[str, Any]] = {}
+            
+            for ticker, ticker_info in meta_data.items():
+                group_name = ticker_info.get('group')
+                chart_type = ticker_info.get('type', 'line')
+                
+                if group_name not in groups:
+                    groups[group_name] = {
+                        'type': chart_type,
+                        'tickers': []
+                    }
+                groups[group_name]['tickers'].append(ticker)
             
-            if group_name not in groups:
-                groups[group_name] = {
-                    'type': chart_type,
-                    'tickers': []
-                }
-            groups[group_name]['tickers'].append(ticker)
+            return groups
         
-        return groups
+        key = ("available-groups", "*", _meta_cache["version"])
+        validators = http_validators(key, catalog_state(DATA_DIR)[1])
+        unchanged = not_modified(request, validators)
+        if unchanged is not None:
+            return unchanged  # type: ignore
+        payload = payload_cache.get(key)
+        if payload is None:
+            payload = await coalesce(
+                key, payload_cache.loader(key, lambda: payload_cache.put(key, CachedPayload(dump_json(build()))))
+            )
+        return payload.to_response(request, validators)  # type: ignore
         
     except Exception as e:
-        logging.error(f"Error loading groups from meta.json: {str(e)}")
+        logger.error(f"Error loading groups from catalog: {str(e)}")
         raise HTTPException(status_code=500, detail="Error loading groups")
 
+def _render_chart_payload(
+    entries: List[ChartEntry],
+    fmt: str,
+    single: bool,
+    extras: Optional[Dict[str, Dict[str, Any]]] = None
+) -> CachedPayload:
+    """Сериализует данные тикеров в запрошенном формате; extras - доп. поля по тикерам (JSON и заголовок binary)"""
+    if fmt == "binary":
+        return CachedPayload(encode_binary(entries, extras), BINARY_MEDIA_TYPE)
+    if fmt == "arrow":
+        return CachedPayload(encode_arrow(entries), ARROW_MEDIA_TYPE)
+
+    rendered: Dict[str, Dict[str, Any]] = {}
+    for ticker_name, group_name, chart_type, records in entries:
+        rendered[ticker_name] = {
+            "ticker": ticker_name,
+            "group": group_name,
+            "type": chart_type,
+            **(extras or {}).get(ticker_name, {}),
+            "data": to_columnar(records) if fmt == "columnar" else records
+        }
+    if single:
+        return CachedPayload(dump_json(next(iter(rendered.values()))))
+    return CachedPayload(dump_json(rendered))
+
+
+def _render_aligned_payload(matrix: AlignedMatrix, types: Dict[str, str], fmt: str) -> CachedPayload:
+    """Сериализует выровненную матрицу группы в запрошенном формате"""
+    args = (matrix.group, matrix.tickers, types, matrix.dates, matrix.fields)
+    if fmt == "binary":
+        return CachedPayload(encode_aligned_binary(*args), BINARY_MEDIA_TYPE)
+    if fmt == "arrow":
+        return CachedPayload(encode_aligned_arrow(*args), ARROW_MEDIA_TYPE)
+    # Выровненный JSON уже колоночный - json и columnar совпадают
+    return CachedPayload(dump_json(aligned_to_json(*args)))
+
+
 @router.get("/api/chart-data")
 async def get_chart_data(
+    request: Request,
     group: Optional[str] = Query(None),
-    ticker: Optional[str] = Query(None)
+    ticker: Optional[str] = Query(None),
+    format: str = Query(
+        "json",
+        pattern="^(json|columnar|binary|arrow)$",
+        description="json - row per bar; columnar - {dates: [...], close: [...]}; "
+                    "binary - packed little-endian buffers; arrow - Apache Arrow IPC stream"
+    ),
+    layout: str = Query(
+        "rows",
+        pattern="^(rows|aligned)$",
+        description="rows - each ticker with its own dates; "
+                    "aligned - group matrix on a shared dates axis (requires group)"
+    ),
+    since_version: Optional[int] = Query(
+        None, ge=0, description="Return only rows changed after this ticker data version"
+    ),
+    since_date: Optional[str] = Query(
+        None, pattern=r"^\d{4}-\d{2}-\d{2}$", description="Return only rows dated on or after YYYY-MM-DD"
+    )
 ) -> Union[Dict[str, Any], Dict[str, Dict[str, Any]]]:
     try:
-        # Загружаем метаданные для получения информации о группах
-        meta_path = DATA_DIR / "meta.json"
-        if not meta_path.exists():
-            raise HTTPException(status_code=404, detail="Meta data not found")
+        if format == "arrow" and not arrow_available():
+            raise HTTPException(status_code=400, detail="format=arrow requires pyarrow on the server")
+        
+        delta = since_version is not None or since_date is not None
+        if delta:
+            if since_version is not None and since_date is not None:
+                raise HTTPException(status_code=400, detail="Use either since_version or since_date")
+            if layout != "rows" or format not in ("json", "columnar"):
+                raise HTTPException(status_code=400, detail="Delta requests support layout=rows with json or columnar format")
         
-        with open(meta_path, 'r', encoding='utf-8') as f:
-            meta_data = json.load(f)
+        def versioned(ticker_info: Dict[str, Any], records: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+            """Срез строк для дельта-запроса и поля версии для ответа"""
+            extra: Dict[str, Any] = {"version": int(ticker_info.get('data_version', 0))}
+            if not delta:
+                return records, extra
+            full, from_date = delta_window(ticker_info, since_version, since_date)
+            start = slice_from_date([r['date'] for r in records], full, from_date)
+            extra.update(full=full, from_date=None if full else from_date)
+            return records[start:], extra
+        
+        if layout == "aligned":
+            if not group or ticker:
+                raise HTTPException(status_code=400, detail="layout=aligned requires group and no ticker")
+            group_info = group_entries(group, DATA_DIR)
+            if not group_info:
+                raise HTTPException(status_code=404, detail="Group not found")
+            
+            matrix_path = aligned_matrix_path(group, DATA_DIR)
+            catalog_version = entries_version(group_info.values())
+            key = ("chart-data", group, "aligned", format, catalog_version, file_version([matrix_path]))
+            validators = http_validators(key, file_mtime([matrix_path]))
+            unchanged = not_modified(request, validators)
+            if unchanged is not None:
+                return unchanged  # type: ignore
+            payload = payload_cache.get(key)
+            if payload is None:
+                def build_aligned() -> CachedPayload:
+                    matrix = load_aligned_matrix(group, DATA_DIR)
+                    if matrix is None:
+                        raise HTTPException(status_code=404, detail="Group not found")
+                    types = {t: group_info.get(t, {}).get('type', 'line') for t in matrix.tickers}
+                    # Матрица могла быть построена только что - версия после чтения
+                    built_key = ("chart-data", group, "aligned", format, catalog_version, file_version([matrix_path]))
+                    return payload_cache.put(built_key, _render_aligned_payload(matrix, types, format))
+                
+                payload = await coalesce(key, payload_cache.loader(key, build_aligned))
+            return payload.to_response(request, validators)  # type: ignore
         
         if ticker:
             # Загрузка данных для конкретного тикера
@@ -367,46 +822,78 @@ async def get_chart_data(
             if not data_file.exists():
                 raise HTTPException(status_code=404, detail="Ticker not found")
             
-            with open(data_file, 'r', encoding='utf-8') as f:
-                chart_data = json.load(f)
-            
-            # Добавляем метаинформацию
-            ticker_info = meta_data.get(ticker, {})
-            return {
-                "ticker": ticker,
-                "group": ticker_info.get('group', 'Unknown'),
-                "type": ticker_info.get('type', 'line'),
-                "data": chart_data
-            }
+            ticker_info = get_entry(ticker, DATA_DIR) or {}
+            key = (
+                "chart-data", ticker, "ticker", format, (since_version, since_date),
+                entries_version([ticker_info]), file_version([data_file])
+            )
+            validators = http_validators(key, file_mtime([data_file]))
+            unchanged = not_modified(request, validators)
+            if unchanged is not None:
+                return unchanged  # type: ignore
+            payload = payload_cache.get(key)
+            if payload is None:
+                def build_ticker() -> CachedPayload:
+                    with open(data_file, 'r', encoding='utf-8') as f:
+                        chart_data = json.load(f)
+                    chart_data, extra = versioned(ticker_info, chart_data)
+                    
+                    # Добавляем метаинформацию
+                    entries: List[ChartEntry] = [(
+                        ticker,
+                        ticker_info.get('group', 'Unknown'),
+                        ticker_info.get('type', 'line'),
+                        chart_data
+                    )]
+                    return payload_cache.put(
+                        key, _render_chart_payload(entries, format, single=True, extras={ticker: extra})
+                    )
+                
+                payload = await coalesce(key, payload_cache.loader(key, build_ticker))
+            return payload.to_response(request, validators)  # type: ignore
             
         if group:
-            # Загрузка данных для всей группы
-            group_data: Dict[str, Dict[str, Any]] = {}
-            
-            # Находим все тикеры в этой группе
-            group_tickers = {
-                ticker: info for ticker, info in meta_data.items() 
-                if info.get('group') == group
-            }
+            # Находим все тикеры в этой группе (по индексу каталога)
+            group_tickers = group_entries(group, DATA_DIR)
             
             if not group_tickers:
                 raise HTTPException(status_code=404, detail="Group not found")
+            record_group_request(group)
             
-            # Загружаем данные для каждого тикера в группе
-            for ticker_name in group_tickers.keys():
-                data_file = DATA_DIR / f"{ticker_name}.json"
-                if data_file.exists():
-                    with open(data_file, 'r', encoding='utf-8') as f:
-                        chart_data = json.load(f)
-                    
-                    group_data[ticker_name] = {
-                        "ticker": ticker_name,
-                        "group": group,
-                        "type": group_tickers[ticker_name].get('type', 'line'),
-                        "data": chart_data
-                    }
+            data_files = [DATA_DIR / info['data_file'] for info in group_tickers.values()]
             
-            return group_data
+            # Версия группы - по записям и файлам ее тикеров, чтобы загрузка в другую группу не сбрасывала кэш
+            key = (
+                "chart-data", group, "group", format, (since_version, since_date),
+                entries_version(group_tickers.values()), file_version(data_files)
+            )
+            validators = http_validators(key, file_mtime(data_files))
+            unchanged = not_modified(request, validators)
+            if unchanged is not None:
+                return unchanged  # type: ignore
+            payload = payload_cache.get(key)
+            if payload is None:
+                def build_group() -> CachedPayload:
+                    # Загружаем данные для каждого тикера в группе
+                    entries: List[ChartEntry] = []
+                    extras: Dict[str, Dict[str, Any]] = {}
+                    for ticker_name, data_file in zip(group_tickers.keys(), data_files):
+                        if data_file.exists():
+                            with open(data_file, 'r', encoding='utf-8') as f:
+                                chart_data = json.load(f)
+                            chart_data, extras[ticker_name] = versioned(group_tickers[ticker_name], chart_data)
+                            entries.append((
+                                ticker_name,
+                                group,
+                                group_tickers[ticker_name].get('type', 'line'),
+                                chart_data
+                            ))
+                    return payload_cache.put(
+                        key, _render_chart_payload(entries, format, single=False, extras=extras)
+                    )
+                
+                payload = await coalesce(key, payload_cache.loader(key, build_group))
+            return payload.to_response(request, validators)  # type: ignore
             
         raise HTTPException(
             status_code=400,
@@ -416,32 +903,122 @@ async def get_chart_data(
     except HTTPException:
         raise
     except Exception as e:
-        logging.error(f"Error fetching chart data: {str(e)}")
+        logger.error(f"Error fetching chart data: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.get("/api/tickers")
-async def get_tickers() -> List[str]:
-    """Возвращает только список тикеров из meta.json"""
+@router.get("/api/volume-stack")
+async def get_volume_stack(
+    request: Request,
+    group: str = Query(..., description="Group name")
+) -> Dict[str, Any]:
+    """
+    Суммарный объем группы по датам с разбивкой по тикерам (по убыванию объема).
+    Пересчитывается при загрузке данных любого тикера группы.
+    """
     try:
-        meta_file = DATA_DIR / "meta.json"
-        
-        if not meta_file.exists():
-            logging.warning("meta.json file not found")
-            return []
+        path = volume_stack_path(group, DATA_DIR)
+        key = ("volume-stack", group, file_version([path]))
+        validators = http_validators(key, file_mtime([path]))
+        unchanged = not_modified(request, validators)
+        if unchanged is not None:
+            return unchanged  # type: ignore
+        payload = payload_cache.get(key)
+        if payload is None:
+            def build() -> CachedPayload:
+                stack = load_volume_stack(group, DATA_DIR)
+                if stack is None:
+                    raise HTTPException(status_code=404, detail="Group not found")
+                # Файл мог быть создан только что - берем версию уже после чтения
+                return payload_cache.put(("volume-stack", group, file_version([path])), CachedPayload(dump_json(stack)))
+            
+            payload = await coalesce(key, payload_cache.loader(key, build))
+        return payload.to_response(request, validators)  # type: ignore
         
-        # Читаем и парсим meta.json
-        meta_content = meta_file.read_text(encoding='utf-8')
-        meta_data = json.loads(meta_content)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error fetching volume stack for group {group}: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/api/range-stats")
+async def get_range_stats(
+    ticker: str = Query(..., description="Ticker symbol"),
+    date_from: Optional[str] = Query(None, alias="from", pattern=r"^\d{4}-\d{2}-\d{2}$", description="First date, YYYY-MM-DD"),
+    date_to: Optional[str] = Query(None, alias="to", pattern=r"^\d{4}-\d{2}-\d{2}$", description="Last date, YYYY-MM-DD"),
+) -> Dict[str, Any]:
+    """
+    Сводка по диапазону дат [from, to]: число баров, сумма и среднее объема,
+    средняя цена, минимум low и максимум high. Отвечает по индексу тикера
+    за постоянное время независимо от длины диапазона.
+    """
+    try:
+        if date_from and date_to and date_from > date_to:
+            raise HTTPException(status_code=400, detail="'from' must not be after 'to'")
+        index = load_range_index(ticker, DATA_DIR)
+        if index is None:
+            raise HTTPException(status_code=404, detail="Ticker not found")
+        return {"ticker": ticker, "from": date_from, "to": date_to, **index.stats(date_from, date_to)}
         
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error computing range stats for {ticker}: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/api/events")
+async def stream_events(
+    request: Request,
+    last_event_id: Optional[int] = Header(None, alias="Last-Event-ID")
+) -> StreamingResponse:
+    """
+    Server-Sent Events об изменении данных:
+    data - {ticker, group, new_version, date_range}, reset - {ticker, group},
+    indicators - пересчитаны все индикаторы, resync - клиент отстал и должен перечитать данные.
+    """
+    async def stream():
+        subscription = broadcaster.subscribe(last_event_id)
+        try:
+            yield b"retry: 3000\n\n"
+            while not await request.is_disconnected():
+                event = await subscription.get(timeout=EVENT_HEARTBEAT_SECONDS)
+                yield format_sse(event) if event is not None else b": ping\n\n"
+        finally:
+            broadcaster.unsubscribe(subscription)
+
+    headers = {
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no",
+        # GZipMiddleware буферизует потоковые ответы - явно отключаем для него сжатие
+        "Content-Encoding": "identity",
+    }
+    return StreamingResponse(stream(), media_type="text/event-stream", headers=headers)
+
+
+@router.get("/api/tickers")
+async def get_tickers(request: Request) -> List[str]:
+    """Возвращает только список тикеров каталога"""
+    try:
         # Извлекаем только тикеры
+        meta_data = load_meta()
         tickers = list(meta_data.keys())
         
-        logging.info(f"Found {len(tickers)} tickers in meta.json")
-        return tickers
+        key = ("tickers", "*", _meta_cache["version"])
+        validators = http_validators(key, catalog_state(DATA_DIR)[1])
+        unchanged = not_modified(request, validators)
+        if unchanged is not None:
+            return unchanged  # type: ignore
+        payload = payload_cache.get(key)
+        if payload is None:
+            payload = await coalesce(
+                key, payload_cache.loader(key, lambda: payload_cache.put(key, CachedPayload(dump_json(tickers))))
+            )
+        return payload.to_response(request, validators)  # type: ignore
         
     except Exception as e:
-        logging.error(f"Error fetching tickers: {str(e)}")
+        logger.error(f"Error fetching tickers: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal server error while fetching tickers")
 
 from fastapi import Body
@@ -453,7 +1030,8 @@ async def set_indicators(
         ...,
         example={
             "ema_periods": [50, 200],
-            "rsi_period": 14  
+            "rsi_period": 14,
+            "indicators": [{"name": "macd", "params": {"fast": 12, "slow": 26, "signal": 9}}]
         }
     ),
     admin_user: User = Depends(deps.get_admin_user)
@@ -465,34 +1043,41 @@ async def set_indicators(
                 detail="Missing required parameters"
             )
             
-        # Обновляем настройки в конфиге
-        update_indicators_config({
+        new_settings: Dict[str, Any] = {
             "ema_periods": params['ema_periods'],
             "rsi_period": params['rsi_period']
-        })
+        }
+        if 'indicators' in params:
+            # Дополнительные индикаторы проверяем по реестру до записи конфига
+            try:
+                for item in params['indicators']:
+                    make_instance(item['name'], item.get('params'))
+            except (ValueError, KeyError, TypeError) as e:
+                raise HTTPException(status_code=400, detail=f"Invalid indicators: {e}")
+            new_settings["indicators"] = params['indicators']
         
-        # Пересчитываем индикаторы для всех файлов
-        for file in DATA_DIR.glob("*.json"):
-            if file.name == "meta.json":
-                continue
-                
-            # Загружаем данные
-            with open(file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            
-            # Преобразуем в DataFrame и пересчитываем индикаторы
-            df = pd.DataFrame(data)
-            df_with_indicators = calculate_indicators(df)
-            
-            # Сохраняем индикаторы отдельно
-            ticker = file.stem
-            save_indicators_to_json(ticker, df, df_with_indicators)
+        # Обновляем настройки в конфиге
+        update_indicators_config(new_settings)
+        
+        # Пересчитываем индикаторы для всех файлов: по одному тикеру, числовые
+        # столбцы float64 - в памяти одновременно только данные одного тикера.
+        # Версия тикера растет, чтобы дельта-запросы (since_version) получили пересчет
+        versions: Dict[str, int] = {}
+        for ticker_name in list_tickers(DATA_DIR):
+            recompute_ticker_indicators(ticker_name, DATA_DIR)
+            version = record_indicators_change(ticker_name, DATA_DIR)
+            if version is not None:
+                versions[ticker_name] = version
             
-        logging.info("Updated indicators with new parameters")
+        invalidate_cached_payloads()
+        broadcaster.publish("indicators", versions=versions)
+        logger.info("Updated indicators with new parameters")
         return {"message": "Indicators updated successfully"}
         
+    except HTTPException:
+        raise
     except Exception as e:
-        logging.error(f"Error updating indicators: {str(e)}")
+        logger.error(f"Error updating indicators: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
     
 
@@ -500,6 +1085,7 @@ async def set_indicators(
 class IndicatorSettings(TypedDict):
     ema_periods: List[int]
     rsi_period: int
+    indicators: NotRequired[List[Dict[str, Any]]]
     last_updated: str
     updated_by: str
 
@@ -531,6 +1117,12 @@ async def get_indicator_settings() -> IndicatorSettings:
         raise HTTPException(status_code=500, detail=str(e))    
 
 
+@router.get("/api/indicator-registry")
+async def get_indicator_registry() -> List[Dict[str, Any]]:
+    """Доступные индикаторы: входы, параметры по умолчанию, выходы и длина прогрева"""
+    return [spec.describe() for spec in INDICATORS.values()]
+
+
 class IndicatorPoint(BaseModel):
     date: str
     value: Optional[float] = None
@@ -538,13 +1130,24 @@ class IndicatorPoint(BaseModel):
 class IndicatorResponse(BaseModel):
     ticker: str
     indicator: str
+    version: int = 0
+    full: Optional[bool] = None
+    from_date: Optional[str] = None
     data: List[IndicatorPoint]
 
 @router.get("/indicators/{ticker}", response_model=IndicatorResponse)
 async def get_indicator(
+    request: Request,
     ticker: str,
-    indicator: str = Query(..., description="Indicator name (e.g. ema, rsi)"),
-    period: int = Query(..., description="Indicator period (e.g. 14, 50, 200)")
+    indicator: str = Query(..., description="Indicator name (e.g. ema, rsi) or full key (e.g. macd_12_26_9)"),
+    period: Optional[int] = Query(None, description="Indicator period (e.g. 14, 50, 200); omit when indicator is a full key"),
+    output: Optional[str] = Query(None, description="Output of a multi-output indicator (e.g. signal for MACD)"),
+    since_version: Optional[int] = Query(
+        None, ge=0, description="Return only the tail recomputed after this ticker data version"
+    ),
+    since_date: Optional[str] = Query(
+        None, pattern=r"^\d{4}-\d{2}-\d{2}$", description="Return only points dated on or after YYYY-MM-DD"
+    )
 ):
     # Декодируем тикер из URL
     decoded_ticker: str = urllib.parse.unquote(ticker)
@@ -558,37 +1161,65 @@ async def get_indicator(
         raise HTTPException(status_code=404, detail="Indicators directory not found")
 
     if not file_path.exists():
-        available_files: List[str] = [f.name for f in indicators_dir.glob("*.json")]
-        raise HTTPException(status_code=404, detail=f"Ticker not found: {decoded_ticker}. Available: {available_files}")
+        raise HTTPException(status_code=404, detail=f"Ticker not found: {decoded_ticker}")
 
-    # Загружаем JSON
-    try:
-        with open(file_path, "r", encoding="utf-8") as f:
-            content: dict[str, Any] = json.load(f)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error reading indicator file: {str(e)}")
-
-    key: str = f"{indicator}_{period}"
-    indicators: dict[str, Any] = content.get("indicators", {})
-    if key not in indicators:
-        available_indicators: List[str] = list(indicators.keys())
-        raise HTTPException(status_code=404, detail=f"Indicator {key} not found. Available: {available_indicators}")
-
-    dates_raw: List[Any] = content.get("dates", [])
-    values_raw: List[Any] = indicators[key]
-
-    # Приводим данные к корректным типам
-    dates: List[str] = [str(d) for d in dates_raw]
-    values: List[Optional[float]] = [float(v) if v is not None else None for v in values_raw]
-
-    # Формируем список точек индикатора
-    data: List[IndicatorPoint] = [
-        IndicatorPoint(date=d, value=v) for d, v in zip(dates, values)
-        #  if v is not None
-    ]
-
-    return IndicatorResponse(
-        ticker=str(content.get("ticker", decoded_ticker)),
-        indicator=key,
-        data=data
-    )
\ No newline at end of file
+    if since_version is not None and since_date is not None:
+        raise HTTPException(status_code=400, detail="Use either since_version or since_date")
+
+    key: str = indicator if period is None else f"{indicator}_{period}"
+    if output:
+        key = f"{key}.{output}"
+    # Ответ содержит версию и окно дельты из каталога - они входят в ключ, как у chart-data
+    ticker_info = get_entry(decoded_ticker, DATA_DIR) or {}
+    cache_key = (
+        "indicator", decoded_ticker, key, (since_version, since_date),
+        entries_version([ticker_info]), file_version([file_path])
+    )
+    validators = http_validators(cache_key, file_mtime([file_path]))
+    unchanged = not_modified(request, validators)
+    if unchanged is not None:
+        return unchanged
+    cached = payload_cache.get(cache_key)
+    if cached is not None:
+        return cached.to_response(request, validators)
+
+    def build() -> CachedPayload:
+        # Загружаем JSON
+        try:
+            with open(file_path, "r", encoding="utf-8") as f:
+                content: dict[str, Any] = json.load(f)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error reading indicator file: {str(e)}")
+
+        indicators: dict[str, Any] = content.get("indicators", {})
+        if key not in indicators:
+            available_indicators: List[str] = list(indicators.keys())
+            raise HTTPException(status_code=404, detail=f"Indicator {key} not found. Available: {available_indicators}")
+
+        dates_raw: List[Any] = content.get("dates", [])
+        values_raw: List[Any] = indicators[key]
+
+        # Приводим данные к корректным типам
+        dates: List[str] = [str(d) for d in dates_raw]
+        values: List[Optional[float]] = [float(v) if v is not None else None for v in values_raw]
+
+        # Индикатор пересчитывается по всей истории, поэтому в дельту входит весь
+        # хвост начиная с минимальной измененной даты
+        full, from_date = delta_window(ticker_info, since_version, since_date)
+        start = slice_from_date(dates, full, from_date)
+
+        # Формируем список точек индикатора (в формате IndicatorResponse, без
+        # создания pydantic-объекта на каждую точку)
+        response: Dict[str, Any] = {
+            "ticker": str(content.get("ticker", decoded_ticker)),
+            "indicator": key,
+            "version": int(ticker_info.get('data_version', 0)),
+            "data": [{"date": d, "value": v} for d, v in zip(dates[start:], values[start:])]
+        }
+        if since_version is not None or since_date is not None:
+            response.update(full=full, from_date=None if full else from_date)
+        return payload_cache.put(cache_key, CachedPayload(dump_json(response)))
+
+    # Одновременные одинаковые запросы (например, сразу после загрузки) читают файл один раз
+    payload = await coalesce(cache_key, payload_cache.loader(cache_key, build))
+    return payload.to_response(request, validators)
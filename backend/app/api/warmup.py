@@ -0,0 +1,194 @@
+# backend/app/api/warmup.py
+"""
+Прогрев кэша ответов после старта.
+
+В фоне (порт уже открыт) заполняет payload_cache теми же ответами, что отдают
+эндпоинты: каталог (available-groups, tickers), затем группы по убыванию числа
+запросов до перезапуска и свежести данных - chart-data группы, стек объемов и
+индикаторы ее тикеров из конфига (configured_indicators: ema, rsi и индикаторы
+реестра, по каждому выходу). Вызываются сами обработчики маршрутов, поэтому
+ключи кэша и сжатые варианты совпадают с настоящими запросами; вызовы прогрева
+в счетчики запросов групп не попадают.
+
+Прогрев останавливается при исчерпании бюджета памяти (WARMUP_MEMORY_MB, прирост
+payload_cache) или времени (WARMUP_TIME_LIMIT, секунды). WARMUP_ENABLED=0 отключает.
+Счетчики запросов групп сохраняются в data/index/group_requests.json при остановке.
+Ход прогрева отдается в /health.
+"""
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Callable, Coroutine, Dict, List, Optional
+
+from starlette.requests import Request
+
+from app.core.cache import payload_cache
+from app.utils.paths import DATA_DIR, index_dir
+
+logger = logging.getLogger(__name__)
+
+WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "1").lower() not in ("0", "false", "no")
+WARMUP_MEMORY_BYTES = int(os.getenv("WARMUP_MEMORY_MB", "64")) * 1024 * 1024
+WARMUP_TIME_LIMIT = float(os.getenv("WARMUP_TIME_LIMIT", "30"))
+# Как у браузера: сжатый вариант готовится в той же кодировке, что выберет запрос
+WARMUP_ACCEPT_ENCODING = "gzip, deflate, br"
+
+_group_requests: Counter = Counter()
+_requests_lock = threading.Lock()
+
+_status: Dict[str, Any] = {"state": "pending"}
+
+# Обработчик вызван прогревом, а не клиентом
+_warmup_call: ContextVar[bool] = ContextVar("warmup_call", default=False)
+
+
+def requests_path(data_dir: Path = DATA_DIR) -> Path:
+    return index_dir(data_dir) / "group_requests.json"
+
+
+def record_group_request(group: str) -> None:
+    """Вызывается chart-data для запросов группы - порядок прогрева после перезапуска"""
+    if _warmup_call.get():
+        return
+    with _requests_lock:
+        _group_requests[group] += 1
+
+
+def load_group_requests(data_dir: Path = DATA_DIR) -> None:
+    try:
+        saved: Dict[str, int] = json.loads(requests_path(data_dir).read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        return
+    with _requests_lock:
+        _group_requests.update(saved)
+
+
+def save_group_requests(data_dir: Path = DATA_DIR) -> None:
+    with _requests_lock:
+        counts = dict(_group_requests)
+    if not counts:
+        return
+    path = requests_path(data_dir)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(counts, ensure_ascii=False), encoding="utf-8")
+
+
+def warmup_status() -> Dict[str, Any]:
+    return dict(_status)
+
+
+def ranked_groups(meta_data: Dict[str, Any]) -> List[str]:
+    """Группы по убыванию числа запросов, затем по времени последнего обновления"""
+    last_updated: Dict[str, str] = {}
+    for info in meta_data.values():
+        group = info.get("group")
+        if group is not None:
+            last_updated[group] = max(last_updated.get(group, ""), str(info.get("last_updated", "")))
+    with _requests_lock:
+        counts = dict(_group_requests)
+    return sorted(last_updated, key=lambda g: (counts.get(g, 0), last_updated[g]), reverse=True)
+
+
+def _request() -> Request:
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "path": "/",
+        "query_string": b"",
+        "headers": [(b"accept-encoding", WARMUP_ACCEPT_ENCODING.encode())],
+    })
+
+
+def _call(handler: Callable[..., Coroutine[Any, Any, Any]], **kwargs: Any) -> bool:
+    """Выполняет обработчик маршрута; ошибки (нет файла и т.п.) прогрев пропускает"""
+    from fastapi import HTTPException
+
+    # asyncio.run копирует контекст потока - обработчик видит флаг прогрева
+    token = _warmup_call.set(True)
+    try:
+        asyncio.run(handler(request=_request(), **kwargs))
+        return True
+    except HTTPException:
+        return False
+    finally:
+        _warmup_call.reset(token)
+
+
+def run_warmup(
+    memory_budget: int = WARMUP_MEMORY_BYTES, time_limit: float = WARMUP_TIME_LIMIT
+) -> Dict[str, Any]:
+    """Синхронный прогрев (выполняется в отдельном потоке)"""
+    from app.api.routes import charts
+    from app.utils.config_manager import get_indicators_config
+    from app.utils.indicator_registry import configured_indicators
+
+    started = time.perf_counter()
+    base_size = payload_cache.size
+    budget = min(memory_budget, payload_cache.max_bytes)
+    _status.clear()
+    _status.update(state="running", groups_total=0, groups_warmed=0, payloads=0, bytes=0, elapsed_seconds=0.0)
+
+    def exhausted() -> Optional[str]:
+        used = payload_cache.size - base_size
+        _status.update(bytes=used, elapsed_seconds=round(time.perf_counter() - started, 3))
+        if used >= budget:
+            return "memory_budget"
+        if time.perf_counter() - started >= time_limit:
+            return "time_limit"
+        return None
+
+    def warm(handler: Callable[..., Coroutine[Any, Any, Any]], **kwargs: Any) -> None:
+        if _call(handler, **kwargs):
+            _status["payloads"] += 1
+
+    chart_defaults = dict(format="json", layout="rows", since_version=None, since_date=None)
+    indicator_defaults = dict(period=None, since_version=None, since_date=None)
+    stopped: Optional[str] = None
+    try:
+        warm(charts.get_available_groups)
+        warm(charts.get_tickers)
+        meta_data = charts.load_meta()
+        groups = ranked_groups(meta_data)
+        _status["groups_total"] = len(groups)
+
+        # Запросы как у клиента: полный ключ индикатора и выход многовыходных (MACD, BB)
+        indicator_requests = [
+            (instance.key, output if len(instance.spec.outputs) > 1 else None)
+            for instance in configured_indicators(get_indicators_config())
+            for output in instance.spec.outputs
+        ]
+
+        for group in groups:
+            stopped = exhausted()
+            if stopped:
+                break
+            warm(charts.get_chart_data, group=group, ticker=None, **chart_defaults)
+            warm(charts.get_volume_stack, group=group)
+            for ticker, info in meta_data.items():
+                if info.get("group") != group:
+                    continue
+                for indicator, output in indicator_requests:
+                    warm(charts.get_indicator, ticker=ticker, indicator=indicator, output=output, **indicator_defaults)
+            _status["groups_warmed"] += 1
+        stopped = stopped or exhausted()
+        _status.update(state="done", stopped_by=stopped)
+    except Exception as e:
+        logger.exception("Cache warm-up failed")
+        _status.update(state="failed", error=str(e))
+    logger.info("Cache warm-up finished", extra=dict(_status))
+    return warmup_status()
+
+
+async def start_warmup() -> Optional["asyncio.Task[Dict[str, Any]]"]:
+    """Запускает прогрев в фоне; готовность сервера его не ждет"""
+    load_group_requests()
+    if not WARMUP_ENABLED:
+        _status.update(state="disabled")
+        return None
+    return asyncio.create_task(asyncio.to_thread(run_warmup))
@@ -0,0 +1,317 @@
+# backend/app/cli.py
+"""
+Офлайн-импорт и пересборка хранилища data/ без веб-процесса.
+
+Запуск (из директории backend, рядом с data/):
+    python -m app.cli import SOURCE_DIR [--kind candlestick|line] [--workers N]
+    python -m app.cli rebuild-indicators [--workers N]
+    python -m app.cli rebuild-meta [--workers N]
+    python -m app.cli rebuild [--workers N]          # rebuild-meta + rebuild-indicators
+
+import разбирает все xlsx/xls/csv/parquet (и ZIP-архивы с ними) из SOURCE_DIR так же,
+как /charts/upload-bulk, и раскладывает тикеры по процессам (уже загруженные файлы
+и тикеры без изменений пропускаются по реестру загрузок): каждый процесс пишет
+{ticker}.json, индексы и индикаторы своего тикера. Каталог тикеров (одной
+транзакцией) и групповые агрегаты обновляет родительский процесс после всех тикеров.
+
+rebuild-meta собирает каталог заново по файлам data/*.json (группа и тип берутся
+из прежнего каталога, а для неизвестных тикеров определяются по данным), заново
+строит индексы дат и диапазонов и групповые агрегаты. Версия данных каждого тикера
+увеличивается - клиенты дельта-синхронизации перечитают тикер целиком.
+
+rebuild-indicators пересчитывает data/indicators/ и после перезаписи файлов тоже
+увеличивает версию тикеров (как /charts/set-indicators). В rebuild это второе
+увеличение после rebuild-meta: клиент, успевший синхронизироваться между этапами,
+получит пересчитанные индикаторы.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, TypeVar
+
+import numpy as np
+import pandas as pd
+
+from app.utils.bulk_upload import (
+    BULK_UPLOAD_EXTENSIONS,
+    BULK_UPLOAD_KINDS,
+    expand_archive,
+    is_archive,
+    merge_ticker_frames,
+    read_ticker_frames,
+)
+from app.utils.data_processing import (
+    DATA_DIR,
+    linear_group,
+    process_candlestick_data,
+    process_linear_data,
+    recompute_ticker_indicators,
+    record_indicators_change,
+    record_ticker_change,
+    save_json_data,
+)
+from app.utils.catalog import all_entries, list_tickers, put_entries
+from app.utils.date_index import to_days, write_date_index
+from app.utils.group_aggregates import rebuild_aligned_matrix, rebuild_volume_stack
+from app.utils.range_index import build_range_index, write_range_index
+from app.utils.upload_registry import (
+    cached_upload,
+    frame_digest,
+    path_digest,
+    remember_sheet,
+    remember_upload,
+    sheet_unchanged,
+)
+
+T = TypeVar("T")
+
+
+class Progress:
+    """Строка прогресса в stderr: "[этап] 12/40 ticker (3.1s)" """
+
+    def __init__(self, stage: str, total: int):
+        self.stage = stage
+        self.total = total
+        self.done = 0
+        self.started = time.perf_counter()
+
+    def step(self, item: str) -> None:
+        self.done += 1
+        elapsed = time.perf_counter() - self.started
+        end = "\n" if self.done == self.total else ""
+        sys.stderr.write(f"\r[{self.stage}] {self.done}/{self.total} {item[:40]:<40} ({elapsed:.1f}s)" + end)
+        sys.stderr.flush()
+
+
+def fan_out(
+    stage: str, worker: Callable[..., T], jobs: Dict[str, Tuple[Any, ...]], workers: int
+) -> Tuple[Dict[str, T], List[str]]:
+    """
+    Выполняет worker(*args) для каждого задания в пуле процессов, показывая прогресс.
+    Ошибка задания не прерывает остальные: она пишется в stderr, а имя задания
+    возвращается в списке неудачных - (результаты, неудачные).
+    """
+    results: Dict[str, T] = {}
+    failed: List[str] = []
+    if not jobs:
+        return results, failed
+    progress = Progress(stage, len(jobs))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures: Dict[Future, str] = {pool.submit(worker, *args): name for name, args in jobs.items()}
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                failed.append(name)
+                sys.stderr.write(f"\n[{stage}] {name} failed: {type(e).__name__}: {e}\n")
+            progress.step(name)
+    return results, sorted(failed)
+
+
+def data_tickers(data_dir: Path = DATA_DIR) -> List[str]:
+    """Тикеры по файлам data/*.json - для пересборки каталога, когда ему нельзя доверять"""
+    return sorted(path.stem for path in data_dir.glob("*.json") if path.name != "meta.json")
+
+
+def rebuild_groups(groups: Iterable[str], data_dir: Path = DATA_DIR) -> None:
+    groups = sorted(set(groups))
+    progress = Progress("groups", len(groups))
+    for group in groups:
+        rebuild_aligned_matrix(group, data_dir)
+        rebuild_volume_stack(group, data_dir)
+        progress.step(group)
+
+
+# --- Задания для процессов (функции верхнего уровня - передаются в пул по имени) ---
+
+def _import_ticker(kind: str, ticker: str, group: str, df: pd.DataFrame) -> Dict[str, Any]:
+    if kind == "line":
+        records, stats = process_linear_data(df)
+    else:
+        candlestick_data, stats = process_candlestick_data(df, ticker)
+        records = candlestick_data["data"]
+    save_stats = save_json_data(records, ticker, group, kind, write_meta=False)
+    if records:
+        recompute_ticker_indicators(ticker)
+    return {**stats, **save_stats}
+
+
+def _scan_ticker(ticker: str, data_dir: Path) -> Dict[str, Any]:
+    """Пересобирает индексы тикера и возвращает сведения для каталога"""
+    records: List[Dict[str, Any]] = json.loads((data_dir / f"{ticker}.json").read_text(encoding="utf-8"))
+    records.sort(key=lambda r: r["date"])
+    write_date_index(ticker, to_days(r["date"] for r in records) if records else np.empty(0, dtype=np.int32), data_dir)
+    write_range_index(ticker, build_range_index(records), data_dir)
+    return {
+        "type": "candlestick" if records and "open" in records[0] else "line",
+        "total_records": len(records),
+        "first_date": records[0]["date"] if records else None,
+        "date_range": [str(records[0]["date"])[:10], str(records[-1]["date"])[:10]] if records else None,
+    }
+
+
+# --- Команды ---
+
+def _source_files(source: Path, work_dir: Path) -> List[Path]:
+    files: List[Path] = []
+    for position, path in enumerate(sorted(p for p in source.rglob("*") if p.is_file())):
+        if is_archive(path):
+            files.extend(expand_archive(path, work_dir / f"archive-{position}"))
+        elif path.suffix.lower() in BULK_UPLOAD_EXTENSIONS:
+            files.append(path)
+    return files
+
+
+def command_import(source: Path, kind: str, workers: int) -> int:
+    DATA_DIR.mkdir(exist_ok=True)
+    with tempfile.TemporaryDirectory(prefix="import-") as tmp:
+        try:
+            found = _source_files(source, Path(tmp))
+        except ValueError as e:
+            print(str(e), file=sys.stderr)
+            return 1
+        if not found:
+            print(f"No {', '.join(BULK_UPLOAD_EXTENSIONS)} files in {source}", file=sys.stderr)
+            return 1
+        digests = {str(path): path_digest(path) for path in found}
+        files = [path for path in found if cached_upload(kind, digests[str(path)]) is None]
+        if len(files) < len(found):
+            print(f"Skipping {len(found) - len(files)} already imported files", file=sys.stderr)
+        parsed, failed_files = fan_out(
+            "parse", read_ticker_frames, {str(path): (path, kind) for path in files}, workers
+        )
+    # Неразобранные файлы пропускаются, как в /charts/upload-bulk
+    files = [path for path in files if str(path) in parsed]
+    # Порядок файлов важен для слияния: раньше в списке - приоритетнее
+    merged = merge_ticker_frames([parsed[str(path)] for path in files], kind)
+    sheet_digests = {ticker: frame_digest(df) for ticker, df in merged.items()}
+    unchanged = [ticker for ticker in merged if sheet_unchanged(kind, ticker, sheet_digests[ticker])]
+    for ticker in unchanged:
+        del merged[ticker]
+
+    groups = {ticker: linear_group(ticker) if kind == "line" else ticker for ticker in merged}
+    # Каталог пишется для успешно импортированных тикеров и при ошибках остальных
+    results, failed_tickers = fan_out(
+        "import",
+        _import_ticker,
+        {ticker: (kind, ticker, groups[ticker], df) for ticker, df in merged.items()},
+        workers,
+    )
+
+    meta_data = all_entries()
+    changed: Dict[str, Any] = {}
+    for ticker, result in sorted(results.items()):
+        if result["new_records_added"]:
+            record_ticker_change(
+                meta_data, ticker, groups[ticker], kind, result["first_new_date"], result["total_records_now"],
+                result["date_range"],
+            )
+            changed[ticker] = meta_data[ticker]
+    put_entries(changed)
+    rebuild_groups(groups[t] for t, r in results.items() if r["new_records_added"])
+
+    for ticker in results:
+        remember_sheet(kind, ticker, sheet_digests[ticker])
+    # Файл с неудачным тикером не запоминается - повторный запуск его дозагрузит
+    if not failed_tickers:
+        processing_date = datetime.now().isoformat()
+        for path in files:
+            remember_upload(kind, digests[str(path)], {"filename": path.name, "bulk_upload": True, "processing_date": processing_date})
+
+    new_records = sum(r["new_records_added"] for r in results.values())
+    print(
+        f"Imported {len(files)} files, {len(results)} tickers ({len(unchanged)} unchanged skipped), "
+        f"{new_records} new records"
+    )
+    if failed_files or failed_tickers:
+        print(f"Failed: {len(failed_files)} files, {len(failed_tickers)} tickers", file=sys.stderr)
+        return 1
+    return 0
+
+
+def command_rebuild_indicators(workers: int) -> int:
+    tickers = list_tickers()
+    rebuilt, failed = fan_out("indicators", recompute_ticker_indicators, {ticker: (ticker,) for ticker in tickers}, workers)
+    # Как после /set-indicators: версия растет, дельта-клиенты перечитают индикаторы
+    for ticker in sorted(rebuilt):
+        record_indicators_change(ticker)
+    print(f"Rebuilt indicators for {len(tickers) - len(failed)} tickers")
+    if failed:
+        print(f"Failed: {', '.join(failed)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+def command_rebuild_meta(workers: int) -> int:
+    tickers = data_tickers()
+    scanned, failed = fan_out("scan", _scan_ticker, {ticker: (ticker, DATA_DIR) for ticker in tickers}, workers)
+
+    previous = all_entries()
+    meta_data: Dict[str, Any] = {}
+    for ticker in tickers:
+        known: Dict[str, Any] = previous.get(ticker, {})
+        if ticker not in scanned:
+            # Файл не разобрался - прежняя запись каталога остается как есть
+            if known:
+                meta_data[ticker] = known
+            continue
+        info = scanned[ticker]
+        data_type = known.get("type", info["type"])
+        group = known.get("group") or (linear_group(ticker) if data_type == "line" else ticker)
+        # Журнал изменений сохраняется, новая запись - "изменилось все с первой даты"
+        meta_data[ticker] = dict(known)
+        record_ticker_change(
+            meta_data, ticker, group, data_type, info["first_date"] or "", info["total_records"], info["date_range"]
+        )
+    put_entries(meta_data, replace=True)
+
+    dropped = sorted(set(previous) - set(meta_data))
+    rebuild_groups([entry["group"] for entry in meta_data.values()] + [previous[t].get("group", t) for t in dropped])
+    print(f"Rebuilt catalog: {len(meta_data)} tickers, {len(dropped)} stale entries removed")
+    if failed:
+        print(f"Failed: {', '.join(failed)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description=__doc__.split("\n\n")[0].strip())
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    def add_workers(sub: argparse.ArgumentParser) -> None:
+        sub.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="число процессов")
+
+    import_parser = subparsers.add_parser("import", help="импорт каталога файлов в data/")
+    import_parser.add_argument("source", type=Path)
+    import_parser.add_argument("--kind", choices=BULK_UPLOAD_KINDS, default="candlestick")
+    add_workers(import_parser)
+
+    for name, help_text in (
+        ("rebuild-indicators", "пересчитать data/indicators/ для всех тикеров"),
+        ("rebuild-meta", "собрать каталог тикеров, индексы и агрегаты групп по data/*.json"),
+        ("rebuild", "rebuild-meta, затем rebuild-indicators"),
+    ):
+        add_workers(subparsers.add_parser(name, help=help_text))
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.command == "import":
+        return command_import(args.source, args.kind, args.workers)
+    if args.command == "rebuild-indicators":
+        return command_rebuild_indicators(args.workers)
+    if args.command == "rebuild-meta":
+        return command_rebuild_meta(args.workers)
+    return command_rebuild_meta(args.workers) or command_rebuild_indicators(args.workers)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,320 @@
+# backend/app/core/cache.py
+"""In-process кэш сериализованных ответов (JSON + заранее сжатые варианты)"""
+import asyncio
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Tuple, TypeVar
+
+from fastapi import Request
+from fastapi.responses import Response
+
+from app.core.compression import compress, negotiate_encoding
+from app.core.metrics import record_cache, record_single_flight
+from app.core.profiling import sampled
+from app.core.shared_cache import CacheBackend, InvalidationListener, create_backend
+
+PAYLOAD_CACHE_MAX_BYTES = int(os.getenv("PAYLOAD_CACHE_MB", "256")) * 1024 * 1024
+# Сжимаем только то, что больше этого размера - на мелких ответах выигрыша нет
+MIN_COMPRESS_SIZE = 1024
+# Ответы меняются при каждой загрузке: клиенты и прокси хранят их, но перепроверяют
+# по ETag (дешевый 304 без чтения данных)
+HTTP_CACHE_CONTROL = os.getenv("HTTP_CACHE_CONTROL", "public, no-cache")
+
+T = TypeVar("T")
+
+# Каталожные ответы зависят от всех тикеров - сбрасываются при любом изменении
+CATALOG_KINDS = ("available-groups", "tickers")
+
+
+def dump_json(content: Any) -> bytes:
+    """Та же сериализация, что у fastapi.responses.JSONResponse"""
+    return json.dumps(
+        content,
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+def file_mtime(paths: Iterable[Path]) -> Optional[float]:
+    """Время последнего изменения набора файлов (None, если ни одного нет)"""
+    mtimes: List[float] = []
+    for path in paths:
+        try:
+            mtimes.append(path.stat().st_mtime)
+        except FileNotFoundError:
+            continue
+    return max(mtimes) if mtimes else None
+
+
+def http_validators(key: Hashable, last_modified: Optional[float]) -> Dict[str, str]:
+    """
+    Заголовки кэширования ответа. Ключ кэша содержит версию данных и все параметры
+    запроса, поэтому строгий ETag - это хеш ключа (суффикс варианта сжатия
+    добавляют to_response и not_modified, см. _encoded_validators)
+    """
+    digest = hashlib.blake2b(repr(key).encode("utf-8"), digest_size=12).hexdigest()
+    headers = {"ETag": f'"{digest}"', "Cache-Control": HTTP_CACHE_CONTROL}
+    if last_modified is not None:
+        headers["Last-Modified"] = formatdate(last_modified, usegmt=True)
+    return headers
+
+
+def _encoded_validators(validators: Dict[str, str], encoding: Optional[str]) -> Dict[str, str]:
+    """
+    Заголовки для варианта ответа в кодировке encoding: строгий ETag различает
+    варианты сжатия. Суффикс зависит только от согласованной кодировки (не от
+    размера тела), поэтому 304 и 200 на один запрос несут один и тот же ETag
+    """
+    etag = validators.get("ETag")
+    if encoding is None or not etag:
+        return validators
+    return {**validators, "ETag": f'{etag[:-1]}-{encoding}"'}
+
+
+def _etag_base(tag: str) -> str:
+    """'W/"abc-gzip"' -> 'abc': варианты сжатия одного ответа равнозначны для 304"""
+    tag = tag.strip()
+    if tag.startswith("W/"):
+        tag = tag[2:]
+    tag = tag.strip('"')
+    for encoding in ("-gzip", "-br", "-deflate", "-zstd"):
+        if tag.endswith(encoding):
+            return tag[: -len(encoding)]
+    return tag
+
+
+def not_modified(request: Request, validators: Dict[str, str]) -> Optional[Response]:
+    """
+    304, если у клиента актуальная версия (If-None-Match, иначе If-Modified-Since).
+    Вызывается до чтения кэша и файлов данных
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        current = _etag_base(validators["ETag"])
+        matched = if_none_match.strip() == "*" or any(
+            _etag_base(tag) == current for tag in if_none_match.split(",")
+        )
+    else:
+        if_modified_since = request.headers.get("if-modified-since")
+        last_modified = validators.get("Last-Modified")
+        if not if_modified_since or not last_modified:
+            return None
+        try:
+            matched = parsedate_to_datetime(last_modified) <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return None
+    if not matched:
+        return None
+    encoding = negotiate_encoding(request.headers.get("accept-encoding"))
+    return Response(status_code=304, headers={"Vary": "Accept-Encoding", **_encoded_validators(validators, encoding)})
+
+
+def file_version(paths: Iterable[Path]) -> str:
+    """Версия набора файлов по (mtime_ns, size): меняется при любой перезаписи"""
+    digest = hashlib.blake2b(digest_size=12)
+    for path in paths:
+        try:
+            stat = path.stat()
+            digest.update(f"{path}:{stat.st_mtime_ns}:{stat.st_size};".encode())
+        except FileNotFoundError:
+            digest.update(f"{path}:missing;".encode())
+    return digest.hexdigest()
+
+
+class CachedPayload:
+    """Готовое тело ответа; сжатые варианты создаются один раз на версию данных"""
+
+    def __init__(self, body: bytes, media_type: str = "application/json"):
+        self.body = body
+        self.media_type = media_type
+        self._encoded: Dict[str, bytes] = {}
+        self._lock = threading.Lock()
+        # Вызывается после добавления сжатого варианта: кэш пересчитывает свой размер
+        self.on_grow: Optional[Callable[[], None]] = None
+
+    @property
+    def size(self) -> int:
+        return len(self.body) + sum(len(v) for v in self._encoded.values())
+
+    def encoded(self, encoding: str) -> bytes:
+        data = self._encoded.get(encoding)
+        if data is None:
+            with self._lock:
+                data = self._encoded.get(encoding)
+                if data is None:
+                    data = compress(self.body, encoding)
+                    self._encoded[encoding] = data
+                    grown = True
+                else:
+                    grown = False
+            if grown and self.on_grow is not None:
+                self.on_grow()
+        return data
+
+    def to_response(self, request: Request, headers: Optional[Dict[str, str]] = None) -> Response:
+        encoding = negotiate_encoding(request.headers.get("accept-encoding"))
+        response_headers = {"Vary": "Accept-Encoding", **_encoded_validators(headers or {}, encoding)}
+        if encoding is None or len(self.body) < MIN_COMPRESS_SIZE:
+            return Response(self.body, media_type=self.media_type, headers=response_headers)
+
+        response_headers["Content-Encoding"] = encoding
+        return Response(self.encoded(encoding), media_type=self.media_type, headers=response_headers)
+
+
+def _backend_key(key: Hashable) -> str:
+    return hashlib.blake2b(repr(key).encode("utf-8"), digest_size=20).hexdigest()
+
+
+class PayloadCache:
+    """
+    LRU-кэш с ограничением по суммарному размеру в байтах (L1). С backend
+    промахи L1 проверяются в общем L2, а новые ответы записываются в оба уровня.
+    Обращения к L2 блокирующие: get читает только L1 (безопасно в event loop),
+    L2 читается через loader, а put вызывается из build - оба в пуле потоков coalesce.
+    Ключи - кортежи (вид, область, ..., версия)
+    """
+
+    def __init__(
+        self, name: str, max_bytes: int = PAYLOAD_CACHE_MAX_BYTES, backend: Optional[CacheBackend] = None
+    ):
+        self.name = name
+        self.max_bytes = max_bytes
+        self.backend = backend
+        self._entries: "OrderedDict[Hashable, CachedPayload]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[CachedPayload]:
+        """Только L1"""
+        with self._lock:
+            payload = self._entries.get(key)
+            if payload is not None:
+                self._entries.move_to_end(key)
+        record_cache(self.name, payload is not None)
+        return payload
+
+    def get_shared(self, key: Hashable) -> Optional[CachedPayload]:
+        """Ответ из L2 (копируется в L1) или None; блокирующий вызов"""
+        if self.backend is None:
+            return None
+        stored = self.backend.get(_backend_key(key))
+        record_cache(f"{self.name}_l2", stored is not None)
+        if stored is None:
+            return None
+        return self._store(key, CachedPayload(*stored))
+
+    def loader(self, key: Hashable, build: Callable[[], CachedPayload]) -> Callable[[], CachedPayload]:
+        """build для coalesce: в потоке пула сначала L2, при промахе - build"""
+        def load() -> CachedPayload:
+            return self.get_shared(key) or build()
+        return load
+
+    def put(self, key: Hashable, payload: CachedPayload) -> CachedPayload:
+        self._store(key, payload)
+        if self.backend is not None and isinstance(key, tuple) and len(key) > 1:
+            self.backend.set(_backend_key(key), str(key[0]), str(key[1]), payload.body, payload.media_type)
+        return payload
+
+    def _store(self, key: Hashable, payload: CachedPayload) -> CachedPayload:
+        payload.on_grow = self._shrink
+        with self._lock:
+            self._entries[key] = payload
+            self._entries.move_to_end(key)
+            self._evict()
+        return payload
+
+    def _shrink(self) -> None:
+        """Сжатые варианты создаются после записи - лимит проверяется и при их добавлении"""
+        with self._lock:
+            self._evict()
+
+    def invalidate(self, predicate: Callable[[Hashable], bool]) -> int:
+        with self._lock:
+            keys = [k for k in self._entries if predicate(k)]
+            for key in keys:
+                del self._entries[key]
+        return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def invalidate_scopes(self, scopes: Iterable[str], broadcast: bool = True) -> None:
+        """
+        Сбрасывает ответы тикеров/групп scopes и каталожные ответы; без scopes - все.
+        broadcast - удалить их и из L2 и сообщить остальным экземплярам
+        """
+        scope_list = sorted(set(scopes))
+        if scope_list:
+            scope_set = set(scope_list)
+            self.invalidate(
+                lambda key: isinstance(key, tuple) and (key[1] in scope_set or key[0] in CATALOG_KINDS)
+            )
+        else:
+            self.clear()
+        if broadcast and self.backend is not None:
+            self.backend.invalidate(scope_list, CATALOG_KINDS)
+
+    @property
+    def size(self) -> int:
+        with self._lock:
+            return sum(p.size for p in self._entries.values())
+
+    def _evict(self) -> None:
+        total = sum(p.size for p in self._entries.values())
+        while self._entries and total > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            total -= evicted.size
+
+
+payload_cache = PayloadCache("payloads", backend=create_backend())
+
+
+def start_invalidation_listener() -> Optional[InvalidationListener]:
+    """Применяет к L1 инвалидации других экземпляров (только при общем L2)"""
+    if payload_cache.backend is None:
+        return None
+    listener = InvalidationListener(
+        payload_cache.backend, lambda scopes: payload_cache.invalidate_scopes(scopes, broadcast=False)
+    )
+    listener.start()
+    return listener
+
+
+# Идущие вычисления ответов: (цикл событий, ключ кэша) -> задача. Ключ включает
+# версию данных, поэтому запрос после загрузки не получит результат по старым файлам
+_in_flight: Dict[Tuple[int, Hashable], "asyncio.Future[Any]"] = {}
+
+
+async def coalesce(key: Hashable, build: Callable[[], T]) -> T:
+    """
+    Single-flight: одновременные запросы с одинаковым ключом ждут одно вычисление
+    build (в пуле потоков) и получают его результат или исключение.
+
+    Вычисление не привязано к первому запросу: если его клиент отключится,
+    остальные все равно дождутся результата.
+    """
+    loop = asyncio.get_running_loop()
+    flight_key = (id(loop), key)
+    future = _in_flight.get(flight_key)
+    kind = str(key[0]) if isinstance(key, tuple) and key else "payload"
+    record_single_flight(kind, future is not None)
+    if future is None:
+        # sampled: поток вычисления попадает в профиль запроса (ProfilingMiddleware)
+        future = asyncio.ensure_future(asyncio.to_thread(sampled(build)))
+        _in_flight[flight_key] = future
+
+        def done(finished: "asyncio.Future[Any]") -> None:
+            _in_flight.pop(flight_key, None)
+            # Исключение считается полученным, даже если все ожидающие отменены
+            if not finished.cancelled():
+                finished.exception()
+
+        future.add_done_callback(done)
+    return await asyncio.shield(future)
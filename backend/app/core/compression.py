@@ -0,0 +1,57 @@
+# backend/app/core/compression.py
+"""Согласование Content-Encoding (br/gzip) и сжатие готовых JSON-ответов"""
+import gzip
+from typing import Dict, Optional
+
+try:
+    import brotli  # type: ignore
+except ImportError:  # brotli - необязательная зависимость, без нее отдаем gzip
+    brotli = None
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 6
+
+# Порядок предпочтения при равных q
+SUPPORTED_ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def parse_accept_encoding(header: str) -> Dict[str, float]:
+    """'gzip, br;q=0.8, *;q=0' -> {'gzip': 1.0, 'br': 0.8, '*': 0.0}"""
+    result: Dict[str, float] = {}
+    for part in header.split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        result[token] = q
+    return result
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Выбирает лучшее поддерживаемое сжатие или None (identity)"""
+    if not accept_encoding:
+        return None
+    accepted = parse_accept_encoding(accept_encoding)
+    wildcard = accepted.get("*", 0.0)
+    best: Optional[str] = None
+    best_q = 0.0
+    for encoding in SUPPORTED_ENCODINGS:
+        q = accepted.get(encoding, wildcard)
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br" and brotli is not None:
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+    raise ValueError(f"Unsupported encoding: {encoding}")
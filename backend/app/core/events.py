@@ -0,0 +1,127 @@
+# backend/app/core/events.py
+"""
+In-process рассылка событий об изменении данных (для SSE /charts/api/events).
+
+Загрузка публикует событие один раз; каждый подписчик получает его через свою
+ограниченную очередь. Медленный клиент не тормозит остальных: при переполнении
+его очередь сбрасывается и вместо пропущенных событий он получает "resync" -
+сигнал перечитать данные целиком.
+"""
+import asyncio
+import itertools
+import json
+import os
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Set
+
+from app.core.metrics import REGISTRY, Counter, Gauge
+
+EVENT_QUEUE_SIZE = int(os.getenv("EVENT_QUEUE_SIZE", "100"))
+# Сколько последних событий хранить для переподключения по Last-Event-ID
+EVENT_HISTORY_SIZE = int(os.getenv("EVENT_HISTORY_SIZE", "256"))
+# Комментарий-пинг в потоке, чтобы прокси не закрывали простаивающее соединение
+EVENT_HEARTBEAT_SECONDS = 15.0
+
+EVENT_SUBSCRIBERS = REGISTRY.register(Gauge(
+    "event_subscribers", "Connected data-change event subscribers"
+))
+EVENTS_PUBLISHED = REGISTRY.register(Counter(
+    "events_published_total", "Data-change events published", ("type",)
+))
+EVENT_RESYNCS = REGISTRY.register(Counter(
+    "event_resyncs_total", "Subscriber queues dropped because the client fell behind"
+))
+
+
+class Subscription:
+    """Очередь событий одного клиента; наполняется только в потоке его event loop"""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, maxsize: int):
+        self.loop = loop
+        self.queue: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue(maxsize=maxsize)
+
+    def _put(self, event: Dict[str, Any]) -> None:
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Клиент не успевает читать - вместо хвоста событий просим перечитать все
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait({"id": event["id"], "type": "resync"})
+            EVENT_RESYNCS.inc()
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Следующее событие или None по таймауту"""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class Broadcaster:
+    """Один издатель на процесс, раздача событий всем подписчикам"""
+
+    def __init__(self, queue_size: int = EVENT_QUEUE_SIZE, history_size: int = EVENT_HISTORY_SIZE):
+        self.queue_size = queue_size
+        self._subscribers: Set[Subscription] = set()
+        self._history: Deque[Dict[str, Any]] = deque(maxlen=history_size)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def publish(self, event_type: str, **data: Any) -> Dict[str, Any]:
+        """Публикует событие; безопасно вызывать из любого потока"""
+        with self._lock:
+            event = {"id": next(self._ids), "type": event_type, **data}
+            self._history.append(event)
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription._put, event)
+            except RuntimeError:  # event loop подписчика уже закрыт
+                self.unsubscribe(subscription)
+        EVENTS_PUBLISHED.inc(type=event_type)
+        return event
+
+    def subscribe(self, last_event_id: Optional[int] = None) -> Subscription:
+        """
+        Регистрирует подписчика в текущем event loop.
+        С last_event_id досылает пропущенные события из истории или resync, если их уже нет.
+        """
+        subscription = Subscription(asyncio.get_running_loop(), self.queue_size)
+        with self._lock:
+            self._subscribers.add(subscription)
+            missed: List[Dict[str, Any]] = []
+            if last_event_id is not None:
+                missed = [e for e in self._history if e["id"] > last_event_id]
+                oldest = self._history[0]["id"] if self._history else None
+                if oldest is not None and last_event_id < oldest - 1:
+                    missed = [{"id": self._history[-1]["id"], "type": "resync"}]
+        for event in missed:
+            subscription._put(event)
+        EVENT_SUBSCRIBERS.inc()
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            if subscription not in self._subscribers:
+                return
+            self._subscribers.discard(subscription)
+        EVENT_SUBSCRIBERS.dec()
+
+    @property
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len(self._subscribers)
+
+
+def format_sse(event: Dict[str, Any]) -> bytes:
+    """Кадр text/event-stream: id, event и data с JSON-телом"""
+    return (
+        f"id: {event['id']}\n"
+        f"event: {event['type']}\n"
+        f"data: {json.dumps(event, ensure_ascii=False, separators=(',', ':'))}\n\n"
+    ).encode("utf-8")
+
+
+broadcaster = Broadcaster()
@@ -0,0 +1,204 @@
+# backend/app/core/logging_config.py
+"""
+Логирование: JSON-строки, запись в файл вне потока запроса, id запроса, выборка.
+
+Обработчики запросов только кладут запись в очередь (QueueHandler); в файл с
+ротацией по размеру пишет отдельный поток QueueListener.
+
+Переменные окружения:
+    LOG_FILE          - файл лога (по умолчанию log.txt)
+    LOG_MAX_MB        - размер файла до ротации (10)
+    LOG_BACKUPS       - сколько ротированных файлов хранить (5)
+    LOG_LEVEL         - уровень корневого логгера (INFO)
+    LOG_LEVELS        - уровни отдельных логгеров: "app.api.routes.charts=WARNING,app.access=INFO"
+    LOG_SAMPLING      - доля сохраняемых записей ниже WARNING по логгерам: "app.access=0.1"
+    LOG_ACCESS        - 0 отключает строку лога на каждый запрос (app.access)
+
+Запись: {"ts", "level", "logger", "msg", "request_id", ...поля из extra=}.
+"""
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+LOG_FILE = os.getenv("LOG_FILE", "log.txt")
+LOG_MAX_BYTES = int(os.getenv("LOG_MAX_MB", "10")) * 1024 * 1024
+LOG_BACKUPS = int(os.getenv("LOG_BACKUPS", "5"))
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_ACCESS = os.getenv("LOG_ACCESS", "1").lower() not in ("0", "false", "no")
+
+REQUEST_ID_HEADER = "x-request-id"
+
+request_id_var: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("request_id", default=None)
+
+access_logger = logging.getLogger("app.access")
+
+# Стандартные атрибуты LogRecord - все остальное пришло через extra=
+_RECORD_FIELDS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "request_id", "taskName"}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def _parse_mapping(value: str) -> Dict[str, str]:
+    """"a=1,b=2" -> {"a": "1", "b": "2"}"""
+    result: Dict[str, str] = {}
+    for item in value.split(","):
+        name, sep, setting = item.partition("=")
+        if sep and name.strip():
+            result[name.strip()] = setting.strip()
+    return result
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        request_id = getattr(record, "request_id", None)
+        if request_id:
+            entry["request_id"] = request_id
+        for key, value in vars(record).items():
+            if key not in _RECORD_FIELDS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class RequestIdFilter(logging.Filter):
+    """Добавляет id текущего запроса; выполняется в потоке запроса, до очереди"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Оставляет долю записей ниже WARNING для заданных логгеров (и их потомков)"""
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.rates = rates
+
+    def rate(self, name: str) -> float:
+        while name:
+            if name in self.rates:
+                return self.rates[name]
+            name = name.rpartition(".")[0]
+        return 1.0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self.rate(record.name)
+        return rate >= 1.0 or random.random() < rate
+
+
+class _PreformattingQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler по умолчанию форматирует сообщение в потоке запроса; здесь
+    JSON собирает поток записи, в потоке запроса остается только traceback
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if record.exc_info:
+            # traceback нельзя передавать между потоками после выхода из except
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def setup_logging() -> None:
+    """Настраивает корневой логгер один раз за процесс"""
+    global _listener
+    if _listener is not None:
+        return
+
+    file_handler = logging.handlers.RotatingFileHandler(
+        LOG_FILE, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUPS, encoding="utf-8"
+    )
+    file_handler.setFormatter(JsonFormatter())
+
+    log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(-1)
+    queue_handler = _PreformattingQueueHandler(log_queue)
+    queue_handler.addFilter(RequestIdFilter())
+    rates = {name: float(rate) for name, rate in _parse_mapping(os.getenv("LOG_SAMPLING", "")).items()}
+    if rates:
+        queue_handler.addFilter(SamplingFilter(rates))
+
+    root = logging.getLogger()
+    root.handlers = [queue_handler]
+    root.setLevel(LOG_LEVEL)
+    for name, level in _parse_mapping(os.getenv("LOG_LEVELS", "")).items():
+        logging.getLogger(name).setLevel(level.upper())
+
+    _listener = logging.handlers.QueueListener(log_queue, file_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging() -> None:
+    """Дописывает очередь в файл и останавливает поток записи"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+class RequestLoggingMiddleware:
+    """ASGI middleware: id запроса (из X-Request-ID или новый) и строка лога с длительностью"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        incoming = headers.get(REQUEST_ID_HEADER.encode(), b"").decode("latin-1")[:64]
+        request_id = incoming or uuid.uuid4().hex
+        token = request_id_var.set(request_id)
+
+        status_code = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                response_headers: List = list(message.get("headers", []))
+                response_headers.append((REQUEST_ID_HEADER.encode(), request_id.encode("latin-1")))
+                message["headers"] = response_headers
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if LOG_ACCESS:
+                access_logger.info(
+                    "request",
+                    extra={
+                        "method": scope["method"],
+                        "path": scope["path"],
+                        "status": status_code,
+                        "duration_ms": round((time.perf_counter() - start) * 1000, 2),
+                    },
+                )
+            request_id_var.reset(token)
@@ -0,0 +1,373 @@
+# backend/app/core/metrics.py
+"""Метрики приложения в текстовом формате Prometheus (exposition format 0.0.4)"""
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple, TypeVar
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+LabelValues = Tuple[str, ...]
+
+DEFAULT_LATENCY_BUCKETS: Tuple[float, ...] = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0
+)
+DEFAULT_SIZE_BUCKETS: Tuple[float, ...] = (
+    256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216
+)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{n}="{_escape(str(v))}"' for n, v in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    type_name = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames: Tuple[str, ...] = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name}: expected labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def header(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type_name}",
+        ]
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def items(self) -> List[Tuple[LabelValues, float]]:
+        with self._lock:
+            return list(self._values.items())
+
+    def samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in self.items()
+        ]
+
+
+class Gauge(Counter):
+    type_name = "gauge"
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets: Tuple[float, ...] = tuple(sorted(buckets)) + (float("inf"),)
+        # key -> (счетчики по бакетам, сумма, количество)
+        self._values: Dict[LabelValues, Tuple[List[int], float, int]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            counts, total, count = self._values.get(key, ([0] * len(self.buckets), 0.0, 0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            self._values[key] = (counts, total + value, count + 1)
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = [(k, (list(c), s, n)) for k, (c, s, n) in self._values.items()]
+
+        lines: List[str] = []
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames + ("le",), key + (_format_value(bound),))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+M = TypeVar("M", bound=_Metric)
+
+
+class Registry:
+    """Набор метрик и коллекторов, которые вычисляются в момент запроса /metrics"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], List[str]]] = []
+        self._lock = threading.Lock()
+
+    def register(self, metric: M) -> M:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def register_collector(self, collector: Callable[[], List[str]]) -> None:
+        with self._lock:
+            self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.header())
+            lines.extend(metric.samples())
+        for collector in list(self._collectors):
+            try:
+                lines.extend(collector())
+            except Exception as e:  # коллектор не должен ронять весь /metrics
+                lines.append(f"# collector error: {_escape(str(e))}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+HTTP_REQUESTS = REGISTRY.register(Counter(
+    "http_requests_total", "Total HTTP requests", ("method", "route", "status")
+))
+HTTP_LATENCY = REGISTRY.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency", ("method", "route")
+))
+HTTP_IN_FLIGHT = REGISTRY.register(Gauge(
+    "http_requests_in_flight", "HTTP requests currently being processed", ("method",)
+))
+HTTP_RESPONSE_SIZE = REGISTRY.register(Histogram(
+    "http_response_size_bytes", "HTTP response body size", ("method", "route"), DEFAULT_SIZE_BUCKETS
+))
+UPLOAD_STAGE_LATENCY = REGISTRY.register(Histogram(
+    "upload_stage_duration_seconds",
+    "Upload pipeline stage latency (excel_parse, validation, merge_save, indicators, meta_write)",
+    ("stage",),
+))
+UPLOAD_TICKER_SECONDS = REGISTRY.register(Counter(
+    "upload_ticker_seconds_total", "Cumulative ingest time spent per ticker", ("ticker",)
+))
+UPLOAD_TICKER_LAST_SECONDS = REGISTRY.register(Gauge(
+    "upload_ticker_last_duration_seconds", "Duration of the last ingest per ticker", ("ticker",)
+))
+CACHE_REQUESTS = REGISTRY.register(Counter(
+    "cache_requests_total", "In-process cache lookups", ("cache", "result")
+))
+SINGLE_FLIGHT_REQUESTS = REGISTRY.register(Counter(
+    "singleflight_requests_total",
+    "Cache misses that computed a payload (leader) or awaited an identical in-flight one (shared)",
+    ("kind", "result"),
+))
+
+
+@contextmanager
+def stage_timer(stage: str) -> Iterator[None]:
+    """Замеряет длительность стадии загрузки данных"""
+    with UPLOAD_STAGE_LATENCY.time(stage=stage):
+        yield
+
+
+@contextmanager
+def ticker_timer(ticker: str) -> Iterator[None]:
+    """Замеряет полное время обработки одного тикера при загрузке"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        UPLOAD_TICKER_SECONDS.inc(elapsed, ticker=ticker)
+        UPLOAD_TICKER_LAST_SECONDS.set(elapsed, ticker=ticker)
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    """Учитывает попадание/промах in-process кэша"""
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+
+
+def record_single_flight(kind: str, shared: bool) -> None:
+    """Учитывает промах кэша: собственное вычисление или ожидание уже идущего"""
+    SINGLE_FLIGHT_REQUESTS.inc(kind=kind, result="shared" if shared else "leader")
+
+
+def _cache_ratio_collector() -> List[str]:
+    totals: Dict[str, Dict[str, float]] = {}
+    for (cache, result), value in CACHE_REQUESTS.items():
+        totals.setdefault(cache, {})[result] = value
+
+    lines = [
+        "# HELP cache_hit_ratio Share of cache lookups served from cache",
+        "# TYPE cache_hit_ratio gauge",
+    ]
+    for cache, counts in totals.items():
+        lookups = counts.get("hit", 0.0) + counts.get("miss", 0.0)
+        ratio = counts.get("hit", 0.0) / lookups if lookups else 0.0
+        lines.append(f"cache_hit_ratio{_format_labels(('cache',), (cache,))} {_format_value(ratio)}")
+    return lines
+
+
+REGISTRY.register_collector(_cache_ratio_collector)
+
+
+def data_store_collector(data_dir: Path) -> Callable[[], List[str]]:
+    """Коллектор размеров файлов хранилища данных (считается при каждом scrape)"""
+
+    def collect() -> List[str]:
+        totals: Dict[str, Tuple[int, int]] = {}
+        per_ticker: List[Tuple[str, str, int]] = []
+
+        def account(kind: str, size: int) -> None:
+            files, total = totals.get(kind, (0, 0))
+            totals[kind] = (files + 1, total + size)
+
+        if data_dir.exists():
+            for path in data_dir.glob("*.json"):
+                size = path.stat().st_size
+                if path.name == "meta.json":
+                    account("meta", size)
+                else:
+                    account("data", size)
+                    per_ticker.append((path.stem, "data", size))
+
+            catalog_file = data_dir / "index" / "catalog.sqlite"
+            if catalog_file.exists():
+                account("meta", catalog_file.stat().st_size)
+
+            indicators_dir = data_dir / "indicators"
+            if indicators_dir.exists():
+                for path in indicators_dir.glob("*_indicators.json"):
+                    size = path.stat().st_size
+                    account("indicators", size)
+                    per_ticker.append((path.name[: -len("_indicators.json")], "indicators", size))
+
+        lines = [
+            "# HELP data_store_bytes Total size of data store files",
+            "# TYPE data_store_bytes gauge",
+        ]
+        lines += [
+            f"data_store_bytes{_format_labels(('kind',), (kind,))} {total}"
+            for kind, (_, total) in totals.items()
+        ]
+        lines += [
+            "# HELP data_store_files Number of data store files",
+            "# TYPE data_store_files gauge",
+        ]
+        lines += [
+            f"data_store_files{_format_labels(('kind',), (kind,))} {files}"
+            for kind, (files, _) in totals.items()
+        ]
+        lines += [
+            "# HELP data_store_ticker_bytes Size of data store files per ticker",
+            "# TYPE data_store_ticker_bytes gauge",
+        ]
+        lines += [
+            f"data_store_ticker_bytes{_format_labels(('ticker', 'kind'), (ticker, kind))} {size}"
+            for ticker, kind, size in per_ticker
+        ]
+        return lines
+
+    return collect
+
+
+class MetricsMiddleware:
+    """ASGI middleware: латентность, запросы в обработке и размер ответа по маршрутам"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method: str = scope["method"]
+        HTTP_IN_FLIGHT.inc(method=method)
+
+        status_code = 500
+        response_size = 0
+        start = time.perf_counter()
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code, response_size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                response_size += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            route = _route_label(scope)
+            HTTP_IN_FLIGHT.dec(method=method)
+            HTTP_REQUESTS.inc(method=method, route=route, status=str(status_code))
+            HTTP_LATENCY.observe(elapsed, method=method, route=route)
+            HTTP_RESPONSE_SIZE.observe(response_size, method=method, route=route)
+
+
+def _route_label(scope: Scope) -> str:
+    """Шаблон маршрута (/charts/indicators/{ticker}) вместо сырого пути, чтобы не раздувать кардинальность"""
+    route = scope.get("route")
+    path: Optional[str] = getattr(route, "path", None)
+    if path:
+        return scope.get("root_path", "") + path
+    return "unmatched"
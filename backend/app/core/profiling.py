@@ -0,0 +1,320 @@
+# backend/app/core/profiling.py
+"""Профилирование по запросу администратора: семплирующий CPU-профайлер и снимки tracemalloc"""
+import os
+import re
+import sys
+import linecache
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime
+from functools import wraps
+from pathlib import Path
+from types import FrameType
+from typing import Any, Callable, Dict, List, Optional, Set, TypeVar
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+PROFILE_DIR = Path(os.getenv("PROFILE_DIR", "./profiles"))
+PROFILE_MAX_FILES = int(os.getenv("PROFILE_MAX_FILES", "50"))
+PROFILE_MAX_BYTES = int(os.getenv("PROFILE_MAX_MB", "50")) * 1024 * 1024
+
+UPLOAD_PATH_PREFIX = "/charts/upload"
+
+T = TypeVar("T")
+
+
+def _frame_label(frame: FrameType) -> str:
+    code = frame.f_code
+    filename = code.co_filename
+    # Укорачиваем пути site-packages и проекта, чтобы flame graph оставался читаемым
+    for marker in ("site-packages" + os.sep, "backend" + os.sep):
+        if marker in filename:
+            filename = filename.split(marker, 1)[1]
+            break
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})".replace(";", ",")
+
+
+class StackSampler(threading.Thread):
+    """
+    Периодически снимает стеки заданных потоков и копит свернутые (folded) стеки:
+    поток event loop и подключенные к запросу потоки пула (см. sampled)
+    """
+
+    def __init__(self, thread_id: int, interval: float):
+        super().__init__(daemon=True, name="stack-sampler")
+        self.interval = interval
+        self.stacks: Counter[str] = Counter()
+        self.samples = 0
+        self._threads: Set[int] = {thread_id}
+        self._threads_lock = threading.Lock()
+        self._stop_event = threading.Event()
+
+    def attach(self, thread_id: int) -> None:
+        with self._threads_lock:
+            self._threads.add(thread_id)
+
+    def detach(self, thread_id: int) -> None:
+        with self._threads_lock:
+            self._threads.discard(thread_id)
+
+    def run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            with self._threads_lock:
+                threads = list(self._threads)
+            frames = sys._current_frames()
+            for thread_id in threads:
+                frame: Optional[FrameType] = frames.get(thread_id)
+                if frame is None:
+                    continue
+                stack: List[str] = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                self.stacks[";".join(reversed(stack))] += 1
+                self.samples += 1
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self.join()
+
+    def folded(self) -> str:
+        """Формат flamegraph.pl / speedscope: "frame;frame;frame count" на строку"""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+# Семплер профилируемого запроса; asyncio.to_thread копирует контекст в поток пула
+_active_sampler: ContextVar[Optional[StackSampler]] = ContextVar("active_sampler", default=None)
+
+
+def sampled(func: Callable[..., T]) -> Callable[..., T]:
+    """
+    Обертка для функций, выполняемых в пуле потоков (asyncio.to_thread): если
+    запрос профилируется, поток семплируется вместе с ним, пока выполняется func
+    """
+    @wraps(func)
+    def run(*args: Any, **kwargs: Any) -> T:
+        sampler = _active_sampler.get()
+        if sampler is None:
+            return func(*args, **kwargs)
+        thread_id = threading.get_ident()
+        sampler.attach(thread_id)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            sampler.detach(thread_id)
+    return run
+
+
+@dataclass
+class ProfilingSession:
+    id: str
+    route: str
+    remaining: int
+    interval: float
+    created_by: str
+    created_at: str = field(default_factory=lambda: datetime.now().isoformat())
+    profiles: List[str] = field(default_factory=list)
+
+    def __post_init__(self):
+        # "/charts/indicators/{ticker}" -> ^/charts/indicators/[^/]+$
+        pattern = re.sub(r"\\\{[^/]+?\\\}", "[^/]+", re.escape(self.route))
+        self._regex = re.compile(f"^{pattern}$")
+
+    def matches(self, path: str) -> bool:
+        return bool(self._regex.match(path))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "route": self.route,
+            "remaining": self.remaining,
+            "interval": self.interval,
+            "created_by": self.created_by,
+            "created_at": self.created_at,
+            "profiles": self.profiles,
+        }
+
+
+class Profiler:
+    """Хранит активные сессии профилирования и пишет результаты в ограниченную директорию"""
+
+    def __init__(self, profile_dir: Path = PROFILE_DIR):
+        self.profile_dir = profile_dir
+        self._sessions: Dict[str, ProfilingSession] = {}
+        self._lock = threading.Lock()
+        self._last_snapshot: Optional[tracemalloc.Snapshot] = None
+
+    # --- CPU ---
+
+    def arm(self, route: str, count: int, interval: float, created_by: str) -> ProfilingSession:
+        session = ProfilingSession(
+            id=uuid.uuid4().hex[:12],
+            route=route,
+            remaining=count,
+            interval=interval,
+            created_by=created_by,
+        )
+        with self._lock:
+            self._sessions[session.id] = session
+        return session
+
+    def cancel(self, session_id: str) -> bool:
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+    def sessions(self) -> List[ProfilingSession]:
+        with self._lock:
+            return list(self._sessions.values())
+
+    def claim(self, path: str) -> Optional[ProfilingSession]:
+        """Забирает один запрос из первой подходящей сессии"""
+        if not self._sessions:
+            return None
+        with self._lock:
+            for session in self._sessions.values():
+                if session.remaining > 0 and session.matches(path):
+                    session.remaining -= 1
+                    if session.remaining == 0:
+                        del self._sessions[session.id]
+                    return session
+        return None
+
+    def save_cpu_profile(self, session: ProfilingSession, path: str, sampler: StackSampler, elapsed: float) -> str:
+        header = (
+            f"# route={session.route} path={path} session={session.id} "
+            f"samples={sampler.samples} interval={session.interval} elapsed={elapsed:.4f}s\n"
+        )
+        name = f"cpu-{session.id}-{int(time.time() * 1000)}.folded"
+        self._write(name, header + sampler.folded())
+        session.profiles.append(name)
+        return name
+
+    # --- Память ---
+
+    @property
+    def memory_tracking(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def start_memory_tracking(self, nframes: int) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(nframes)
+        self._last_snapshot = tracemalloc.take_snapshot()
+
+    def stop_memory_tracking(self) -> None:
+        self._last_snapshot = None
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def memory_snapshot(self, label: str, top: int = 30) -> Optional[str]:
+        """Снимок tracemalloc и разница с предыдущим снимком (например, между загрузками)"""
+        if not tracemalloc.is_tracing():
+            return None
+
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, linecache.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+        current, peak = tracemalloc.get_traced_memory()
+        lines = [f"# label={label} current={current} peak={peak} taken_at={datetime.now().isoformat()}"]
+
+        if self._last_snapshot is not None:
+            lines.append(f"# top {top} allocation changes since previous snapshot (lineno)")
+            for stat in snapshot.compare_to(self._last_snapshot, "lineno")[:top]:
+                lines.append(str(stat))
+            lines.append(f"# top {top} allocation changes since previous snapshot (traceback)")
+            for stat in snapshot.compare_to(self._last_snapshot, "traceback")[:top]:
+                lines.append(str(stat))
+                lines.extend(f"    {line}" for line in stat.traceback.format())
+        else:
+            for stat in snapshot.statistics("lineno")[:top]:
+                lines.append(str(stat))
+
+        self._last_snapshot = snapshot
+        safe_label = re.sub(r"[^A-Za-z0-9_-]+", "_", label).strip("_") or "snapshot"
+        name = f"mem-{safe_label}-{int(time.time() * 1000)}.txt"
+        self._write(name, "\n".join(lines) + "\n")
+        return name
+
+    # --- Хранилище ---
+
+    def list_profiles(self) -> List[Dict[str, Any]]:
+        if not self.profile_dir.exists():
+            return []
+        files = sorted(self.profile_dir.iterdir(), key=lambda p: p.stat().st_mtime, reverse=True)
+        return [
+            {
+                "name": p.name,
+                "size": p.stat().st_size,
+                "created_at": datetime.fromtimestamp(p.stat().st_mtime).isoformat(),
+            }
+            for p in files if p.is_file()
+        ]
+
+    def read_profile(self, name: str) -> Optional[str]:
+        # Отдаем только файлы из директории профилей (без обхода путей)
+        if name not in {p["name"] for p in self.list_profiles()}:
+            return None
+        return (self.profile_dir / name).read_text(encoding="utf-8")
+
+    def _write(self, name: str, content: str) -> None:
+        self.profile_dir.mkdir(parents=True, exist_ok=True)
+        (self.profile_dir / name).write_text(content, encoding="utf-8")
+        self._rotate()
+
+    def _rotate(self) -> None:
+        files = sorted(
+            (p for p in self.profile_dir.iterdir() if p.is_file()),
+            key=lambda p: p.stat().st_mtime,
+        )
+        total = sum(p.stat().st_size for p in files)
+        while files and (len(files) > PROFILE_MAX_FILES or total > PROFILE_MAX_BYTES):
+            oldest = files.pop(0)
+            total -= oldest.stat().st_size
+            oldest.unlink(missing_ok=True)
+
+
+profiler = Profiler()
+
+
+class ProfilingMiddleware:
+    """Профилирует запросы, попадающие в активные сессии, и снимает память после загрузок"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        path: str = scope["path"]
+        session = profiler.claim(path)
+        is_upload = scope["method"] == "POST" and path.startswith(UPLOAD_PATH_PREFIX)
+
+        if session is None:
+            await self.app(scope, receive, send)
+            if is_upload and profiler.memory_tracking:
+                profiler.memory_snapshot(path.rsplit("/", 1)[-1])
+            return
+
+        # Обработчики выполняются в потоке event loop, его и семплируем, а вычисления
+        # в пуле потоков (coalesce и т.п.) подключаются через sampled.
+        # Параллельные запросы в потоке event loop тоже попадут в профиль.
+        sampler = StackSampler(threading.get_ident(), session.interval)
+        token = _active_sampler.set(sampler)
+        start = time.perf_counter()
+        sampler.start()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            sampler.stop()
+            _active_sampler.reset(token)
+            profiler.save_cpu_profile(session, path, sampler, time.perf_counter() - start)
+            if is_upload and profiler.memory_tracking:
+                profiler.memory_snapshot(path.rsplit("/", 1)[-1])
@@ -27,9 +27,6 @@ def get_password_hash(password: str) -> str:
     password = password.strip().replace('\r', '').replace('\n', '')
     pw_bytes = password.encode("utf-8")
 
-    # ВРЕМЕННЫЙ ЛОГ
-    print("Password repr:", repr(password), "| bytes:", len(pw_bytes))
-
     if len(pw_bytes) > 72:
         pw_bytes = pw_bytes[:72]
         password = pw_bytes.decode("utf-8", errors="ignore")
@@ -0,0 +1,220 @@
+# backend/app/core/shared_cache.py
+"""
+Общий для нескольких экземпляров приложения кэш ответов (L2) и шина инвалидации.
+
+payload_cache (app.core.cache) остается L1 в памяти процесса; при промахе он
+спрашивает L2, а готовые ответы записывает в оба уровня - ответ группы кодируется
+один раз на все экземпляры, работающие с общим data/.
+
+Инвалидация из путей загрузки и сброса записывается в журнал того же хранилища;
+каждый экземпляр опрашивает журнал в фоновом потоке и сбрасывает свой L1.
+
+Переменные окружения:
+    CACHE_L2          - "sqlite" включает L2 (по умолчанию выключен)
+    CACHE_L2_PATH     - файл SQLite (data/index/payload_cache.sqlite); должен быть
+                        общим для экземпляров - тот же том, что и data/
+    CACHE_L2_MB       - предел суммарного размера ответов в L2 (1024)
+    CACHE_BUS_POLL    - период опроса журнала инвалидации, секунды (1.0)
+
+Другие хранилища (Redis и т.п.) подключаются реализацией CacheBackend.
+"""
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Callable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+CACHE_L2 = os.getenv("CACHE_L2", "").lower()
+CACHE_L2_PATH = Path(os.getenv("CACHE_L2_PATH", "data/index/payload_cache.sqlite"))
+CACHE_L2_MAX_BYTES = int(os.getenv("CACHE_L2_MB", "1024")) * 1024 * 1024
+CACHE_BUS_POLL = float(os.getenv("CACHE_BUS_POLL", "1.0"))
+# События старше этого срока удаляются из журнала
+INVALIDATION_RETENTION = 3600.0
+
+# Id процесса: свои события инвалидации уже применены локально
+INSTANCE_ID = uuid.uuid4().hex
+
+
+class CacheBackend(ABC):
+    """Хранилище готовых тел ответов и журнал инвалидации"""
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Tuple[bytes, str]]:
+        """(тело, media_type) или None"""
+
+    @abstractmethod
+    def set(self, key: str, kind: str, scope: str, body: bytes, media_type: str) -> None:
+        ...
+
+    @abstractmethod
+    def invalidate(self, scopes: Sequence[str], catalog_kinds: Sequence[str]) -> None:
+        """
+        Удаляет ответы областей scopes и каталожные ответы (без scopes - все)
+        и сообщает об этом остальным экземплярам
+        """
+
+    @abstractmethod
+    def poll_invalidations(self) -> List[List[str]]:
+        """Новые события инвалидации других экземпляров: списки областей ([] - все)"""
+
+
+class SQLiteBackend(CacheBackend):
+    """L2 в файле SQLite (WAL): общий для процессов на одном хосте или общем томе"""
+
+    def __init__(self, path: Path = CACHE_L2_PATH, max_bytes: int = CACHE_L2_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connection() as db:
+            db.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS payloads (
+                    key TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    scope TEXT NOT NULL,
+                    body BLOB NOT NULL,
+                    media_type TEXT NOT NULL,
+                    created REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS payloads_scope ON payloads (scope);
+                CREATE INDEX IF NOT EXISTS payloads_created ON payloads (created);
+                CREATE TABLE IF NOT EXISTS invalidations (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    instance TEXT NOT NULL,
+                    scopes TEXT NOT NULL,
+                    created REAL NOT NULL
+                );
+                """
+            )
+            row = db.execute("SELECT COALESCE(MAX(id), 0) FROM invalidations").fetchone()
+        # Старые события к новому процессу не относятся - его L1 пуст
+        self._last_event = int(row[0])
+
+    def _connection(self) -> sqlite3.Connection:
+        db: Optional[sqlite3.Connection] = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+
+    def get(self, key: str) -> Optional[Tuple[bytes, str]]:
+        try:
+            row = self._connection().execute(
+                "SELECT body, media_type FROM payloads WHERE key = ?", (key,)
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"L2 cache read failed: {e}")
+            return None
+        return (bytes(row[0]), row[1]) if row else None
+
+    def set(self, key: str, kind: str, scope: str, body: bytes, media_type: str) -> None:
+        try:
+            db = self._connection()
+            db.execute(
+                "INSERT OR REPLACE INTO payloads (key, kind, scope, body, media_type, created) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, kind, scope, body, media_type, time.time()),
+            )
+            self._evict(db)
+        except sqlite3.Error as e:
+            logger.warning(f"L2 cache write failed: {e}")
+
+    def _evict(self, db: sqlite3.Connection) -> None:
+        total = db.execute("SELECT COALESCE(SUM(LENGTH(body)), 0) FROM payloads").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Старые записи вытесняются первыми, до 90% предела
+        excess = total - int(self.max_bytes * 0.9)
+        rows = db.execute("SELECT key, LENGTH(body) FROM payloads ORDER BY created").fetchall()
+        doomed: List[Tuple[str]] = []
+        for key, size in rows:
+            if excess <= 0:
+                break
+            doomed.append((key,))
+            excess -= size
+        db.executemany("DELETE FROM payloads WHERE key = ?", doomed)
+
+    def invalidate(self, scopes: Sequence[str], catalog_kinds: Sequence[str]) -> None:
+        now = time.time()
+        try:
+            db = self._connection()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                if scopes:
+                    marks = ",".join("?" * len(scopes))
+                    kind_marks = ",".join("?" * len(catalog_kinds))
+                    db.execute(
+                        f"DELETE FROM payloads WHERE scope IN ({marks}) OR kind IN ({kind_marks})",
+                        (*scopes, *catalog_kinds),
+                    )
+                else:
+                    db.execute("DELETE FROM payloads")
+                db.execute(
+                    "INSERT INTO invalidations (instance, scopes, created) VALUES (?, ?, ?)",
+                    (INSTANCE_ID, "\n".join(scopes), now),
+                )
+                db.execute("DELETE FROM invalidations WHERE created < ?", (now - INVALIDATION_RETENTION,))
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+        except sqlite3.Error as e:
+            logger.warning(f"L2 cache invalidation failed: {e}")
+
+    def poll_invalidations(self) -> List[List[str]]:
+        try:
+            rows = self._connection().execute(
+                "SELECT id, instance, scopes FROM invalidations WHERE id > ? ORDER BY id", (self._last_event,)
+            ).fetchall()
+        except sqlite3.Error as e:
+            logger.warning(f"L2 invalidation poll failed: {e}")
+            return []
+        events: List[List[str]] = []
+        for event_id, instance, scopes in rows:
+            self._last_event = event_id
+            if instance != INSTANCE_ID:
+                events.append(scopes.split("\n") if scopes else [])
+        return events
+
+
+def create_backend() -> Optional[CacheBackend]:
+    """Backend по CACHE_L2 или None (только L1)"""
+    if CACHE_L2 == "sqlite":
+        return SQLiteBackend()
+    if CACHE_L2:
+        logger.warning(f"Unknown CACHE_L2={CACHE_L2!r}: shared cache disabled")
+    return None
+
+
+class InvalidationListener:
+    """Фоновый поток: применяет события инвалидации других экземпляров к L1"""
+
+    def __init__(self, backend: CacheBackend, apply: Callable[[List[str]], None], interval: float = CACHE_BUS_POLL):
+        self.backend = backend
+        self.apply = apply
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="cache-invalidation", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join(timeout=self.interval + 1)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            for scopes in self.backend.poll_invalidations():
+                try:
+                    self.apply(scopes)
+                except Exception:
+                    logger.exception("Applying remote cache invalidation failed")
@@ -0,0 +1,78 @@
+# backend/app/core/startup.py
+"""
+Отчет о холодном старте: время импорта приложения, этапов lifespan и список
+тяжелых модулей, загруженных до первого запроса.
+
+STARTUP_REPORT=1 - отчет пишется в лог при старте сервера.
+Отдельный замер (из директории backend):
+    python -m app.core.startup            # JSON-отчет
+    python -m app.core.startup --strict   # код 1, если при старте загружены тяжелые модули
+Подробная разбивка импорта по модулям: python -X importtime -c "import app.main"
+"""
+import json
+import logging
+import os
+import sys
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Модули, которые должны загружаться только в путях загрузки и пересчета индикаторов
+HEAVY_MODULES = ("pandas", "ta", "openpyxl", "pyarrow")
+
+STARTUP_REPORT = os.getenv("STARTUP_REPORT", "").lower() in ("1", "true", "yes")
+
+_phases: List[Tuple[str, float]] = []
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Замеряет этап старта"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        _phases.append((name, time.perf_counter() - started))
+
+
+def heavy_modules_loaded() -> List[str]:
+    return [name for name in HEAVY_MODULES if name in sys.modules]
+
+
+def report() -> Dict[str, Any]:
+    return {
+        "phases": {name: round(seconds, 4) for name, seconds in _phases},
+        "total_seconds": round(sum(seconds for _, seconds in _phases), 4),
+        "heavy_modules_loaded": heavy_modules_loaded(),
+        "modules_loaded": len(sys.modules),
+    }
+
+
+def log_report() -> None:
+    if STARTUP_REPORT:
+        logger.info("Startup report", extra=report())
+
+
+def main(argv: List[str]) -> int:
+    import asyncio
+
+    with phase("import app.main"):
+        from app.main import app
+
+    async def run_lifespan() -> None:
+        # Стартовая часть lifespan; фоновые задачи отменяются при выходе из контекста
+        async with app.router.lifespan_context(app):
+            pass
+
+    asyncio.run(run_lifespan())
+    result = report()
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    if "--strict" in argv and result["heavy_modules_loaded"]:
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
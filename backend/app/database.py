@@ -1,4 +1,5 @@
 # backend/app/database.py
+import logging
 import os
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
@@ -7,6 +8,8 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # Берем из переменных окружения
 SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./trading_app.db")
 
@@ -36,13 +39,22 @@ def get_db():
         
 
 # Функция для создания таблиц и начальных данных
-def create_tables_and_admin():
-    """Создает таблицы и первого админа"""
-    from app.models.user import User, UserRole
-    from app.core.security import get_password_hash
+def create_tables():
+    """Создает таблицы (быстро - нужно до первого запроса)"""
+    # Импорт моделей регистрирует их в Base.metadata
+    import app.models  # noqa: F401
     
     # Создаем все таблицы
     Base.metadata.create_all(bind=engine)
+
+
+def ensure_admin():
+    """
+    Создает первого админа, если его нет. Хеш пароля (argon2) - самая дорогая часть
+    старта, поэтому lifespan вызывает эту функцию в фоне, после открытия порта
+    """
+    from app.models.user import User, UserRole
+    from app.core.security import get_password_hash
     
     # Проверяем, есть ли уже админ
     db = SessionLocal()
@@ -59,9 +71,9 @@ def create_tables_and_admin():
             )
             db.add(admin_user)
             db.commit()
-            print("✅ Создан админ пользователь: admin / admin")
+            logger.warning("Создан админ пользователь admin с паролем по умолчанию")
     except Exception as e:
-        print(f"❌ Ошибка создания админа: {e}")
+        logger.error(f"Ошибка создания админа: {e}")
         db.rollback()
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
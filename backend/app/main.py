@@ -1,14 +1,26 @@
 # backend/app/main.py
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import PlainTextResponse
 from fastapi.staticfiles import StaticFiles
 from contextlib import asynccontextmanager
+import asyncio
 import os
 from dotenv import load_dotenv
+from app.core.cache import start_invalidation_listener
+from app.core.logging_config import RequestLoggingMiddleware, setup_logging, shutdown_logging
+from app.core.metrics import REGISTRY, MetricsMiddleware
+from app.core.profiling import ProfilingMiddleware
+from app.core.startup import log_report, phase
+from app.api.warmup import save_group_requests, start_warmup, warmup_status
 
 # Загружаем переменные окружения
 load_dotenv()
 
+# JSON-лог в файл через очередь (LOG_FILE, LOG_LEVELS, LOG_SAMPLING - см. app/core/logging_config.py)
+setup_logging()
+
 # Получаем порт из переменных окружения (для Railway)
 PORT = int(os.getenv("PORT", 8000))
 
@@ -18,11 +30,34 @@ os.makedirs(os.getenv("UPLOAD_DIR", "./uploads"), exist_ok=True)
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
-    from app.database import create_tables_and_admin
-    create_tables_and_admin()
+    from app.database import create_tables, ensure_admin
+    with phase("create_tables"):
+        create_tables()
+    
+    # Каталог тикеров и перенос data/meta.json - до первых запросов
+    from app.utils.catalog import ensure_catalog
+    with phase("catalog"):
+        ensure_catalog()
+    
+    # Хеш пароля админа (argon2) считается в фоне - порт открывается сразу
+    def bootstrap_admin():
+        with phase("ensure_admin (background)"):
+            ensure_admin()
+    admin_task = asyncio.create_task(asyncio.to_thread(bootstrap_admin))
+    
+    # Инвалидации кэша от других экземпляров (CACHE_L2)
+    invalidation_listener = start_invalidation_listener()
+    
+    # Прогрев кэша ответов - тоже в фоне, ход виден в /health
+    await start_warmup()
+    log_report()
     yield
     # Shutdown
-    pass
+    await admin_task
+    save_group_requests()
+    if invalidation_listener is not None:
+        invalidation_listener.stop()
+    shutdown_logging()
 
 app = FastAPI(
     title="Analytics API",
@@ -44,13 +79,28 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Валидаторы кэша графиков и id запроса доступны фронтенду
+    expose_headers=["ETag", "Last-Modified", "X-Request-ID"],
 )
 
+# Сжатие остальных ответов; графики и индикаторы отдаются уже сжатыми из кэша
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
+# Профилирование по запросу администратора (/admin/profiling)
+app.add_middleware(ProfilingMiddleware)
+
+# Метрики по маршрутам (внешний слой, чтобы учитывать итоговый размер ответа)
+app.add_middleware(MetricsMiddleware)
+
+# id запроса (X-Request-ID) и строка лога на запрос - самый внешний слой
+app.add_middleware(RequestLoggingMiddleware)
+
 # Подключаем статические файлы
 app.mount("/uploads", StaticFiles(directory=os.getenv("UPLOAD_DIR", "./uploads")), name="uploads")
 
 # Импортируем роутеры
-from app.api.routes import auth, users, charts, invites, admin
+with phase("import routers"):
+    from app.api.routes import auth, users, charts, invites, admin
 
 # Подключаем роутеры
 app.include_router(auth.router, prefix="/auth", tags=["Authentication"])
@@ -65,7 +115,12 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy"}
+    return {"status": "healthy", "warmup": warmup_status()}
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Метрики в формате Prometheus"""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,161 @@
+# backend/app/utils/bulk_upload.py
+"""
+Разбор файлов массовой загрузки (/charts/upload-bulk).
+
+Принимаются xlsx/xls/csv/parquet и ZIP-архивы с ними. Загруженные файлы и члены
+архива копируются на диск потоково, без чтения целиком в память; каждый файл
+разбирается в {тикер: DataFrame}, затем строки одного тикера из всех файлов
+объединяются - тикер записывается и пересчитывается один раз.
+
+ZIP-архив проверяется до распаковки: число поддерживаемых файлов и их суммарный
+несжатый размер (по заголовкам архива; zipfile не отдает больше заявленного
+размера) ограничены BULK_UPLOAD_MAX_MEMBERS и BULK_UPLOAD_MAX_UNCOMPRESSED_MB.
+
+Свечи (kind="candlestick"): лист Excel = тикер; в csv/parquet тикер берется из
+столбца ticker, а без него - из имени файла.
+Линии (kind="line"): столбцы date, ticker, volume, price, как у /charts/upload.
+"""
+from __future__ import annotations
+
+import os
+import shutil
+import zipfile
+from pathlib import Path, PurePosixPath
+from typing import TYPE_CHECKING, BinaryIO, Dict, List, Tuple
+
+from app.utils.data_processing import parse_date
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+BULK_UPLOAD_KINDS = ("candlestick", "line")
+BULK_UPLOAD_EXTENSIONS = (".xlsx", ".xls", ".csv", ".parquet")
+# Сколько файлов разбирается одновременно
+BULK_UPLOAD_WORKERS = int(os.getenv("BULK_UPLOAD_WORKERS", "4"))
+# Ограничения ZIP-архива (защита от zip-бомб)
+BULK_UPLOAD_MAX_MEMBERS = int(os.getenv("BULK_UPLOAD_MAX_MEMBERS", "1000"))
+BULK_UPLOAD_MAX_UNCOMPRESSED = int(os.getenv("BULK_UPLOAD_MAX_UNCOMPRESSED_MB", "2048")) * 1024 * 1024
+LINEAR_COLUMNS = {"date", "ticker", "volume", "price"}
+_COPY_CHUNK = 1024 * 1024
+
+
+def save_upload(stream: BinaryIO, directory: Path, filename: str) -> Path:
+    """Копирует поток в directory/<имя файла без пути>"""
+    directory.mkdir(parents=True, exist_ok=True)
+    target = directory / (PurePosixPath(filename.replace("\\", "/")).name or "upload")
+    with open(target, "wb") as f:
+        shutil.copyfileobj(stream, f, _COPY_CHUNK)
+    return target
+
+
+def is_archive(path: Path) -> bool:
+    return path.suffix.lower() == ".zip"
+
+
+def expand_archive(
+    path: Path,
+    directory: Path,
+    max_members: int = BULK_UPLOAD_MAX_MEMBERS,
+    max_uncompressed: int = BULK_UPLOAD_MAX_UNCOMPRESSED,
+) -> List[Path]:
+    """
+    Распаковывает из ZIP только поддерживаемые файлы, каждый в свою папку
+    (одинаковые имена в разных папках архива не затирают друг друга).
+    Пути внутри архива не используются - выйти за directory нельзя.
+    ValueError - архив превышает ограничения; проверка до записи на диск.
+    """
+    members: List[Path] = []
+    with zipfile.ZipFile(path) as archive:
+        selected: List[Tuple[int, zipfile.ZipInfo]] = []
+        for position, info in enumerate(archive.infolist()):
+            name = PurePosixPath(info.filename)
+            if info.is_dir() or name.parts[:1] == ("__MACOSX",) or name.name.startswith("."):
+                continue
+            if name.suffix.lower() not in BULK_UPLOAD_EXTENSIONS:
+                continue
+            selected.append((position, info))
+        
+        if len(selected) > max_members:
+            raise ValueError(f"Archive {path.name} has {len(selected)} files, limit is {max_members}")
+        uncompressed = sum(info.file_size for _, info in selected)
+        if uncompressed > max_uncompressed:
+            raise ValueError(
+                f"Archive {path.name} expands to {uncompressed // (1024 * 1024)} MB, "
+                f"limit is {max_uncompressed // (1024 * 1024)} MB"
+            )
+        
+        for position, info in selected:
+            with archive.open(info) as source:
+                members.append(save_upload(source, directory / str(position), PurePosixPath(info.filename).name))
+    return members
+
+
+def _read_table(path: Path) -> pd.DataFrame:
+    import pandas as pd
+    
+    suffix = path.suffix.lower()
+    if suffix == ".csv":
+        return pd.read_csv(path)  # type: ignore
+    if suffix == ".parquet":
+        return pd.read_parquet(path)  # type: ignore
+    return pd.read_excel(path)  # type: ignore
+
+
+def _split_by_ticker(df: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+    # Тикер повторяется в каждой строке - храним кодами категорий
+    df["ticker"] = df["ticker"].astype(str).astype("category")
+    return {str(ticker): frame for ticker, frame in df.groupby("ticker", observed=True)}  # type: ignore
+
+
+def read_ticker_frames(path: Path, kind: str) -> Dict[str, pd.DataFrame]:
+    """Файл -> {тикер: строки тикера}. ValueError - файл не подходит для kind"""
+    import pandas as pd
+    
+    suffix = path.suffix.lower()
+    if suffix not in BULK_UPLOAD_EXTENSIONS:
+        raise ValueError(f"Unsupported file type: {path.name}")
+
+    if kind == "line":
+        df = _read_table(path)
+        missing = LINEAR_COLUMNS - set(df.columns)
+        if missing:
+            raise ValueError(f"Missing required columns: {', '.join(sorted(missing))}")
+        df["date"] = pd.to_datetime(df["date"]).dt.strftime("%Y-%m-%d")  # type: ignore
+        return _split_by_ticker(df)
+
+    if suffix in (".xlsx", ".xls"):
+        sheets: Dict[str, pd.DataFrame] = pd.read_excel(path, sheet_name=None)  # type: ignore
+        return {str(name): frame for name, frame in sheets.items()}
+    df = _read_table(path)
+    if "ticker" in df.columns:
+        return {ticker: frame.drop(columns=["ticker"]) for ticker, frame in _split_by_ticker(df).items()}
+    return {path.stem: df}
+
+
+def merge_ticker_frames(parts: List[Dict[str, pd.DataFrame]], kind: str) -> Dict[str, pd.DataFrame]:
+    """
+    Объединяет строки тикеров из всех файлов. Дата, уже встреченная в файле
+    раньше по запросу, отбрасывается - как при последовательной загрузке, где
+    существующие даты пропускаются; внутри файла, как и у process_candlestick_data,
+    побеждает последняя строка.
+    """
+    import pandas as pd
+    
+    collected: Dict[str, List[pd.DataFrame]] = {}
+    for frames in parts:
+        for ticker, frame in frames.items():
+            collected.setdefault(ticker, []).append(frame)
+
+    merged: Dict[str, pd.DataFrame] = {}
+    for ticker, frames in collected.items():
+        if len(frames) == 1:
+            merged[ticker] = frames[0]
+            continue
+        normalized: List[pd.DataFrame] = []
+        for frame in frames:
+            frame = frame.copy()
+            if kind == "candlestick":
+                frame["date"] = [parse_date(str(d)) for d in frame["date"]]
+            normalized.append(frame.drop_duplicates(subset=["date"], keep="last"))
+        merged[ticker] = pd.concat(normalized, ignore_index=True).drop_duplicates(subset=["date"], keep="first")
+    return merged
@@ -0,0 +1,258 @@
+# backend/app/utils/catalog.py
+"""
+Каталог тикеров (data/index/catalog.sqlite) - замена meta.json.
+
+Одна строка на тикер: группа, тип, версия данных и журнал изменений (для
+дельта-запросов), число строк, диапазон дат и файлы данных/индикаторов.
+Запись тикера - upsert одной строки (meta.json переписывался целиком), выборка
+по группе идет по индексу.
+
+Записи отдаются словарями в прежнем формате meta.json:
+    {"ticker", "group", "type", "last_updated", "data_version", "changes",
+     "total_records", "date_range": [min, max], "data_file", "indicators_file"}
+Порядок тикеров - порядок первого добавления, как у ключей meta.json.
+
+state.generation растет с каждым изменением каталога - версия для ключей кэша
+каталожных ответов; state.updated_at - время изменения (Last-Modified).
+
+Существующий data/meta.json переносится в каталог при старте приложения
+(ensure_catalog) или при первом обращении к каталогу этого data/ и
+переименовывается в meta.json.migrated.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.utils.paths import DATA_DIR, index_dir
+
+LEGACY_META_NAME = "meta.json"
+
+_COLUMNS = (
+    "ticker", "grp", "type", "last_updated", "data_version", "changes",
+    "total_records", "min_date", "max_date", "data_file", "indicators_file",
+)
+
+_local = threading.local()
+_migrated: Dict[str, bool] = {}
+_migrate_lock = threading.Lock()
+
+
+def catalog_path(data_dir: Path = DATA_DIR) -> Path:
+    return index_dir(data_dir) / "catalog.sqlite"
+
+
+def _connection(data_dir: Path) -> sqlite3.Connection:
+    """
+    Соединение текущего потока; схема - при открытии, перенос meta.json - один раз
+    на data/ (флаг проверяется без блокировки)
+    """
+    path = catalog_path(data_dir)
+    # Соединение нельзя использовать в дочернем процессе (пул офлайн-импорта)
+    if getattr(_local, "pid", None) != os.getpid():
+        _local.pid = os.getpid()
+        _local.connections = {}
+    connections: Dict[str, sqlite3.Connection] = _local.connections
+    db = connections.get(str(path))
+    if db is None or not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        db = sqlite3.connect(path, timeout=10.0, isolation_level=None)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS tickers (
+                position INTEGER PRIMARY KEY AUTOINCREMENT,
+                ticker TEXT NOT NULL UNIQUE,
+                grp TEXT,
+                type TEXT,
+                last_updated TEXT,
+                data_version INTEGER NOT NULL DEFAULT 0,
+                changes TEXT NOT NULL DEFAULT '[]',
+                total_records INTEGER,
+                min_date TEXT,
+                max_date TEXT,
+                data_file TEXT,
+                indicators_file TEXT
+            );
+            CREATE INDEX IF NOT EXISTS tickers_grp ON tickers (grp);
+            CREATE TABLE IF NOT EXISTS state (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                generation INTEGER NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            INSERT OR IGNORE INTO state (id, generation, updated_at) VALUES (1, 0, 0);
+            """
+        )
+        connections[str(path)] = db
+    if not _migrated.get(str(path)):
+        with _migrate_lock:
+            if not _migrated.get(str(path)):
+                migrate_meta_json(data_dir, db)
+                _migrated[str(path)] = True
+    return db
+
+
+def ensure_catalog(data_dir: Path = DATA_DIR) -> None:
+    """Создает каталог и переносит meta.json - при старте, до первых запросов"""
+    _connection(data_dir)
+
+
+class _Transaction:
+    """BEGIN IMMEDIATE ... COMMIT с увеличением generation"""
+
+    def __init__(self, db: sqlite3.Connection):
+        self.db = db
+
+    def __enter__(self) -> sqlite3.Connection:
+        self.db.execute("BEGIN IMMEDIATE")
+        return self.db
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        if exc_type is not None:
+            self.db.execute("ROLLBACK")
+            return
+        self.db.execute("UPDATE state SET generation = generation + 1, updated_at = ? WHERE id = 1", (time.time(),))
+        self.db.execute("COMMIT")
+
+
+def _row_to_entry(row: Tuple[Any, ...]) -> Dict[str, Any]:
+    values = dict(zip(_COLUMNS, row))
+    entry: Dict[str, Any] = {
+        "ticker": values["ticker"],
+        "group": values["grp"],
+        "type": values["type"],
+        "last_updated": values["last_updated"],
+        "data_version": values["data_version"],
+        "changes": json.loads(values["changes"]),
+        "total_records": values["total_records"],
+        "data_file": values["data_file"] or f"{values['ticker']}.json",
+        "indicators_file": values["indicators_file"] or f"indicators/{values['ticker']}_indicators.json",
+    }
+    if values["min_date"] is not None:
+        entry["date_range"] = [values["min_date"], values["max_date"]]
+    return entry
+
+
+def _entry_to_row(ticker: str, entry: Dict[str, Any]) -> Tuple[Any, ...]:
+    date_range = entry.get("date_range") or [None, None]
+    return (
+        ticker,
+        entry.get("group"),
+        entry.get("type"),
+        entry.get("last_updated"),
+        int(entry.get("data_version", 0)),
+        json.dumps(entry.get("changes", []), ensure_ascii=False),
+        entry.get("total_records"),
+        date_range[0],
+        date_range[1],
+        entry.get("data_file"),
+        entry.get("indicators_file"),
+    )
+
+
+_SELECT = f"SELECT {', '.join(_COLUMNS)} FROM tickers"
+_UPSERT = (
+    f"INSERT INTO tickers ({', '.join(_COLUMNS)}) VALUES ({', '.join('?' * len(_COLUMNS))}) "
+    "ON CONFLICT (ticker) DO UPDATE SET "
+    + ", ".join(f"{c} = excluded.{c}" for c in _COLUMNS if c != "ticker")
+)
+
+
+def catalog_state(data_dir: Path = DATA_DIR) -> Tuple[int, Optional[float]]:
+    """(generation, updated_at) - версия каталога и время последнего изменения"""
+    generation, updated_at = _connection(data_dir).execute(
+        "SELECT generation, updated_at FROM state WHERE id = 1"
+    ).fetchone()
+    return int(generation), (float(updated_at) or None)
+
+
+def get_entry(ticker: str, data_dir: Path = DATA_DIR) -> Optional[Dict[str, Any]]:
+    row = _connection(data_dir).execute(f"{_SELECT} WHERE ticker = ?", (ticker,)).fetchone()
+    return _row_to_entry(row) if row else None
+
+
+def all_entries(data_dir: Path = DATA_DIR) -> Dict[str, Dict[str, Any]]:
+    """Весь каталог {тикер: запись} в порядке добавления"""
+    rows = _connection(data_dir).execute(f"{_SELECT} ORDER BY position").fetchall()
+    return {row[0]: _row_to_entry(row) for row in rows}
+
+
+def group_entries(group: str, data_dir: Path = DATA_DIR) -> Dict[str, Dict[str, Any]]:
+    """Тикеры группы (по индексу) в порядке добавления"""
+    rows = _connection(data_dir).execute(f"{_SELECT} WHERE grp = ? ORDER BY position", (group,)).fetchall()
+    return {row[0]: _row_to_entry(row) for row in rows}
+
+
+def list_tickers(data_dir: Path = DATA_DIR) -> List[str]:
+    return [row[0] for row in _connection(data_dir).execute("SELECT ticker FROM tickers ORDER BY position")]
+
+
+def put_entries(entries: Dict[str, Dict[str, Any]], data_dir: Path = DATA_DIR, replace: bool = False) -> None:
+    """Записывает записи одной транзакцией; replace=True - каталог заменяется целиком"""
+    db = _connection(data_dir)
+    with _Transaction(db):
+        if replace:
+            db.execute("DELETE FROM tickers")
+        db.executemany(_UPSERT, [_entry_to_row(ticker, entry) for ticker, entry in entries.items()])
+
+
+def put_entry(entry: Dict[str, Any], data_dir: Path = DATA_DIR) -> None:
+    put_entries({entry["ticker"]: entry}, data_dir)
+
+
+def remove_entry(ticker: str, data_dir: Path = DATA_DIR) -> bool:
+    db = _connection(data_dir)
+    with _Transaction(db):
+        removed = db.execute("DELETE FROM tickers WHERE ticker = ?", (ticker,)).rowcount
+    return bool(removed)
+
+
+def clear_catalog(data_dir: Path = DATA_DIR) -> None:
+    db = _connection(data_dir)
+    with _Transaction(db):
+        db.execute("DELETE FROM tickers")
+
+
+def migrate_meta_json(data_dir: Path = DATA_DIR, db: Optional[sqlite3.Connection] = None) -> int:
+    """
+    Переносит data/meta.json в каталог (записи каталога с теми же тикерами
+    заменяются) и переименовывает файл. Возвращает число перенесенных тикеров.
+    """
+    meta_path = data_dir / LEGACY_META_NAME
+    if not meta_path.exists():
+        return 0
+    db = db or _connection(data_dir)
+    with _Transaction(db):
+        # Повторная проверка под блокировкой записи: другой процесс мог успеть первым
+        if not meta_path.exists():
+            return 0
+        try:
+            meta_data: Dict[str, Dict[str, Any]] = json.loads(meta_path.read_text(encoding="utf-8"))
+        except ValueError:
+            meta_data = {}
+        db.executemany(
+            _UPSERT,
+            [_entry_to_row(ticker, {**entry, **_legacy_date_range(ticker, data_dir)}) for ticker, entry in meta_data.items()],
+        )
+        os.replace(meta_path, meta_path.with_name(LEGACY_META_NAME + ".migrated"))
+    return len(meta_data)
+
+
+def _legacy_date_range(ticker: str, data_dir: Path) -> Dict[str, Any]:
+    """Диапазон дат по индексу дат, если он уже построен (JSON не читается)"""
+    from app.utils.date_index import date_bounds, from_day, read_date_index
+
+    index = read_date_index(ticker, data_dir)
+    bounds = date_bounds(index) if index is not None else None
+    if bounds is None:
+        return {}
+    return {"date_range": [from_day(bounds[0]), from_day(bounds[1])]}
+
+
+def entries_version(entries: Iterable[Dict[str, Any]]) -> Tuple[Tuple[Any, ...], ...]:
+    """Часть ключа кэша, зависящая от записей каталога (группа, тип, версия данных)"""
+    return tuple((e.get("ticker"), e.get("group"), e.get("type"), e.get("data_version")) for e in entries)
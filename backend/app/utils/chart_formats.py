@@ -0,0 +1,215 @@
+# backend/app/utils/chart_formats.py
+"""
+Форматы выдачи данных графиков: построчный JSON (по умолчанию), колоночный JSON,
+упакованные бинарные буферы и Apache Arrow IPC (если установлен pyarrow).
+
+Бинарный формат (format=binary), все числа little-endian:
+    b"CHB1" | uint32 длина заголовка | JSON-заголовок (дополнен пробелами до кратности 8) | буферы
+
+Заголовок: {"tickers": [{"ticker", "group", "type", "length", "version",
+             "columns": {"date": {"dtype": "int32", "offset", "length"}, "close": {"dtype": "float64", ...}}}]}
+date - число дней от 1970-01-01; offset - смещение от начала области буферов, кратно 8,
+поэтому клиент может создать Int32Array/Float64Array поверх ответа без копирования.
+
+layout=aligned (выровненная матрица группы) использует тот же контейнер с заголовком
+{"layout": "aligned", "group", "tickers": [{"ticker", "type"}], "length",
+ "columns": {"date": {...}, "close": {"dtype": "float64", "shape": [тикеры, даты], ...}}};
+поле хранится построчно по тикерам, пропуски - NaN.
+"""
+import importlib.util
+import json
+import struct
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+CHART_FORMATS = ("json", "columnar", "binary", "arrow")
+BINARY_MAGIC = b"CHB1"
+BINARY_MEDIA_TYPE = "application/octet-stream"
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+# (ticker, group, type, записи из {ticker}.json)
+ChartEntry = Tuple[str, str, str, List[Dict[str, Any]]]
+
+
+def _value_columns(records: List[Dict[str, Any]]) -> List[str]:
+    return [key for key in records[0].keys() if key != "date"] if records else []
+
+
+def to_columnar(records: List[Dict[str, Any]]) -> Dict[str, List[Any]]:
+    """[{date, close, ...}, ...] -> {"dates": [...], "close": [...], ...}"""
+    columns: Dict[str, List[Any]] = {"dates": [r["date"] for r in records]}
+    for name in _value_columns(records):
+        columns[name] = [r.get(name) for r in records]
+    return columns
+
+
+def _numeric_arrays(records: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    arrays: Dict[str, np.ndarray] = {
+        "date": np.array([r["date"] for r in records], dtype="datetime64[D]").astype("<i4"),
+    }
+    for name in _value_columns(records):
+        arrays[name] = np.array([r.get(name) for r in records], dtype="<f8")
+    return arrays
+
+
+class _BufferWriter:
+    """Складывает массивы в область буферов с выравниванием на 8 байт"""
+
+    def __init__(self) -> None:
+        self.buffers: List[bytes] = []
+        self.offset = 0
+
+    def add(self, array: np.ndarray) -> Dict[str, Any]:
+        data = array.tobytes()
+        column = {"dtype": "int32" if array.dtype.kind == "i" else "float64", "offset": self.offset, "length": array.size}
+        if array.ndim > 1:
+            column["shape"] = list(array.shape)
+        padding = (-len(data)) % 8
+        self.buffers.append(data + b"\0" * padding)
+        self.offset += len(data) + padding
+        return column
+
+
+def _pack_binary(header: Dict[str, Any], buffers: List[bytes]) -> bytes:
+    header_bytes = json.dumps(header, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    # Выравниваем начало буферов на 8 байт: magic(4) + длина(4) + заголовок
+    header_bytes += b" " * ((-len(header_bytes)) % 8)
+    return BINARY_MAGIC + struct.pack("<I", len(header_bytes)) + header_bytes + b"".join(buffers)
+
+
+def encode_binary(entries: List[ChartEntry], extras: Optional[Dict[str, Dict[str, Any]]] = None) -> bytes:
+    """extras - доп. поля заголовка по тикерам (версия данных), как в JSON-ответе"""
+    header: Dict[str, Any] = {"tickers": []}
+    writer = _BufferWriter()
+
+    for ticker, group, chart_type, records in entries:
+        columns = {name: writer.add(array) for name, array in _numeric_arrays(records).items()}
+        header["tickers"].append({
+            "ticker": ticker,
+            "group": group,
+            "type": chart_type,
+            **(extras or {}).get(ticker, {}),
+            "length": len(records),
+            "columns": columns,
+        })
+
+    return _pack_binary(header, writer.buffers)
+
+
+def aligned_to_json(
+    group: str, tickers: List[str], types: Dict[str, str], dates: np.ndarray, fields: Dict[str, np.ndarray]
+) -> Dict[str, Any]:
+    """Выровненная матрица -> {"dates": [...], "fields": {"close": {ticker: [...]}}}, NaN -> null"""
+    rendered: Dict[str, Dict[str, List[Optional[float]]]] = {}
+    for name, values in fields.items():
+        rendered[name] = {
+            ticker: [None if v != v else v for v in row]
+            for ticker, row in zip(tickers, values.tolist())
+        }
+    return {
+        "group": group,
+        "layout": "aligned",
+        "tickers": tickers,
+        "types": types,
+        "dates": dates.astype("datetime64[D]").astype(str).tolist(),
+        "fields": rendered,
+    }
+
+
+def encode_aligned_binary(
+    group: str, tickers: List[str], types: Dict[str, str], dates: np.ndarray, fields: Dict[str, np.ndarray]
+) -> bytes:
+    writer = _BufferWriter()
+    columns = {"date": writer.add(dates.astype("<i4"))}
+    for name, values in fields.items():
+        columns[name] = writer.add(np.ascontiguousarray(values, dtype="<f8"))
+    header: Dict[str, Any] = {
+        "layout": "aligned",
+        "group": group,
+        "tickers": [{"ticker": t, "type": types.get(t, "line")} for t in tickers],
+        "length": len(dates),
+        "columns": columns,
+    }
+    return _pack_binary(header, writer.buffers)
+
+
+@lru_cache(maxsize=1)
+def _pyarrow() -> Any:
+    """
+    pyarrow - необязательная зависимость для format=arrow; импортируется при первом
+    Arrow-запросе, а не при старте процесса
+    """
+    try:
+        import pyarrow as pa  # type: ignore
+        import pyarrow.ipc  # type: ignore
+    except ImportError:
+        return None
+    return pa
+
+
+def arrow_available() -> bool:
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def encode_aligned_arrow(
+    group: str, tickers: List[str], types: Dict[str, str], dates: np.ndarray, fields: Dict[str, np.ndarray]
+) -> bytes:
+    """Широкая таблица: date (date32) и колонка "{ticker}.{field}" на каждую пару"""
+    pa = _pyarrow()
+    if pa is None:
+        raise RuntimeError("pyarrow is not installed")
+
+    columns: Dict[str, Any] = {"date": pa.array(dates.astype("<i4"), type=pa.int32()).cast(pa.date32())}
+    for name, values in fields.items():
+        for ticker, row in zip(tickers, values):
+            columns[f"{ticker}.{name}"] = pa.array(row)
+    table = pa.table(columns).replace_schema_metadata({
+        "layout": "aligned",
+        "group": group,
+        "tickers": json.dumps([{"ticker": t, "type": types.get(t, "line")} for t in tickers], ensure_ascii=False),
+    })
+    return _write_arrow(pa, table)
+
+
+def encode_arrow(entries: List[ChartEntry]) -> bytes:
+    """Одна таблица в длинном формате: ticker (dictionary), date (date32) и числовые колонки"""
+    pa = _pyarrow()
+    if pa is None:
+        raise RuntimeError("pyarrow is not installed")
+
+    value_columns: List[str] = []
+    for _, _, _, records in entries:
+        for name in _value_columns(records):
+            if name not in value_columns:
+                value_columns.append(name)
+
+    tickers: List[str] = []
+    dates: List[np.ndarray] = []
+    values: Dict[str, List[np.ndarray]] = {name: [] for name in value_columns}
+    for ticker, _, _, records in entries:
+        arrays = _numeric_arrays(records)
+        tickers.extend([ticker] * len(records))
+        dates.append(arrays["date"])
+        for name in value_columns:
+            values[name].append(arrays.get(name, np.full(len(records), np.nan)))
+
+    table = pa.table({
+        "ticker": pa.array(tickers).dictionary_encode(),
+        "date": pa.array(np.concatenate(dates) if dates else np.array([], dtype="<i4"), type=pa.int32()).cast(pa.date32()),
+        **{name: pa.array(np.concatenate(parts)) for name, parts in values.items()},
+    })
+    metadata = {
+        "tickers": json.dumps(
+            [{"ticker": t, "group": g, "type": c} for t, g, c, _ in entries], ensure_ascii=False
+        )
+    }
+    return _write_arrow(pa, table.replace_schema_metadata(metadata))
+
+
+def _write_arrow(pa: Any, table: Any) -> bytes:
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
@@ -1,14 +1,18 @@
 import json
 from datetime import datetime
 from pathlib import Path
+from typing import Any
 
 INDICATORS_CONFIG_PATH = Path("config/indicators.json")
 
-def create_default_config() -> dict[str, int | list[int] | str]:
+def create_default_config() -> dict[str, Any]:
     """Создать конфиг по умолчанию"""
-    default_config: dict[str, int | list[int] | str] = {
+    default_config: dict[str, Any] = {
         "ema_periods": [50, 200],
         "rsi_period": 14,
+        # Дополнительные индикаторы из реестра (app/utils/indicator_registry.py)
+        # включаются через /set-indicators
+        "indicators": [],
         "last_updated": datetime.now().isoformat(),
         "updated_by": "system"
     }
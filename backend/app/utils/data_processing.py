@@ -1,16 +1,33 @@
-import pandas as pd
+from __future__ import annotations
+
 from datetime import datetime
 from pathlib import Path
 import json
-from typing import Set, Dict, List, Tuple, Any
+from typing import TYPE_CHECKING, Dict, List, Tuple, Any, Optional
 import logging
 import math
 
-import ta # type: ignore
-from ta.trend import EMAIndicator  # type: ignore
-from ta.momentum import RSIIndicator  # type: ignore
+import numpy as np
 
 from app.utils.config_manager import get_indicators_config
+from app.core.metrics import stage_timer
+from app.utils.indicator_registry import (
+    IndicatorInputs,
+    compute_indicators,
+    configured_indicators,
+    is_indicator_column,
+)
+from app.utils.paths import DATA_DIR
+from app.utils.range_index import update_range_index
+from app.utils.catalog import get_entry, put_entry
+from app.utils.date_index import existing_mask, from_day, load_date_index, to_days, write_date_index
+
+# pandas импортируется в функциях загрузки и индикаторов: модуль нужен и эндпоинтам
+# чтения, которые без pandas стартуют заметно быстрее
+if TYPE_CHECKING:
+    import pandas as pd
+
+logger = logging.getLogger(__name__)
 
 
 def parse_date(date_input: Any) -> str:
@@ -50,66 +67,81 @@ def parse_date(date_input: Any) -> str:
     raise ValueError(f"Unable to parse date: {date_str}")
 
 
-DATA_DIR = Path("data")  
+# Числовые столбцы {ticker}.json, нужные индикаторам
+NUMERIC_COLUMNS = ('open', 'high', 'low', 'close', 'volume', 'price')
+
 
-def get_existing_dates_for_ticker(ticker: str, data_dir: Path = DATA_DIR) -> Set[str]:
+def load_ticker_frame(ticker: str, data_dir: Path = DATA_DIR) -> Optional[pd.DataFrame]:
     """
-    Возвращает множество дат, которые уже есть для данного тикера
+    Данные тикера для расчета индикаторов: date - дни от 1970-01-01 (int32),
+    числовые столбцы - float64 (пропуски - NaN). None - данных нет.
+    Строится по столбцам, без промежуточного DataFrame из списка словарей.
     """
-    filename = data_dir / f"{ticker}.json"
-    existing_dates: Set[str] = set()
-    
-    if filename.exists():
-        try:
-            existing_data: List[Dict[str, Any]] = json.loads(filename.read_text(encoding='utf-8'))
-            # Явно указываем тип для каждой записи
-            existing_dates = {str(record['date']) for record in existing_data}
-        except Exception as e:
-            logging.warning(f"Error reading existing data for {ticker}: {str(e)}")
-    
-    return existing_dates
+    import pandas as pd
+    
+    file_path = data_dir / f"{ticker}.json"
+    if not file_path.exists():
+        return None
+    records: List[Dict[str, Any]] = json.loads(file_path.read_text(encoding='utf-8'))
+    if not records:
+        return None
+    
+    columns: Dict[str, np.ndarray] = {'date': to_days(r['date'] for r in records)}
+    for name in NUMERIC_COLUMNS:
+        if name in records[0]:
+            columns[name] = np.fromiter(
+                (np.nan if r.get(name) is None else r[name] for r in records), dtype=np.float64, count=len(records)
+            )
+    del records
+    return pd.DataFrame(columns, copy=False)
 
 
 def calculate_indicators(df: pd.DataFrame) -> pd.DataFrame:
-    """Calculate technical indicators with settings from config"""
+    """
+    Calculate technical indicators with settings from config.
+    Колонки индикаторов остаются float64 с NaN - в null они превращаются только
+    при записи JSON (save_indicators_to_json)
+    """
     config = get_indicators_config()
-    ema_periods = [int(p) for p in config['ema_periods']] if isinstance(config['ema_periods'], list) else [50, 200]
-    rsi_period = int(config['rsi_period']) if isinstance(config['rsi_period'], (int, str)) else 14
+    instances = configured_indicators(config)
 
-    price_col = "price" if "price" in df.columns else "close"
+    # Колонки извлекаются один раз и общие для всех индикаторов
+    inputs = IndicatorInputs.from_frame(df)
+    for column, values in compute_indicators(inputs, instances).items():
+        df[column] = values
 
-    # Calculate EMAs
-    for period in ema_periods:
-        ema_values = EMAIndicator(df[price_col], window=period).ema_indicator()
-        df[f"ema_{period}"] = ema_values
+    return df
 
-    # Calculate RSI
-    rsi_values = RSIIndicator(df[price_col], window=rsi_period).rsi()
-    df[f"rsi_{rsi_period}"] = rsi_values
 
-    # Заменяем все NaN на None для корректного JSON
-    df = df.astype(object).where(pd.notnull(df), None) #type: ignore
+def _json_dates(values: pd.Series) -> List[Any]:
+    """Даты для JSON: дни от 1970-01-01 -> YYYY-MM-DD, строки - как есть"""
+    if np.issubdtype(values.dtype, np.integer):
+        return values.to_numpy().astype('datetime64[D]').astype(str).tolist()
+    return values.tolist()
 
-    return df
+
+def _json_floats(values: pd.Series) -> List[Optional[float]]:
+    """float64 -> список для JSON, NaN -> None"""
+    return [v if v == v else None for v in values.tolist()]
 
 
-def save_indicators_to_json(ticker: str, df: pd.DataFrame, indicators_df: pd.DataFrame):
+def save_indicators_to_json(ticker: str, df: pd.DataFrame, indicators_df: pd.DataFrame, data_dir: Path = DATA_DIR):
     """Сохранить индикаторы в отдельный JSON файл"""
     # Создаем структуру для сохранения
     indicators_data: Dict[str, Any] = {
         'ticker': ticker,
-        'dates': df['date'].tolist() if 'date' in df.columns else [],
+        'dates': _json_dates(df['date']) if 'date' in df.columns else [],
         'indicators': {}
     }
     
-    # Добавляем EMA и RSI индикаторы
+    # Добавляем колонки индикаторов из реестра
     for col in indicators_df.columns:
-        if col.startswith('ema_') or col.startswith('rsi_'):
-            indicators_data['indicators'][col] = indicators_df[col].tolist()
+        if is_indicator_column(col):
+            indicators_data['indicators'][col] = _json_floats(indicators_df[col])
     
     # Сохраняем в файл
-    indicators_dir = Path("data/indicators")
-    indicators_dir.mkdir(exist_ok=True)
+    indicators_dir = data_dir / "indicators"
+    indicators_dir.mkdir(parents=True, exist_ok=True)
     
     output_path = indicators_dir / f"{ticker}_indicators.json"
     with open(output_path, 'w', encoding='utf-8') as f:
@@ -118,6 +150,15 @@ def save_indicators_to_json(ticker: str, df: pd.DataFrame, indicators_df: pd.Dat
     return output_path
 
 
+def recompute_ticker_indicators(ticker: str, data_dir: Path = DATA_DIR) -> int:
+    """Пересчитывает и сохраняет индикаторы тикера; возвращает число строк"""
+    df = load_ticker_frame(ticker, data_dir)
+    if df is None:
+        return 0
+    save_indicators_to_json(ticker, df, calculate_indicators(df), data_dir)
+    return len(df)
+
+
 def process_linear_data(df: pd.DataFrame) -> Tuple[List[Dict[str, Any]], Dict[str, int]]: 
     """
     Обрабатывает данные и возвращает статистику по новым и существующим записям
@@ -130,10 +171,10 @@ def process_linear_data(df: pd.DataFrame) -> Tuple[List[Dict[str, Any]], Dict[st
     # Получаем тикер из DataFrame
     ticker = df['ticker'].iloc[0] if not df.empty else ""
     
-    # Загружаем существующие даты для этого тикера
-    existing_dates = get_existing_dates_for_ticker(ticker)
+    # Какие даты уже есть у тикера - один векторный поиск по индексу дат
+    existing = existing_mask(load_date_index(ticker), to_days(df['date'])) if ticker else np.zeros(len(df), dtype=bool)
     
-    for _, row in df.iterrows():
+    for position, (_, row) in enumerate(df.iterrows()):
             # Проверяем, что числовые значения валидны
         try:
             volume_val = float(row['volume'])
@@ -165,7 +206,7 @@ def process_linear_data(df: pd.DataFrame) -> Tuple[List[Dict[str, Any]], Dict[st
             'price': price_val
         }        
         # Проверяем, существует ли уже запись с этой датой
-        if record['date'] in existing_dates:
+        if existing[position]:
             existing_records += 1
             continue  # Пропускаем существующие записи
             
@@ -204,6 +245,8 @@ def process_candlestick_data(df: pd.DataFrame, ticker: str) -> Tuple[Dict[str, A
             f"Отсутствуют обязательные столбцы для тикера {ticker}: {missing_cols}"
         )
 
+    import pandas as pd
+    
     # Определение числовых столбцов
     numeric_columns = ['open', 'high', 'low', 'close', 'volume']
     df_processed = df.copy()
@@ -228,13 +271,13 @@ def process_candlestick_data(df: pd.DataFrame, ticker: str) -> Tuple[Dict[str, A
     new_records = 0
     skipped_invalid = 0
     
-    # Получение существующих дат
-    existing_dates = get_existing_dates_for_ticker(ticker)
+    # Получение существующих дат: поиск по индексу дат одним вызовом
+    existing = existing_mask(load_date_index(ticker), to_days(df_processed['date']))
     
     processed_data: List[Dict[str, Any]] = []
     
     # Обработка каждой строки
-    for _, row in df_processed.iterrows():
+    for position, (_, row) in enumerate(df_processed.iterrows()):
         try:
             # Извлечение числовых значений
             values = {
@@ -249,7 +292,7 @@ def process_candlestick_data(df: pd.DataFrame, ticker: str) -> Tuple[Dict[str, A
                 
             # Проверка существующих дат
             date_str = str(row['date'])
-            if date_str in existing_dates:
+            if existing[position]:
                 skipped_invalid += 1
                 continue
                 
@@ -262,7 +305,7 @@ def process_candlestick_data(df: pd.DataFrame, ticker: str) -> Tuple[Dict[str, A
             new_records += 1
             
         except (ValueError, TypeError) as e:
-            logging.warning(
+            logger.warning(
                 f"Ошибка обработки строки для {ticker}: {str(e)}"
             )
             skipped_invalid += 1
@@ -287,51 +330,76 @@ def process_candlestick_data(df: pd.DataFrame, ticker: str) -> Tuple[Dict[str, A
     return result, stats
 
 
-def save_json_data(data: List[Dict[str, Any]], ticker: str, group: str, data_type: str, data_dir: Path = DATA_DIR) -> Dict[str, int]:
+# Сколько последних изменений тикера хранить в каталоге для дельта-запросов
+DATA_CHANGELOG_SIZE = 50
+
+
+def changes_since(meta_entry: Dict[str, Any], since_version: int) -> Tuple[bool, Optional[str]]:
     """
-    Сохраняет данные в JSON файл, добавляя к существующим
+    Что изменилось у тикера после since_version: (full, from_date).
+    full=True - нужна полная перезагрузка (версия из другой истории или вышла из журнала);
+    иначе from_date - минимальная измененная дата (None, если изменений нет).
     """
-    filename = data_dir / f"{ticker}.json"
-    
-    # Загружаем существующие данные, если файл есть
-    existing_data: List[Dict[str, Any]] = []
-    if filename.exists():
-        try:
-            existing_data = json.loads(filename.read_text(encoding='utf-8'))
-        except Exception as e:
-            logging.warning(f"Error reading existing file {filename}: {str(e)}")
-            existing_data = []
-    
-    # ПРОВЕРКА НА ПУСТЫЕ ДАННЫЕ
-    if not data:
-        return {
-            'existing_records': len(existing_data),
-            'new_records_added': 0,
-            'total_records_now': len(existing_data)
-        }
-    
-    # Добавляем новые данные в начало
-    all_data = data + existing_data
-    
-    # Убедимся что данные отсортированы по дате (от старых к новым)
-    all_data_sorted = sorted(all_data, key=lambda x: x['date'])
-    
-    # Сохраняем обновленные данные (БЕЗ индикаторов)
-    try:
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(all_data_sorted, f, ensure_ascii=False, indent=2)
-    except Exception as e:
-        logging.error(f"Error saving data to {filename}: {str(e)}")
-        raise
-    
-    # СОХРАНЯЕМ МЕТА-ИНФОРМАЦИЮ - важно!
-    meta_filename = data_dir / "meta.json"
-    meta_data = {}
-    if meta_filename.exists():
-        try:
-            meta_data = json.loads(meta_filename.read_text(encoding='utf-8'))
-        except:
-            meta_data = {}
+    current = int(meta_entry.get('data_version', 0))
+    if since_version > current:
+        return True, None
+    if since_version == current:
+        return False, None
+    changes = [c for c in meta_entry.get('changes', []) if c[0] > since_version]
+    if not changes or changes[0][0] != since_version + 1:
+        return True, None
+    return False, min(c[1] for c in changes)
+
+
+def _append_json_records(filename: Path, records: List[Dict[str, Any]]) -> bool:
+    """
+    Дописывает записи в конец JSON-массива, сохраненного json.dump(..., indent=2):
+    результат байт в байт совпадает с полной перезаписью. False - файл в другом
+    формате, нужна обычная перезапись.
+    """
+    chunk = json.dumps(records, ensure_ascii=False, indent=2)
+    with open(filename, 'rb+') as f:
+        f.seek(0, 2)
+        size = f.tell()
+        if size < 4:
+            return False
+        f.seek(size - 2)
+        if f.read(2) != b'\n]':
+            return False
+        f.seek(size - 2)
+        f.write(b',\n' + chunk[2:].encode('utf-8'))
+        f.truncate()
+    return True
+
+
+def linear_group(ticker: str) -> str:
+    """Группа линейного тикера по его имени"""
+    if '95' in ticker:
+        return '95'
+    if '92' in ticker:
+        return '92'
+    if 'ДТ' in ticker:
+        return 'ДТ'
+    return 'Other'
+
+
+def record_ticker_change(
+    meta_data: Dict[str, Any],
+    ticker: str,
+    group: str,
+    data_type: str,
+    first_date: str,
+    total_records: int,
+    date_range: Optional[List[str]] = None,
+) -> int:
+    """
+    Обновляет запись тикера (формат каталога, app.utils.catalog) в словаре
+    meta_data и возвращает новую версию данных. Версия растет с каждой записью;
+    журнал хранит (версия, минимальная измененная дата) для дельта-запросов.
+    """
+    previous = meta_data.get(ticker, {})
+    data_version = int(previous.get('data_version', 0)) + 1
+    changes = previous.get('changes', []) + [[data_version, first_date]]
     
     # Обновляем мета-информацию для этого тикера
     meta_data[ticker] = {
@@ -339,38 +407,119 @@ def save_json_data(data: List[Dict[str, Any]], ticker: str, group: str, data_typ
         'group': group,
         'type': data_type,
         'last_updated': datetime.now().isoformat(),
-        'total_records': len(all_data_sorted)
-    }
-    
-    # Сохраняем обновленную мета-информацию
-    with open(meta_filename, 'w', encoding='utf-8') as f:
-        json.dump(meta_data, f, ensure_ascii=False, indent=2)
-    
-    return {
-        'existing_records': len(existing_data),
-        'new_records_added': len(data),
-        'total_records_now': len(all_data_sorted)
+        'data_version': data_version,
+        'changes': changes[-DATA_CHANGELOG_SIZE:],
+        'total_records': total_records,
+        'data_file': f"{ticker}.json",
+        'indicators_file': f"indicators/{ticker}_indicators.json",
     }
+    if date_range is not None:
+        meta_data[ticker]['date_range'] = date_range
+    return data_version
 
 
-def load_json_data(ticker: str) -> Dict[str, Any]:
-    """Load data from JSON file and indicators"""
-    result: Dict[str, Any] = {}
+def record_indicators_change(ticker: str, data_dir: Path = DATA_DIR) -> Optional[int]:
+    """
+    Новая версия тикера после пересчета индикаторов: изменилась вся история,
+    поэтому в журнал пишется первая дата тикера ('' - если диапазон неизвестен,
+    дельта отдает все строки). None - тикера нет в каталоге.
+    """
+    previous = get_entry(ticker, data_dir)
+    if previous is None:
+        return None
+    date_range = previous.get('date_range')
+    meta_data = {ticker: previous}
+    data_version = record_ticker_change(
+        meta_data, ticker, previous.get('group', 'Unknown'), previous.get('type', 'line'),
+        date_range[0] if date_range else '', previous.get('total_records', 0), date_range
+    )
+    put_entry(meta_data[ticker], data_dir)
+    return data_version
+
+
+def save_json_data(
+    data: List[Dict[str, Any]],
+    ticker: str,
+    group: str,
+    data_type: str,
+    data_dir: Path = DATA_DIR,
+    write_meta: bool = True,
+) -> Dict[str, Any]:
+    """
+    Сохраняет данные в JSON файл, добавляя к существующим.
+    write_meta=False - каталог не трогается (офлайн-импорт обновляет его сам
+    одной транзакцией через record_ticker_change)
+    """
+    filename = data_dir / f"{ticker}.json"
     
-    # Загружаем основные данные
-    file_path = Path("data") / f"{ticker}.json"
-    if file_path.exists():
-        with open(file_path, 'r', encoding='utf-8') as f:
-            result = json.load(f)
+    with stage_timer("merge_save"):
+        date_index = load_date_index(ticker, data_dir) if filename.exists() else np.empty(0, dtype=np.int32)
+        existing_count = len(date_index)
+        
+        # ПРОВЕРКА НА ПУСТЫЕ ДАННЫЕ
+        if not data:
+            return {
+                'existing_records': existing_count,
+                'new_records_added': 0,
+                'total_records_now': existing_count
+            }
+        
+        new_sorted = sorted(data, key=lambda x: x['date'])
+        new_days = to_days(r['date'] for r in new_sorted)
+        all_data_sorted: Optional[List[Dict[str, Any]]] = None
+        
+        # Все новые даты позже последней сохраненной - дописываем в конец файла без его разбора
+        if existing_count and new_days[0] > date_index[-1] and _append_json_records(filename, new_sorted):
+            all_days = np.concatenate([date_index, new_days])
+        else:
+            # Загружаем существующие данные, если файл есть
+            existing_data: List[Dict[str, Any]] = []
+            if filename.exists():
+                try:
+                    existing_data = json.loads(filename.read_text(encoding='utf-8'))
+                except Exception as e:
+                    logger.warning(f"Error reading existing file {filename}: {str(e)}")
+                    existing_data = []
+            existing_count = len(existing_data)
+            
+            # Добавляем новые данные в начало
+            all_data = data + existing_data
+            
+            # Убедимся что данные отсортированы по дате (от старых к новым)
+            all_data_sorted = sorted(all_data, key=lambda x: x['date'])
+            
+            # Сохраняем обновленные данные (БЕЗ индикаторов)
+            try:
+                with open(filename, 'w', encoding='utf-8') as f:
+                    json.dump(all_data_sorted, f, ensure_ascii=False, indent=2)
+            except Exception as e:
+                logger.error(f"Error saving data to {filename}: {str(e)}")
+                raise
+            all_days = to_days(r['date'] for r in all_data_sorted)
+        total_records = len(all_days)
+        write_date_index(ticker, all_days, data_dir)
+    
+    with stage_timer("range_index"):
+        # Префиксные суммы и sparse table для /api/range-stats: при дозаписи - продление
+        update_range_index(ticker, new_sorted, all_data_sorted, data_dir)
     
-    # Загружаем индикаторы если есть
-    indicators_path = Path("data/indicators") / f"{ticker}_indicators.json"
-    if indicators_path.exists():
-        try:
-            with open(indicators_path, 'r', encoding='utf-8') as f:
-                indicators_data = json.load(f)
-            result['indicators'] = indicators_data
-        except Exception as e:
-            logging.warning(f"Error loading indicators for {ticker}: {str(e)}")
+    result: Dict[str, Any] = {
+        'existing_records': existing_count,
+        'new_records_added': len(data),
+        'total_records_now': total_records,
+        'first_new_date': new_sorted[0]['date'],
+        'date_range': [from_day(all_days[0]), from_day(all_days[-1])]
+    }
+    if not write_meta:
+        return result
+    
+    with stage_timer("meta_write"):
+        # Запись каталога - одна строка тикера
+        previous = get_entry(ticker, data_dir)
+        meta_data = {ticker: previous} if previous else {}
+        result['data_version'] = record_ticker_change(
+            meta_data, ticker, group, data_type, result['first_new_date'], total_records, result['date_range']
+        )
+        put_entry(meta_data[ticker], data_dir)
     
-    return result
\ No newline at end of file
+    return result
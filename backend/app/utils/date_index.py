@@ -0,0 +1,99 @@
+# backend/app/utils/date_index.py
+"""
+Индекс дат тикера (data/index/{ticker}_dates.npy).
+
+Отсортированный массив int32 - дни от 1970-01-01, по одному на запись {ticker}.json.
+Хранится как .npy и открывается через mmap: минимум и максимум - первый и
+последний элемент, проверка дублей - searchsorted без чтения JSON.
+"""
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from app.utils.paths import DATA_DIR, index_dir
+
+
+def date_index_path(ticker: str, data_dir: Path = DATA_DIR) -> Path:
+    return index_dir(data_dir) / f"{ticker}_dates.npy"
+
+
+def to_days(dates: Iterable[str]) -> np.ndarray:
+    """Даты YYYY-MM-DD -> дни от 1970-01-01 (int32)"""
+    return np.array([str(d)[:10] for d in dates], dtype="datetime64[D]").astype(np.int32)
+
+
+def from_day(day: int) -> str:
+    """Дни от 1970-01-01 -> YYYY-MM-DD"""
+    return str(np.datetime64(int(day), "D"))
+
+
+def read_date_index(ticker: str, data_dir: Path = DATA_DIR) -> Optional[np.ndarray]:
+    """Индекс дат тикера (только чтение, через mmap) или None, если его нет"""
+    path = date_index_path(ticker, data_dir)
+    try:
+        return np.load(path, mmap_mode="r", allow_pickle=False)
+    except FileNotFoundError:
+        return None
+
+
+def write_date_index(ticker: str, days: np.ndarray, data_dir: Path = DATA_DIR) -> Path:
+    path = date_index_path(ticker, data_dir)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        np.save(f, np.ascontiguousarray(days, dtype=np.int32))
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_date_index(ticker: str, data_dir: Path = DATA_DIR) -> np.ndarray:
+    """
+    Индекс дат; для тикеров, загруженных до его появления, строится по {ticker}.json.
+    Пустой массив - у тикера еще нет данных.
+    """
+    index = read_date_index(ticker, data_dir)
+    if index is not None:
+        return index
+    data_file = data_dir / f"{ticker}.json"
+    if not data_file.exists():
+        return np.empty(0, dtype=np.int32)
+    records: List[Dict[str, Any]] = json.loads(data_file.read_text(encoding="utf-8"))
+    days = np.sort(to_days(r["date"] for r in records))
+    write_date_index(ticker, days, data_dir)
+    return days
+
+
+def date_bounds(index: np.ndarray) -> Optional[Tuple[int, int]]:
+    """(min, max) дней индекса или None для пустого"""
+    if not len(index):
+        return None
+    return int(index[0]), int(index[-1])
+
+
+def existing_mask(index: np.ndarray, days: np.ndarray) -> np.ndarray:
+    """
+    Какие из days уже есть в индексе. Если все новые даты позже максимальной
+    (обычная дозапись) или раньше минимальной - поиск не выполняется вовсе.
+    """
+    bounds = date_bounds(index)
+    if bounds is None or not len(days):
+        return np.zeros(len(days), dtype=bool)
+    low, high = bounds
+    if days.min() > high or days.max() < low:
+        return np.zeros(len(days), dtype=bool)
+    positions = np.searchsorted(index, days)
+    return index[np.minimum(positions, len(index) - 1)] == days
+
+
+def drop_date_index(ticker: Optional[str] = None, data_dir: Path = DATA_DIR) -> None:
+    """Удаляет индекс дат тикера или, без тикера, все индексы дат"""
+    if ticker is not None:
+        date_index_path(ticker, data_dir).unlink(missing_ok=True)
+        return
+    directory = index_dir(data_dir)
+    if directory.exists():
+        for path in directory.glob("*_dates.npy"):
+            path.unlink(missing_ok=True)
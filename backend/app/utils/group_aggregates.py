@@ -0,0 +1,252 @@
+# backend/app/utils/group_aggregates.py
+"""
+Агрегаты по группам тикеров, пересчитываемые при загрузке данных.
+
+Выровненная матрица группы (data/groups/{group}_aligned.npz) - общая ось дат
+(int32, дни от 1970-01-01) и по одному массиву float64 формы (тикеры, даты)
+на каждое поле; отсутствующие значения - NaN. При загрузке тикера обновляется
+только его строка, ось дат расширяется объединением.
+Стек объемов (data/groups/{group}_volume.json) строится из той же матрицы.
+"""
+import json
+import logging
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.utils.catalog import group_entries
+from app.utils.paths import DATA_DIR
+
+logger = logging.getLogger(__name__)
+
+GROUPS_DIR_NAME = "groups"
+
+
+@dataclass
+class AlignedMatrix:
+    group: str
+    tickers: List[str]
+    # Дни от 1970-01-01, по возрастанию
+    dates: np.ndarray
+    # Поле -> массив (len(tickers), len(dates))
+    fields: Dict[str, np.ndarray]
+
+
+def groups_dir(data_dir: Path = DATA_DIR) -> Path:
+    return data_dir / GROUPS_DIR_NAME
+
+
+def volume_stack_path(group: str, data_dir: Path = DATA_DIR) -> Path:
+    return groups_dir(data_dir) / f"{group}_volume.json"
+
+
+def aligned_matrix_path(group: str, data_dir: Path = DATA_DIR) -> Path:
+    return groups_dir(data_dir) / f"{group}_aligned.npz"
+
+
+def group_tickers(group: str, data_dir: Path = DATA_DIR) -> List[str]:
+    """Тикеры группы в порядке каталога (тот же порядок, что в ответе chart-data)"""
+    return list(group_entries(group, data_dir))
+
+
+def _load_ticker_arrays(ticker: str, data_dir: Path) -> Optional[Tuple[np.ndarray, Dict[str, np.ndarray]]]:
+    data_file = data_dir / f"{ticker}.json"
+    if not data_file.exists():
+        return None
+    records: List[Dict[str, Any]] = json.loads(data_file.read_text(encoding="utf-8"))
+    if not records:
+        return None
+    dates = np.array([r["date"] for r in records], dtype="datetime64[D]").astype(np.int32)
+    fields = {
+        name: np.array([r.get(name) for r in records], dtype=np.float64)
+        for name in records[0].keys() if name != "date"
+    }
+    return dates, fields
+
+
+def _empty_matrix(group: str) -> AlignedMatrix:
+    return AlignedMatrix(group, [], np.empty(0, dtype=np.int32), {})
+
+
+def _with_dates(matrix: AlignedMatrix, dates: np.ndarray) -> AlignedMatrix:
+    """Переносит строки матрицы на новую ось дат (надмножество или подмножество старой)"""
+    if np.array_equal(matrix.dates, dates):
+        return matrix
+    keep = np.isin(matrix.dates, dates)
+    positions = np.searchsorted(dates, matrix.dates[keep])
+    fields: Dict[str, np.ndarray] = {}
+    for name, values in matrix.fields.items():
+        resized = np.full((len(matrix.tickers), len(dates)), np.nan)
+        resized[:, positions] = values[:, keep]
+        fields[name] = resized
+    return AlignedMatrix(matrix.group, matrix.tickers, dates, fields)
+
+
+def _drop_ticker(matrix: AlignedMatrix, ticker: str) -> AlignedMatrix:
+    if ticker not in matrix.tickers:
+        return matrix
+    row = matrix.tickers.index(ticker)
+    tickers = matrix.tickers[:row] + matrix.tickers[row + 1:]
+    fields = {name: np.delete(values, row, axis=0) for name, values in matrix.fields.items()}
+    return AlignedMatrix(matrix.group, tickers, matrix.dates, fields)
+
+
+def _add_ticker(matrix: AlignedMatrix, ticker: str, dates: np.ndarray, values: Dict[str, np.ndarray]) -> AlignedMatrix:
+    matrix = _with_dates(matrix, np.union1d(matrix.dates, dates).astype(np.int32))
+    positions = np.searchsorted(matrix.dates, dates)
+    fields: Dict[str, np.ndarray] = {}
+    for name in list(matrix.fields) + [n for n in values if n not in matrix.fields]:
+        current = matrix.fields.get(name)
+        if current is None:
+            current = np.full((len(matrix.tickers), len(matrix.dates)), np.nan)
+        row = np.full((1, len(matrix.dates)), np.nan)
+        if name in values:
+            row[0, positions] = values[name]
+        fields[name] = np.vstack([current, row])
+    return AlignedMatrix(matrix.group, matrix.tickers + [ticker], matrix.dates, fields)
+
+
+def _finalize(matrix: AlignedMatrix, tickers: List[str]) -> AlignedMatrix:
+    """Порядок строк - как в каталоге; даты, на которых не осталось значений, убираются"""
+    order = [matrix.tickers.index(t) for t in tickers if t in matrix.tickers]
+    fields = {name: values[order] for name, values in matrix.fields.items()}
+    matrix = AlignedMatrix(matrix.group, [matrix.tickers[i] for i in order], matrix.dates, fields)
+    if not fields:
+        return _with_dates(matrix, np.empty(0, dtype=np.int32))
+    has_values = np.zeros(len(matrix.dates), dtype=bool)
+    for values in fields.values():
+        has_values |= ~np.isnan(values).all(axis=0)
+    return _with_dates(matrix, matrix.dates[has_values])
+
+
+def read_aligned_matrix(group: str, data_dir: Path = DATA_DIR) -> Optional[AlignedMatrix]:
+    path = aligned_matrix_path(group, data_dir)
+    if not path.exists():
+        return None
+    with np.load(path, allow_pickle=False) as npz:
+        tickers = [str(t) for t in npz["tickers"]]
+        fields = {name[len("field_"):]: npz[name] for name in npz.files if name.startswith("field_")}
+        return AlignedMatrix(group, tickers, npz["dates"], fields)
+
+
+def _write_aligned_matrix(matrix: AlignedMatrix, data_dir: Path) -> Path:
+    path = aligned_matrix_path(matrix.group, data_dir)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    # Пишем во временный файл и подменяем - читатели не видят полузаписанную матрицу
+    with open(tmp_path, "wb") as f:
+        np.savez(
+            f,
+            tickers=np.array(matrix.tickers, dtype=str),
+            dates=matrix.dates.astype(np.int32),
+            **{f"field_{name}": values for name, values in matrix.fields.items()},
+        )
+    os.replace(tmp_path, path)
+    return path
+
+
+def rebuild_aligned_matrix(group: str, data_dir: Path = DATA_DIR) -> Optional[AlignedMatrix]:
+    """Полная сборка матрицы по файлам всех тикеров группы"""
+    tickers = group_tickers(group, data_dir)
+    if not tickers:
+        aligned_matrix_path(group, data_dir).unlink(missing_ok=True)
+        return None
+    matrix = _empty_matrix(group)
+    for ticker in tickers:
+        arrays = _load_ticker_arrays(ticker, data_dir)
+        if arrays is not None:
+            matrix = _add_ticker(matrix, ticker, *arrays)
+    matrix = _finalize(matrix, tickers)
+    _write_aligned_matrix(matrix, data_dir)
+    return matrix
+
+
+def update_aligned_matrix(group: str, ticker: str, data_dir: Path = DATA_DIR) -> Optional[AlignedMatrix]:
+    """
+    Обновляет строку одного тикера: остальные строки только переносятся на новую ось дат.
+    Если матрица отсутствует или разошлась с составом группы - собирает ее заново.
+    """
+    tickers = group_tickers(group, data_dir)
+    matrix = read_aligned_matrix(group, data_dir)
+    if matrix is None or set(matrix.tickers) - {ticker} != set(tickers) - {ticker}:
+        return rebuild_aligned_matrix(group, data_dir)
+    if not tickers:
+        aligned_matrix_path(group, data_dir).unlink(missing_ok=True)
+        return None
+
+    matrix = _drop_ticker(matrix, ticker)
+    if ticker in tickers:
+        arrays = _load_ticker_arrays(ticker, data_dir)
+        if arrays is not None:
+            matrix = _add_ticker(matrix, ticker, *arrays)
+    matrix = _finalize(matrix, tickers)
+    _write_aligned_matrix(matrix, data_dir)
+    return matrix
+
+
+def load_aligned_matrix(group: str, data_dir: Path = DATA_DIR) -> Optional[AlignedMatrix]:
+    """Читает матрицу; для групп, загруженных до появления агрегатов, строит ее на лету"""
+    matrix = read_aligned_matrix(group, data_dir)
+    if matrix is None:
+        matrix = rebuild_aligned_matrix(group, data_dir)
+    return matrix
+
+
+def compute_volume_stack(matrix: AlignedMatrix) -> Dict[str, Any]:
+    """
+    Суммарный объем группы по датам и разбивка по тикерам (по убыванию объема).
+    Считается векторно по колонке volume выровненной матрицы.
+    """
+    result: Dict[str, Any] = {"group": matrix.group, "tickers": matrix.tickers, "data": []}
+    volumes = matrix.fields.get("volume")
+    if volumes is None or not len(matrix.dates):
+        return result
+
+    by_date = volumes.T
+    present = ~np.isnan(by_date)
+    totals = np.where(present, by_date, 0.0).sum(axis=1)
+    # Порядок частей в баре: по убыванию объема, отсутствующие тикеры - в конец
+    order = np.argsort(np.where(present, -by_date, np.inf), axis=1, kind="stable")
+    counts = present.sum(axis=1)
+
+    dates = matrix.dates.astype("datetime64[D]").astype(str).tolist()
+    data: List[Dict[str, Any]] = []
+    for row, date in enumerate(dates):
+        if not counts[row]:
+            continue
+        idx = order[row, : counts[row]]
+        data.append({
+            "date": date,
+            "total": float(totals[row]),
+            "parts": [{"ticker": matrix.tickers[i], "volume": float(by_date[row, i])} for i in idx],
+        })
+    result["data"] = data
+    return result
+
+
+def rebuild_volume_stack(group: str, data_dir: Path = DATA_DIR) -> Optional[Path]:
+    """Пересчитывает и сохраняет стек объемов группы; удаляет файл, если группа пуста"""
+    path = volume_stack_path(group, data_dir)
+    matrix = load_aligned_matrix(group, data_dir)
+    if matrix is None:
+        path.unlink(missing_ok=True)
+        return None
+
+    stack = compute_volume_stack(matrix)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(stack, f, ensure_ascii=False)
+    logger.info(f"Volume stack rebuilt for group {group}: {len(stack['data'])} dates")
+    return path
+
+
+def load_volume_stack(group: str, data_dir: Path = DATA_DIR) -> Optional[Dict[str, Any]]:
+    """Читает стек объемов; для групп, загруженных до появления агрегатов, строит его на лету"""
+    path = volume_stack_path(group, data_dir)
+    if not path.exists() and rebuild_volume_stack(group, data_dir) is None:
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
@@ -0,0 +1,115 @@
+# backend/app/utils/indicator_kernels.py
+"""
+Векторные ядра индикаторов на NumPy (float64, непрерывные массивы).
+
+Результаты совпадают с библиотекой `ta` (EMAIndicator / RSIIndicator, fillna=False):
+    EMA: ewm(span=period, adjust=False, min_periods=period)
+    RSI: ewm(alpha=1/period, adjust=False, min_periods=period) по росту/падению,
+         при нулевом среднем падении - 100.
+`ta` остается эталонной реализацией: INDICATOR_BACKEND=ta включает ее вместо ядер.
+"""
+import math
+import os
+from typing import Sequence
+
+import numpy as np
+
+INDICATOR_BACKEND = os.getenv("INDICATOR_BACKEND", "numpy")
+
+# Ограничение на рост множителя decay^-j внутри блока: больше - потеря точности
+_MAX_SCALE_LOG = math.log(1e100)
+_MAX_CHUNK = 4096
+# Сколько элементов ряда обрабатывать за раз, чтобы промежуточные массивы помещались в кэш
+_TILE_SIZE = 32768
+
+
+def _chunk_length(decay: float) -> int:
+    """Длина блока, на которой decay^-L не превышает 1e100"""
+    if decay >= 1.0:
+        return _MAX_CHUNK
+    return max(1, min(_MAX_CHUNK, int(_MAX_SCALE_LOG / -math.log(decay))))
+
+
+def _ewm_row(x: np.ndarray, alpha: float, out: np.ndarray) -> None:
+    """
+    Одна строка сглаживания. Ряд режется на блоки длины L; внутри блока
+        y[s+i] = decay^(i+1) * y[s-1] + a * decay^i * cumsum(decay^-j * x[s+j]),
+    все блоки тайла считаются разом, последовательным остается только перенос
+    y[s-1] между блоками.
+    """
+    decay = 1.0 - alpha
+    if decay <= 0.0:
+        # a == 1: сглаживания нет (decay^-j не определен)
+        out[:] = x
+        return
+
+    n = len(x)
+    chunk = min(_chunk_length(decay), n)
+    offsets = np.arange(chunk, dtype=np.float64)
+    growth = decay ** -offsets                  # decay^-j
+    scale = alpha * decay ** offsets            # a * decay^i
+    shrink_next = decay ** (offsets + 1.0)      # decay^(i+1)
+    block_decay = float(shrink_next[-1])
+    tile = max(1, _TILE_SIZE // chunk) * chunk
+
+    carry = float(x[0])  # y[-1] = x[0] дает y[0] = x[0]
+    for start in range(0, n, tile):
+        stop = min(start + tile, n)
+        blocks, rest = divmod(stop - start, chunk)
+        if blocks:
+            full_stop = start + blocks * chunk
+            work = out[start:full_stop].reshape(blocks, chunk)
+            np.multiply(x[start:full_stop].reshape(blocks, chunk), growth, out=work)
+            np.cumsum(work, axis=1, out=work)
+            work *= scale
+            carry_in = np.empty(blocks, dtype=np.float64)
+            for block, end in enumerate(work[:, -1].tolist()):
+                carry_in[block] = carry
+                carry = end + block_decay * carry
+            work += shrink_next * carry_in[:, None]
+        if rest:
+            tail = slice(stop - rest, stop)
+            acc = np.cumsum(x[tail] * growth[:rest])
+            out[tail] = scale[:rest] * acc + shrink_next[:rest] * carry
+            carry = float(out[stop - 1])
+
+
+def ewm_adjust_false(values: np.ndarray, alphas: Sequence[float]) -> np.ndarray:
+    """
+    Экспоненциальное сглаживание y[t] = (1 - a) * y[t-1] + a * x[t], y[0] = x[0]
+    сразу для нескольких коэффициентов a.
+
+    values - (n,) (один ряд на все коэффициенты) или (k, n) (свой ряд на каждый).
+    Результат - (len(alphas), n).
+    """
+    x = np.ascontiguousarray(values, dtype=np.float64)
+    k = len(alphas)
+    n = x.shape[-1]
+    out = np.empty((k, n), dtype=np.float64)
+    if n == 0:
+        return out
+    for row, alpha in enumerate(alphas):
+        _ewm_row(x if x.ndim == 1 else x[row], float(alpha), out[row])
+    return out
+
+
+def ema(values: np.ndarray, periods: Sequence[int]) -> np.ndarray:
+    """EMA для всех периодов за один проход: массив (len(periods), n)"""
+    x = np.asarray(values, dtype=np.float64)
+    result = ewm_adjust_false(x, [2.0 / (p + 1.0) for p in periods])
+    for row, period in enumerate(periods):
+        result[row, : max(0, min(period - 1, len(x)))] = np.nan
+    return result
+
+
+def rsi(values: np.ndarray, period: int) -> np.ndarray:
+    """RSI Уайлдера (как ta.momentum.RSIIndicator)"""
+    x = np.asarray(values, dtype=np.float64)
+    diff = np.diff(x, prepend=x[:1])
+    moves = np.vstack([np.maximum(diff, 0.0), np.maximum(-diff, 0.0)])
+    avg_up, avg_down = ewm_adjust_false(moves, [1.0 / period, 1.0 / period])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        result = np.where(avg_down == 0, 100.0, 100.0 - 100.0 / (1.0 + avg_up / avg_down))
+    result[: max(0, min(period - 1, len(x)))] = np.nan
+    return result
+
@@ -0,0 +1,382 @@
+# backend/app/utils/indicator_registry.py
+"""
+Реестр индикаторов.
+
+Каждый индикатор объявляет входы (close, high/low/close, volume), параметры со
+значениями по умолчанию, длину прогрева и выходы. Движок извлекает массивы тикера
+из DataFrame один раз, считает все EMA, нужные индикаторам, одним вызовом ядра
+и сохраняет каждый выход одной колонкой.
+
+Имена колонок: "{name}_{параметры через _}" (ema_50, rsi_14, bb_20_2), у индикаторов
+с несколькими выходами - "{ключ}.{выход}" (macd_12_26_9.signal).
+Эталонная реализация каждого индикатора - библиотека `ta` (INDICATOR_BACKEND=ta,
+а также ряды с пропусками).
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+from app.utils import indicator_kernels
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+Arrays = Dict[str, np.ndarray]
+
+
+class IndicatorInputs:
+    """Общие массивы тикера; производные (typical, EMA) считаются один раз"""
+
+    def __init__(self, arrays: Arrays):
+        self.arrays = arrays
+        self.length = len(next(iter(arrays.values()))) if arrays else 0
+        self._ema: Dict[int, np.ndarray] = {}
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "IndicatorInputs":
+        arrays: Arrays = {}
+        price_col = "price" if "price" in df.columns else "close"
+        if price_col in df.columns:
+            arrays["close"] = df[price_col].to_numpy(dtype=np.float64)
+        for name in ("open", "high", "low", "volume"):
+            if name in df.columns:
+                arrays[name] = df[name].to_numpy(dtype=np.float64)
+        return cls(arrays)
+
+    def has(self, names: Iterable[str]) -> bool:
+        return all(name in self.arrays or (name == "typical" and "close" in self.arrays) for name in names)
+
+    def get(self, name: str) -> np.ndarray:
+        if name == "typical" and "typical" not in self.arrays:
+            # Типичная цена (high + low + close) / 3; для линейных данных - сама цена
+            if "high" in self.arrays and "low" in self.arrays:
+                self.arrays["typical"] = (self.arrays["high"] + self.arrays["low"] + self.arrays["close"]) / 3.0
+            else:
+                self.arrays["typical"] = self.arrays["close"]
+        return self.arrays[name]
+
+    def finite(self, names: Iterable[str]) -> bool:
+        return all(bool(np.isfinite(self.get(name)).all()) for name in names)
+
+    def prefetch_ema(self, periods: Iterable[int]) -> None:
+        """EMA цены закрытия сразу для всех еще не посчитанных периодов"""
+        missing = sorted({int(p) for p in periods} - set(self._ema))
+        if missing:
+            for period, values in zip(missing, indicator_kernels.ema(self.get("close"), missing)):
+                self._ema[period] = values
+
+    def ema(self, period: int) -> np.ndarray:
+        self.prefetch_ema([period])
+        return self._ema[period]
+
+
+@dataclass(frozen=True)
+class IndicatorSpec:
+    name: str
+    inputs: Tuple[str, ...]
+    # Параметры в порядке, в котором они входят в имя колонки, со значениями по умолчанию
+    params: Mapping[str, int]
+    outputs: Tuple[str, ...]
+    warmup: Callable[..., int]
+    # compute(inputs, **params) -> {выход: float64[n]} на ядрах NumPy
+    compute: Callable[..., Arrays]
+    # reference(inputs, **params) -> то же самое через ta
+    reference: Callable[..., Arrays]
+    # EMA цены, которые нужны индикатору - считаются общим вызовом для всех индикаторов
+    ema_periods: Callable[..., List[int]] = field(default=lambda **params: [])
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "inputs": list(self.inputs),
+            "params": dict(self.params),
+            "outputs": list(self.outputs),
+            "warmup": self.warmup(**self.params),
+        }
+
+
+@dataclass(frozen=True)
+class IndicatorInstance:
+    spec: IndicatorSpec
+    params: Mapping[str, int]
+
+    @property
+    def key(self) -> str:
+        return "_".join([self.spec.name] + [str(self.params[name]) for name in self.spec.params])
+
+    def column(self, output: str) -> str:
+        return self.key if len(self.spec.outputs) == 1 else f"{self.key}.{output}"
+
+    @property
+    def columns(self) -> List[str]:
+        return [self.column(output) for output in self.spec.outputs]
+
+
+INDICATORS: Dict[str, IndicatorSpec] = {}
+
+
+def register(spec: IndicatorSpec) -> IndicatorSpec:
+    INDICATORS[spec.name] = spec
+    return spec
+
+
+def _series(inputs: IndicatorInputs, name: str) -> pd.Series:
+    import pandas as pd
+    return pd.Series(inputs.get(name))
+
+
+def _leading_nan(values: np.ndarray, count: int) -> np.ndarray:
+    values[: max(0, min(count, len(values)))] = np.nan
+    return values
+
+
+# --- EMA / RSI / SMA ------------------------------------------------------
+
+def _ema_reference(inputs: IndicatorInputs, window: int) -> Arrays:
+    from ta.trend import EMAIndicator  # type: ignore
+    return {"value": EMAIndicator(_series(inputs, "close"), window=window).ema_indicator().to_numpy()}
+
+
+register(IndicatorSpec(
+    name="ema",
+    inputs=("close",),
+    params={"window": 50},
+    outputs=("value",),
+    warmup=lambda window: window - 1,
+    compute=lambda inputs, window: {"value": inputs.ema(window)},
+    reference=_ema_reference,
+    ema_periods=lambda window: [window],
+))
+
+
+def _rsi_reference(inputs: IndicatorInputs, window: int) -> Arrays:
+    from ta.momentum import RSIIndicator  # type: ignore
+    return {"value": RSIIndicator(_series(inputs, "close"), window=window).rsi().to_numpy()}
+
+
+register(IndicatorSpec(
+    name="rsi",
+    inputs=("close",),
+    params={"window": 14},
+    outputs=("value",),
+    warmup=lambda window: window - 1,
+    compute=lambda inputs, window: {"value": indicator_kernels.rsi(inputs.get("close"), window)},
+    reference=_rsi_reference,
+))
+
+
+def _sma_reference(inputs: IndicatorInputs, window: int) -> Arrays:
+    from ta.trend import SMAIndicator  # type: ignore
+    return {"value": SMAIndicator(_series(inputs, "close"), window=window).sma_indicator().to_numpy()}
+
+
+register(IndicatorSpec(
+    name="sma",
+    inputs=("close",),
+    params={"window": 20},
+    outputs=("value",),
+    warmup=lambda window: window - 1,
+    compute=lambda inputs, window: {
+        "value": _series(inputs, "close").rolling(window, min_periods=window).mean().to_numpy()
+    },
+    reference=_sma_reference,
+))
+
+
+# --- MACD -----------------------------------------------------------------
+
+def _macd(inputs: IndicatorInputs, fast: int, slow: int, signal: int) -> Arrays:
+    macd = inputs.ema(fast) - inputs.ema(slow)
+    start = min(max(fast, slow) - 1, len(macd))
+    signal_line = np.full(len(macd), np.nan)
+    if start < len(macd):
+        signal_line[start:] = indicator_kernels.ema(macd[start:], [signal])[0]
+    return {"macd": macd, "signal": signal_line, "hist": macd - signal_line}
+
+
+def _macd_reference(inputs: IndicatorInputs, fast: int, slow: int, signal: int) -> Arrays:
+    from ta.trend import MACD  # type: ignore
+    indicator = MACD(_series(inputs, "close"), window_slow=slow, window_fast=fast, window_sign=signal)
+    return {
+        "macd": indicator.macd().to_numpy(),
+        "signal": indicator.macd_signal().to_numpy(),
+        "hist": indicator.macd_diff().to_numpy(),
+    }
+
+
+register(IndicatorSpec(
+    name="macd",
+    inputs=("close",),
+    params={"fast": 12, "slow": 26, "signal": 9},
+    outputs=("macd", "signal", "hist"),
+    warmup=lambda fast, slow, signal: max(fast, slow) + signal - 2,
+    compute=_macd,
+    reference=_macd_reference,
+    ema_periods=lambda fast, slow, signal: [fast, slow],
+))
+
+
+# --- Bollinger Bands ------------------------------------------------------
+
+def _bollinger(inputs: IndicatorInputs, window: int, num_std: int) -> Arrays:
+    rolling = _series(inputs, "close").rolling(window, min_periods=window)
+    mid = rolling.mean().to_numpy()
+    std = rolling.std(ddof=0).to_numpy()
+    return {"mid": mid, "upper": mid + num_std * std, "lower": mid - num_std * std}
+
+
+def _bollinger_reference(inputs: IndicatorInputs, window: int, num_std: int) -> Arrays:
+    from ta.volatility import BollingerBands  # type: ignore
+    indicator = BollingerBands(_series(inputs, "close"), window=window, window_dev=num_std)
+    return {
+        "mid": indicator.bollinger_mavg().to_numpy(),
+        "upper": indicator.bollinger_hband().to_numpy(),
+        "lower": indicator.bollinger_lband().to_numpy(),
+    }
+
+
+register(IndicatorSpec(
+    name="bb",
+    inputs=("close",),
+    params={"window": 20, "num_std": 2},
+    outputs=("mid", "upper", "lower"),
+    warmup=lambda window, num_std: window - 1,
+    compute=_bollinger,
+    reference=_bollinger_reference,
+))
+
+
+# --- ATR ------------------------------------------------------------------
+
+def _atr(inputs: IndicatorInputs, window: int) -> Arrays:
+    high, low, close = inputs.get("high"), inputs.get("low"), inputs.get("close")
+    n = len(close)
+    true_range = high - low
+    if n > 1:
+        previous = close[:-1]
+        true_range[1:] = np.maximum.reduce([true_range[1:], np.abs(high[1:] - previous), np.abs(low[1:] - previous)])
+    atr = np.full(n, np.nan)
+    if n >= window:
+        # Сглаживание Уайлдера с затравкой - средним TR за первое окно
+        seeded = true_range[window - 1:].copy()
+        seeded[0] = true_range[:window].mean()
+        atr[window - 1:] = indicator_kernels.ewm_adjust_false(seeded, [1.0 / window])[0]
+    return {"value": atr}
+
+
+def _atr_reference(inputs: IndicatorInputs, window: int) -> Arrays:
+    from ta.volatility import AverageTrueRange  # type: ignore
+    if inputs.length < window:  # ta не обрабатывает ряды короче окна
+        return {"value": np.full(inputs.length, np.nan)}
+    values = AverageTrueRange(
+        _series(inputs, "high"), _series(inputs, "low"), _series(inputs, "close"), window=window
+    ).average_true_range().to_numpy()
+    # ta заполняет прогрев нулями - приводим к NaN, как у остальных индикаторов
+    return {"value": _leading_nan(values.astype(np.float64), window - 1)}
+
+
+register(IndicatorSpec(
+    name="atr",
+    inputs=("high", "low", "close"),
+    params={"window": 14},
+    outputs=("value",),
+    warmup=lambda window: window - 1,
+    compute=_atr,
+    reference=_atr_reference,
+))
+
+
+# --- VWAP -----------------------------------------------------------------
+
+def _vwap(inputs: IndicatorInputs, window: int) -> Arrays:
+    import pandas as pd
+    volume = _series(inputs, "volume")
+    price_volume = pd.Series(inputs.get("typical") * inputs.get("volume"))
+    total_pv = price_volume.rolling(window, min_periods=window).sum().to_numpy()
+    total_volume = volume.rolling(window, min_periods=window).sum().to_numpy()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return {"value": total_pv / total_volume}
+
+
+def _vwap_reference(inputs: IndicatorInputs, window: int) -> Arrays:
+    from ta.volume import VolumeWeightedAveragePrice  # type: ignore
+    close = _series(inputs, "close")
+    high = _series(inputs, "high") if "high" in inputs.arrays else close
+    low = _series(inputs, "low") if "low" in inputs.arrays else close
+    indicator = VolumeWeightedAveragePrice(high, low, close, _series(inputs, "volume"), window=window)
+    return {"value": indicator.volume_weighted_average_price().to_numpy()}
+
+
+register(IndicatorSpec(
+    name="vwap",
+    # typical = (high + low + close) / 3, для линейных данных - цена
+    inputs=("typical", "volume"),
+    params={"window": 14},
+    outputs=("value",),
+    warmup=lambda window: window - 1,
+    compute=_vwap,
+    reference=_vwap_reference,
+))
+
+
+# --- Конфигурация и движок ------------------------------------------------
+
+def make_instance(name: str, params: Optional[Mapping[str, Any]] = None) -> IndicatorInstance:
+    """Проверяет имя и параметры индикатора; ValueError при ошибке"""
+    spec = INDICATORS.get(name)
+    if spec is None:
+        raise ValueError(f"Unknown indicator: {name}. Available: {sorted(INDICATORS)}")
+    params = dict(params or {})
+    unknown = set(params) - set(spec.params)
+    if unknown:
+        raise ValueError(f"Unknown parameters for {name}: {sorted(unknown)}")
+    resolved: Dict[str, int] = {}
+    for param, default in spec.params.items():
+        value = params.get(param, default)
+        if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+            raise ValueError(f"Parameter {name}.{param} must be a positive integer")
+        resolved[param] = value
+    return IndicatorInstance(spec, resolved)
+
+
+def configured_indicators(config: Mapping[str, Any]) -> List[IndicatorInstance]:
+    """Индикаторы из config/indicators.json: ema_periods, rsi_period и список indicators"""
+    ema_periods = [int(p) for p in config['ema_periods']] if isinstance(config.get('ema_periods'), list) else [50, 200]
+    rsi_period = int(config['rsi_period']) if isinstance(config.get('rsi_period'), (int, str)) else 14
+
+    instances = [make_instance("ema", {"window": p}) for p in ema_periods]
+    instances.append(make_instance("rsi", {"window": rsi_period}))
+    for item in config.get('indicators', []) or []:
+        instance = make_instance(item['name'], item.get('params'))
+        if instance not in instances:
+            instances.append(instance)
+    return instances
+
+
+def compute_indicators(inputs: IndicatorInputs, instances: List[IndicatorInstance]) -> Arrays:
+    """
+    Все индикаторы тикера по общим массивам: {колонка: float64[n]}.
+    Индикаторы без нужных входов (ATR на линейных данных) пропускаются.
+    """
+    usable = [i for i in instances if inputs.has(i.spec.inputs)]
+    needed = {name for instance in usable for name in instance.spec.inputs}
+    use_kernels = indicator_kernels.INDICATOR_BACKEND != "ta" and inputs.finite(needed)
+    if use_kernels:
+        inputs.prefetch_ema(p for instance in usable for p in instance.spec.ema_periods(**instance.params))
+
+    columns: Arrays = {}
+    for instance in usable:
+        compute = instance.spec.compute if use_kernels else instance.spec.reference
+        outputs = compute(inputs, **instance.params)
+        for output in instance.spec.outputs:
+            columns[instance.column(output)] = np.asarray(outputs[output], dtype=np.float64)
+    return columns
+
+
+def is_indicator_column(column: str) -> bool:
+    """Колонка, созданная реестром (по имени индикатора в начале ключа)"""
+    name, sep, _ = column.partition("_")
+    return bool(sep) and name in INDICATORS
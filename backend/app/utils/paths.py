@@ -0,0 +1,15 @@
+# backend/app/utils/paths.py
+"""
+Расположение хранилища данных: data/ и служебный каталог data/index/
+(индексы дат и диапазонов, каталог тикеров, реестр загрузок, статистика групп).
+
+Модуль без зависимостей, чтобы индексы и каталог не тянули за собой кэш ответов.
+"""
+from pathlib import Path
+
+DATA_DIR = Path("data")
+INDEX_DIR_NAME = "index"
+
+
+def index_dir(data_dir: Path = DATA_DIR) -> Path:
+    return data_dir / INDEX_DIR_NAME
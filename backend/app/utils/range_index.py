@@ -0,0 +1,296 @@
+# backend/app/utils/range_index.py
+"""
+Индекс диапазонных запросов по тикеру (data/index/{ticker}_range.npz).
+
+Строится при загрузке и хранит:
+    dates          - дни от 1970-01-01 (int32, по возрастанию);
+    volume_prefix,
+    price_prefix   - префиксные суммы объема и цены (close для свечей), длина n + 1;
+    high, low      - сами ряды (price, если у тикера нет high/low);
+    high_table,
+    low_table      - sparse table по максимумам/минимумам блоков из RANGE_BLOCK строк.
+
+Сумма и среднее на [from, to] - разность двух префиксов, экстремумы - два
+значения из sparse table плюс просмотр не более двух неполных блоков по краям.
+Sparse table по блокам, а не по строкам, занимает n/B * log(n/B) вместо n * log n.
+При дозаписи новых дат префиксы продлеваются, таблицы блоков пересобираются
+(они в B раз короче ряда); вставка в середину ряда ведет к полной сборке.
+"""
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.cache import file_version
+from app.utils.paths import DATA_DIR, index_dir
+
+logger = logging.getLogger(__name__)
+
+# Строк в блоке sparse table: граница просмотра по краям диапазона
+RANGE_BLOCK = 32
+# Сколько индексов держать в памяти процесса
+RANGE_INDEX_CACHE_SIZE = int(os.getenv("RANGE_INDEX_CACHE_SIZE", "256"))
+
+
+@dataclass
+class RangeIndex:
+    dates: np.ndarray
+    volume_prefix: np.ndarray
+    price_prefix: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    high_table: np.ndarray
+    low_table: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    def bounds(self, date_from: Optional[str], date_to: Optional[str]) -> Tuple[int, int]:
+        """Полуинтервал строк [lo, hi) для дат from..to включительно (бинарный поиск)"""
+        lo = 0 if date_from is None else int(np.searchsorted(self.dates, _day(date_from), side="left"))
+        hi = len(self.dates) if date_to is None else int(np.searchsorted(self.dates, _day(date_to), side="right"))
+        return lo, max(lo, hi)
+
+    def range_max(self, lo: int, hi: int) -> float:
+        return _query(self.high, self.high_table, lo, hi, np.fmax)
+
+    def range_min(self, lo: int, hi: int) -> float:
+        return _query(self.low, self.low_table, lo, hi, np.fmin)
+
+    def stats(self, date_from: Optional[str], date_to: Optional[str]) -> Dict[str, Any]:
+        lo, hi = self.bounds(date_from, date_to)
+        count = hi - lo
+        result: Dict[str, Any] = {
+            "count": count,
+            "first_date": None,
+            "last_date": None,
+            "volume_sum": 0.0,
+            "volume_mean": None,
+            "price_mean": None,
+            "min_low": None,
+            "max_high": None,
+        }
+        if not count:
+            return result
+        volume_sum = float(self.volume_prefix[hi] - self.volume_prefix[lo])
+        result.update(
+            first_date=_date_str(self.dates[lo]),
+            last_date=_date_str(self.dates[hi - 1]),
+            volume_sum=volume_sum,
+            volume_mean=volume_sum / count,
+            price_mean=float(self.price_prefix[hi] - self.price_prefix[lo]) / count,
+            min_low=self.range_min(lo, hi),
+            max_high=self.range_max(lo, hi),
+        )
+        return result
+
+
+def _day(date: str) -> int:
+    return int(np.datetime64(date[:10], "D").astype(np.int64))
+
+
+def _date_str(day: Any) -> str:
+    return str(np.datetime64(int(day), "D"))
+
+
+def range_index_path(ticker: str, data_dir: Path = DATA_DIR) -> Path:
+    return index_dir(data_dir) / f"{ticker}_range.npz"
+
+
+def _sparse_table(values: np.ndarray, reduce: Any) -> np.ndarray:
+    """
+    Sparse table по блокам: строка k - экстремум блоков [i, i + 2^k).
+    Хвост строки дополняется последним блоком, чтобы таблица была прямоугольной.
+    """
+    n = len(values)
+    blocks = -(-n // RANGE_BLOCK)
+    if not blocks:
+        return np.empty((1, 0), dtype=np.float64)
+    padded = np.empty(blocks * RANGE_BLOCK, dtype=np.float64)
+    padded[:n] = values
+    padded[n:] = values[-1]
+    levels = [reduce.reduce(padded.reshape(blocks, RANGE_BLOCK), axis=1)]
+    span = 1
+    while span * 2 <= blocks:
+        prev = levels[-1]
+        shifted = np.concatenate([prev[span:], np.repeat(prev[-1:], span)])
+        levels.append(reduce(prev, shifted))
+        span *= 2
+    return np.vstack(levels)
+
+
+def _query(values: np.ndarray, table: np.ndarray, lo: int, hi: int, reduce: Any) -> float:
+    """Экстремум values[lo:hi]: края - прямым просмотром, середина - два значения из таблицы"""
+    first_block = lo // RANGE_BLOCK
+    last_block = (hi - 1) // RANGE_BLOCK
+    if first_block == last_block:
+        return float(reduce.reduce(values[lo:hi]))
+    parts = [
+        reduce.reduce(values[lo:(first_block + 1) * RANGE_BLOCK]),
+        reduce.reduce(values[last_block * RANGE_BLOCK:hi]),
+    ]
+    inner = last_block - first_block - 1
+    if inner:
+        level = inner.bit_length() - 1
+        parts.append(table[level, first_block + 1])
+        parts.append(table[level, last_block - (1 << level)])
+    return float(reduce.reduce(np.array(parts)))
+
+
+def _arrays_from_records(records: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    dates = np.array([r["date"][:10] for r in records], dtype="datetime64[D]").astype(np.int32)
+    price_field = "close" if records and "close" in records[0] else "price"
+    price = np.array([r.get(price_field) for r in records], dtype=np.float64)
+    volume = np.array([r.get("volume") for r in records], dtype=np.float64)
+    high = np.array([r.get("high", r.get(price_field)) for r in records], dtype=np.float64)
+    low = np.array([r.get("low", r.get(price_field)) for r in records], dtype=np.float64)
+    return {"dates": dates, "price": price, "volume": volume, "high": high, "low": low}
+
+
+def _prefix(values: np.ndarray, start: float = 0.0) -> np.ndarray:
+    prefix = np.empty(len(values) + 1, dtype=np.float64)
+    prefix[0] = start
+    np.cumsum(np.nan_to_num(values), out=prefix[1:])
+    prefix[1:] += start
+    return prefix
+
+
+def build_range_index(records: List[Dict[str, Any]]) -> RangeIndex:
+    """Полная сборка по всем записям тикера (отсортированным по дате)"""
+    arrays = _arrays_from_records(records)
+    return RangeIndex(
+        dates=arrays["dates"],
+        volume_prefix=_prefix(arrays["volume"]),
+        price_prefix=_prefix(arrays["price"]),
+        high=arrays["high"],
+        low=arrays["low"],
+        high_table=_sparse_table(arrays["high"], np.fmax),
+        low_table=_sparse_table(arrays["low"], np.fmin),
+    )
+
+
+def append_range_index(index: RangeIndex, records: List[Dict[str, Any]]) -> RangeIndex:
+    """Дозапись строк, которые все позже последней даты индекса"""
+    arrays = _arrays_from_records(records)
+    high = np.concatenate([index.high, arrays["high"]])
+    low = np.concatenate([index.low, arrays["low"]])
+    return RangeIndex(
+        dates=np.concatenate([index.dates, arrays["dates"]]),
+        volume_prefix=np.concatenate([index.volume_prefix, _prefix(arrays["volume"], float(index.volume_prefix[-1]))[1:]]),
+        price_prefix=np.concatenate([index.price_prefix, _prefix(arrays["price"], float(index.price_prefix[-1]))[1:]]),
+        high=high,
+        low=low,
+        high_table=_sparse_table(high, np.fmax),
+        low_table=_sparse_table(low, np.fmin),
+    )
+
+
+def write_range_index(ticker: str, index: RangeIndex, data_dir: Path = DATA_DIR) -> Path:
+    path = range_index_path(ticker, data_dir)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    # Как и матрица группы - запись во временный файл и атомарная подмена
+    with open(tmp_path, "wb") as f:
+        np.savez(f, **{name: getattr(index, name) for name in RangeIndex.__dataclass_fields__})
+    os.replace(tmp_path, path)
+    return path
+
+
+def read_range_index(ticker: str, data_dir: Path = DATA_DIR) -> Optional[RangeIndex]:
+    path = range_index_path(ticker, data_dir)
+    if not path.exists():
+        return None
+    with np.load(path, allow_pickle=False) as npz:
+        return RangeIndex(**{name: npz[name] for name in RangeIndex.__dataclass_fields__})
+
+
+def update_range_index(
+    ticker: str,
+    new_records: List[Dict[str, Any]],
+    all_records: Optional[List[Dict[str, Any]]],
+    data_dir: Path = DATA_DIR,
+) -> RangeIndex:
+    """
+    Обновляет индекс после записи тикера. Если все новые даты позже последней
+    проиндексированной - продлевает индекс, иначе собирает его по all_records.
+    all_records=None - записи дописаны в конец файла и в памяти их нет: при
+    необходимости полной сборки они читаются из {ticker}.json.
+    """
+    index = read_range_index(ticker, data_dir)
+    appendable = (
+        index is not None
+        and (all_records is None or len(index) + len(new_records) == len(all_records))
+        and (not len(index) or min(_day(r["date"]) for r in new_records) > int(index.dates[-1]))
+    )
+    if appendable:
+        index = append_range_index(index, sorted(new_records, key=lambda r: r["date"]))
+    else:
+        if all_records is None:
+            all_records = json.loads((data_dir / f"{ticker}.json").read_text(encoding="utf-8"))
+        index = build_range_index(all_records)
+    write_range_index(ticker, index, data_dir)
+    return index
+
+
+def drop_range_index(ticker: Optional[str] = None, data_dir: Path = DATA_DIR) -> None:
+    """Удаляет индекс тикера или, без тикера, все индексы"""
+    if ticker is not None:
+        range_index_path(ticker, data_dir).unlink(missing_ok=True)
+        return
+    directory = index_dir(data_dir)
+    if directory.exists():
+        for path in directory.glob("*_range.npz"):
+            path.unlink(missing_ok=True)
+
+
+class _IndexCache:
+    """Загруженные индексы по (тикер, версия файла): запрос не читает диск повторно"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[str, RangeIndex]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, ticker: str, data_dir: Path) -> Optional[RangeIndex]:
+        path = range_index_path(ticker, data_dir)
+        version = file_version([path])
+        with self._lock:
+            entry = self._entries.get(ticker)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(ticker)
+                return entry[1]
+        index = read_range_index(ticker, data_dir)
+        if index is None:
+            return None
+        with self._lock:
+            self._entries[ticker] = (version, index)
+            self._entries.move_to_end(ticker)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return index
+
+
+_index_cache = _IndexCache(RANGE_INDEX_CACHE_SIZE)
+
+
+def load_range_index(ticker: str, data_dir: Path = DATA_DIR) -> Optional[RangeIndex]:
+    """
+    Индекс тикера из памяти процесса; для тикеров, загруженных до появления
+    индекса, собирается по {ticker}.json.
+    """
+    index = _index_cache.get(ticker, data_dir)
+    if index is not None:
+        return index
+    data_file = data_dir / f"{ticker}.json"
+    if not data_file.exists():
+        return None
+    records = json.loads(data_file.read_text(encoding="utf-8"))
+    write_range_index(ticker, build_range_index(records), data_dir)
+    logger.info(f"Range index built for {ticker}: {len(records)} rows")
+    return _index_cache.get(ticker, data_dir)
@@ -0,0 +1,132 @@
+# backend/app/utils/upload_registry.py
+"""
+Реестр загрузок (data/index/uploads.json) - SHA-256 загруженных файлов и листов.
+
+    files  - хеш файла -> статистика ответа: повторная загрузка того же файла
+             возвращается сразу, без разбора Excel;
+    sheets - "вид:тикер" -> хеш нормализованного содержимого листа (тикера):
+             неизменившийся лист пропускается без проверки дат и пересчета
+             индикаторов.
+
+Данные только дописываются, поэтому повторное применение того же листа ничего
+не добавило бы. После сброса данных записи реестра удаляются (forget_ticker/clear).
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, BinaryIO, Dict, Optional
+
+from app.utils.paths import DATA_DIR, index_dir
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Сколько последних загруженных файлов помнить
+UPLOAD_HISTORY_SIZE = int(os.getenv("UPLOAD_HISTORY_SIZE", "100"))
+_HASH_CHUNK = 1024 * 1024
+
+_lock = threading.Lock()
+
+
+def registry_path(data_dir: Path = DATA_DIR) -> Path:
+    return index_dir(data_dir) / "uploads.json"
+
+
+def file_digest(file: BinaryIO) -> str:
+    """SHA-256 содержимого файла; позиция чтения возвращается в начало"""
+    digest = hashlib.sha256()
+    file.seek(0)
+    for chunk in iter(lambda: file.read(_HASH_CHUNK), b""):
+        digest.update(chunk)
+    file.seek(0)
+    return digest.hexdigest()
+
+
+def path_digest(path: Path) -> str:
+    """SHA-256 файла на диске (члены архивов массовой загрузки и офлайн-импорта)"""
+    with open(path, "rb") as f:
+        return file_digest(f)
+
+
+def frame_digest(df: pd.DataFrame) -> str:
+    """SHA-256 нормализованного листа: имена столбцов и хеши значений по строкам"""
+    import pandas as pd
+    
+    digest = hashlib.sha256()
+    digest.update(json.dumps([str(c) for c in df.columns], ensure_ascii=False).encode("utf-8"))
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())  # type: ignore
+    return digest.hexdigest()
+
+
+def _read(data_dir: Path) -> Dict[str, Any]:
+    path = registry_path(data_dir)
+    try:
+        registry: Dict[str, Any] = json.loads(path.read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        registry = {}
+    registry.setdefault("files", {})
+    registry.setdefault("sheets", {})
+    return registry
+
+
+def _write(registry: Dict[str, Any], data_dir: Path) -> None:
+    path = registry_path(data_dir)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_text(json.dumps(registry, ensure_ascii=False, indent=2), encoding="utf-8")
+    os.replace(tmp_path, path)
+
+
+def _sheet_key(kind: str, ticker: str) -> str:
+    return f"{kind}:{ticker}"
+
+
+def cached_upload(kind: str, digest: str, data_dir: Path = DATA_DIR) -> Optional[Dict[str, Any]]:
+    """Статистика прошлой загрузки того же файла или None"""
+    with _lock:
+        return _read(data_dir)["files"].get(f"{kind}:{digest}")
+
+
+def remember_upload(kind: str, digest: str, statistics: Dict[str, Any], data_dir: Path = DATA_DIR) -> None:
+    with _lock:
+        registry = _read(data_dir)
+        files: Dict[str, Any] = registry["files"]
+        files.pop(f"{kind}:{digest}", None)
+        files[f"{kind}:{digest}"] = statistics
+        # Словарь хранит порядок вставки - старые загрузки вытесняются первыми
+        for key in list(files)[:-UPLOAD_HISTORY_SIZE]:
+            del files[key]
+        _write(registry, data_dir)
+
+
+def sheet_unchanged(kind: str, ticker: str, digest: str, data_dir: Path = DATA_DIR) -> bool:
+    """Лист совпадает с уже загруженным и данные тикера на месте"""
+    with _lock:
+        known = _read(data_dir)["sheets"].get(_sheet_key(kind, ticker))
+    return known == digest and (data_dir / f"{ticker}.json").exists()
+
+
+def remember_sheet(kind: str, ticker: str, digest: str, data_dir: Path = DATA_DIR) -> None:
+    with _lock:
+        registry = _read(data_dir)
+        registry["sheets"][_sheet_key(kind, ticker)] = digest
+        _write(registry, data_dir)
+
+
+def forget_ticker(ticker: str, data_dir: Path = DATA_DIR) -> None:
+    """После сброса тикера: его листы и все файлы (в них мог быть этот тикер)"""
+    with _lock:
+        registry = _read(data_dir)
+        registry["files"] = {}
+        registry["sheets"] = {
+            key: value for key, value in registry["sheets"].items() if key.split(":", 1)[1] != ticker
+        }
+        _write(registry, data_dir)
+
+
+def clear_registry(data_dir: Path = DATA_DIR) -> None:
+    registry_path(data_dir).unlink(missing_ok=True)
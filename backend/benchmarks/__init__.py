@@ -0,0 +1 @@
+# benchmarks/__init__.py - Бенчмарки бэкенда (python -m benchmarks.run)
@@ -0,0 +1,333 @@
+# backend/benchmarks/loadtest.py
+"""
+Нагрузочный тест с реалистичной смесью запросов дашборда.
+
+Виртуальные пользователи (asyncio) выбирают действие по весам из --mix: вход,
+список групп, данные группы, индикаторы и изредка загрузку файла. Итог - пропускная
+способность, p50/p95/p99 и доля ошибок по каждому маршруту.
+
+Примеры (из директории backend):
+    # Поднять приложение локально на синтетических данных и нагрузить 50 пользователями
+    python -m benchmarks.loadtest --spawn --users 50 --duration 60
+
+    # Против уже запущенного инстанса
+    python -m benchmarks.loadtest --url http://localhost:8000 --username admin --password admin
+
+    # Загрузка файла на фоне чтения: показывает блокировку event loop
+    python -m benchmarks.loadtest --spawn --upload-during-read --upload-rows 50000
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+DEFAULT_MIX = "login=1,groups=4,chart_data=10,indicator=8,upload=0.1"
+
+
+def parse_mix(value: str) -> Dict[str, float]:
+    mix: Dict[str, float] = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = float(weight)
+    unknown = set(mix) - set(ACTIONS)
+    if unknown:
+        raise argparse.ArgumentTypeError(f"Unknown actions in mix: {sorted(unknown)}")
+    return mix
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(int(round(q / 100.0 * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+
+@dataclass
+class RouteStats:
+    latencies: List[float] = field(default_factory=list)
+    errors: int = 0
+    # (момент отправки относительно старта теста, латентность) - для анализа окон загрузки
+    timeline: List[Tuple[float, float]] = field(default_factory=list)
+
+    def summary(self, duration: float) -> Dict[str, Any]:
+        total = len(self.latencies) + self.errors
+        return {
+            "requests": total,
+            "errors": self.errors,
+            "error_rate": self.errors / total if total else 0.0,
+            "throughput_rps": total / duration if duration else 0.0,
+            "p50_ms": percentile(self.latencies, 50) * 1000,
+            "p95_ms": percentile(self.latencies, 95) * 1000,
+            "p99_ms": percentile(self.latencies, 99) * 1000,
+            "max_ms": max(self.latencies, default=0.0) * 1000,
+        }
+
+
+class LoadTest:
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.stats: Dict[str, RouteStats] = {}
+        self.groups: Dict[str, Dict[str, Any]] = {}
+        self.token: Optional[str] = None
+        self.upload_batches = 0
+        self.upload_windows: List[Tuple[float, float]] = []
+        self.started = 0.0
+
+    def record(self, route: str, start: float, ok: bool) -> None:
+        elapsed = time.perf_counter() - start
+        stats = self.stats.setdefault(route, RouteStats())
+        if ok:
+            stats.latencies.append(elapsed)
+            stats.timeline.append((start - self.started, elapsed))
+        else:
+            stats.errors += 1
+
+    async def request(self, client: httpx.AsyncClient, route: str, method: str, url: str, **kwargs: Any) -> Optional[httpx.Response]:
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+            self.record(route, start, response.status_code < 400)
+            return response
+        except httpx.HTTPError:
+            self.record(route, start, False)
+            return None
+
+    def auth_headers(self) -> Dict[str, str]:
+        return {"Authorization": f"Bearer {self.token}"} if self.token else {}
+
+    # --- Действия ---
+
+    async def login(self, client: httpx.AsyncClient) -> None:
+        response = await self.request(
+            client, "POST /auth/login", "POST", "/auth/login",
+            json={"username": self.args.username, "password": self.args.password},
+        )
+        if response is not None and response.status_code == 200:
+            self.token = response.json()["access_token"]
+
+    async def groups_action(self, client: httpx.AsyncClient) -> None:
+        response = await self.request(client, "GET /charts/api/available-groups", "GET", "/charts/api/available-groups")
+        if response is not None and response.status_code == 200:
+            self.groups = response.json()
+
+    async def chart_data(self, client: httpx.AsyncClient) -> None:
+        if not self.groups:
+            return await self.groups_action(client)
+        group = random.choice(list(self.groups))
+        await self.request(client, "GET /charts/api/chart-data", "GET", "/charts/api/chart-data", params={"group": group})
+
+    async def indicator(self, client: httpx.AsyncClient) -> None:
+        if not self.groups:
+            return await self.groups_action(client)
+        ticker = random.choice(random.choice(list(self.groups.values()))["tickers"])
+        name, period = random.choice([("ema", 50), ("ema", 200), ("rsi", 14)])
+        await self.request(
+            client, "GET /charts/indicators/{ticker}", "GET", f"/charts/indicators/{ticker}",
+            params={"indicator": name, "period": period},
+        )
+
+    async def upload(self, client: httpx.AsyncClient) -> None:
+        if self.token is None:
+            await self.login(client)
+        self.upload_batches += 1
+        content = await asyncio.to_thread(build_upload_file, self.args.upload_rows, self.upload_batches)
+        start = time.perf_counter() - self.started
+        await self.request(
+            client, "POST /charts/upload-candlestick", "POST", "/charts/upload-candlestick",
+            files={"file": ("loadtest.xlsx", content, "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")},
+            headers=self.auth_headers(),
+            timeout=None,
+        )
+        self.upload_windows.append((start, time.perf_counter() - self.started))
+
+    # --- Сценарии ---
+
+    async def user(self, client: httpx.AsyncClient, mix: Dict[str, float], deadline: float) -> None:
+        names = list(mix)
+        weights = [mix[n] for n in names]
+        while time.perf_counter() < deadline:
+            await ACTIONS[random.choices(names, weights)[0]](self, client)
+            if self.args.think_time:
+                await asyncio.sleep(random.expovariate(1.0 / self.args.think_time))
+
+    async def canary(self, client: httpx.AsyncClient, deadline: float) -> None:
+        """Пинг /health: любой скачок латентности здесь - это блокировка event loop"""
+        while time.perf_counter() < deadline:
+            await self.request(client, "GET /health (canary)", "GET", "/health")
+            await asyncio.sleep(0.05)
+
+    async def uploader(self, client: httpx.AsyncClient, deadline: float) -> None:
+        # Даем чтению прогреться, затем грузим файлы подряд до конца теста
+        await asyncio.sleep(min(self.args.duration * 0.2, 5.0))
+        while time.perf_counter() < deadline:
+            await self.upload(client)
+            await asyncio.sleep(1.0)
+
+    async def run(self) -> Dict[str, Any]:
+        mix = dict(self.args.mix)
+        if self.args.upload_during_read:
+            mix["upload"] = 0.0
+
+        limits = httpx.Limits(max_connections=self.args.users + 2)
+        async with httpx.AsyncClient(base_url=self.args.url, limits=limits, timeout=self.args.timeout) as client:
+            await self.login(client)
+            await self.groups_action(client)
+            self.stats.clear()
+
+            self.started = time.perf_counter()
+            deadline = self.started + self.args.duration
+            tasks = [self.user(client, mix, deadline) for _ in range(self.args.users)]
+            tasks.append(self.canary(client, deadline))
+            if self.args.upload_during_read:
+                tasks.append(self.uploader(client, deadline))
+            await asyncio.gather(*tasks)
+            duration = time.perf_counter() - self.started
+
+        report: Dict[str, Any] = {
+            "config": {
+                "url": self.args.url,
+                "users": self.args.users,
+                "duration_s": duration,
+                "mix": mix,
+                "upload_during_read": self.args.upload_during_read,
+            },
+            "total_throughput_rps": sum(len(s.latencies) + s.errors for s in self.stats.values()) / duration,
+            "routes": {route: stats.summary(duration) for route, stats in sorted(self.stats.items())},
+        }
+        if self.upload_windows:
+            report["during_upload"] = self.split_by_upload_windows()
+        return report
+
+    def split_by_upload_windows(self) -> Dict[str, Any]:
+        """Латентность чтения внутри окон загрузки и вне их"""
+        def inside(t: float) -> bool:
+            return any(start <= t <= end for start, end in self.upload_windows)
+
+        result: Dict[str, Any] = {"upload_windows": len(self.upload_windows)}
+        for route, stats in self.stats.items():
+            if route.startswith("POST /charts/upload"):
+                continue
+            during = [lat for t, lat in stats.timeline if inside(t)]
+            outside = [lat for t, lat in stats.timeline if not inside(t)]
+            result[route] = {
+                "during_p50_ms": percentile(during, 50) * 1000,
+                "during_p99_ms": percentile(during, 99) * 1000,
+                "outside_p50_ms": percentile(outside, 50) * 1000,
+                "outside_p99_ms": percentile(outside, 99) * 1000,
+            }
+        return result
+
+
+ACTIONS = {
+    "login": LoadTest.login,
+    "groups": LoadTest.groups_action,
+    "chart_data": LoadTest.chart_data,
+    "indicator": LoadTest.indicator,
+    "upload": LoadTest.upload,
+}
+
+
+def build_upload_file(rows: int, batch: int) -> bytes:
+    """Книга с одним тикером; каждая следующая партия - новые даты, чтобы загрузка не сводилась к пропуску дубликатов"""
+    from benchmarks.synthetic import START_DATE, write_candlestick_xlsx
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "upload.xlsx"
+        write_candlestick_xlsx(path, ["LOADTEST"], rows, seed=batch, start=START_DATE + batch * rows)
+        return path.read_bytes()
+
+
+def spawn_app(args: argparse.Namespace) -> Tuple[subprocess.Popen, Path]:
+    """Запускает uvicorn во временной директории с синтетическим хранилищем"""
+    sys.path.insert(0, str(BACKEND_DIR))
+    from benchmarks.synthetic import ticker_names, write_json_store
+
+    workdir = Path(tempfile.mkdtemp(prefix="loadtest-"))
+    tickers = ticker_names(args.seed_tickers)
+    per_group = max(args.seed_tickers // args.seed_groups, 1)
+    for g in range(args.seed_groups):
+        group_tickers = tickers[g * per_group:(g + 1) * per_group]
+        write_json_store(workdir / "data", group_tickers, args.seed_rows, group=f"G{g}", data_type="line", seed=g * per_group)
+
+    env = {**os.environ, "PYTHONPATH": str(BACKEND_DIR)}
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(args.port), "--log-level", "warning"],
+        cwd=workdir,
+        env=env,
+    )
+    args.url = f"http://127.0.0.1:{args.port}"
+
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            if httpx.get(f"{args.url}/health", timeout=1.0).status_code == 200:
+                break
+        except httpx.HTTPError:
+            pass
+        if process.poll() is not None:
+            raise RuntimeError("App process exited during startup")
+        time.sleep(0.2)
+    else:
+        process.terminate()
+        raise RuntimeError("App did not become healthy within 60s")
+    return process, workdir
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Dashboard HTTP load test")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--spawn", action="store_true", help="Start a local app on synthetic data")
+    parser.add_argument("--port", type=int, default=8765, help="Port for --spawn")
+    parser.add_argument("--seed-tickers", type=int, default=30, help="Tickers in the synthetic store (--spawn)")
+    parser.add_argument("--seed-groups", type=int, default=3, help="Groups in the synthetic store (--spawn)")
+    parser.add_argument("--seed-rows", type=int, default=2000, help="Bars per ticker (--spawn)")
+    parser.add_argument("--username", default="admin")
+    parser.add_argument("--password", default="admin")
+    parser.add_argument("--users", type=int, default=20, help="Concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=30.0, help="Test duration, seconds")
+    parser.add_argument("--think-time", type=float, default=0.5, help="Mean pause between user actions, seconds (0 = none)")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Per-request timeout, seconds")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX), help=f"Action weights (default: {DEFAULT_MIX})")
+    parser.add_argument("--upload-during-read", action="store_true", help="Run uploads back-to-back alongside read-only load")
+    parser.add_argument("--upload-rows", type=int, default=20000, help="Rows in the uploaded workbook")
+    parser.add_argument("--output", type=Path, default=None, help="Write JSON report to this path")
+    args = parser.parse_args()
+
+    process: Optional[subprocess.Popen] = None
+    workdir: Optional[Path] = None
+    if args.spawn:
+        process, workdir = spawn_app(args)
+
+    try:
+        report = asyncio.run(LoadTest(args).run())
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=10)
+        if workdir is not None:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    print(text)
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(text, encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
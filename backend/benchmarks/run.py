@@ -0,0 +1,311 @@
+# backend/benchmarks/run.py
+"""
+Бенчмарки загрузки, расчета индикаторов и чтения графиков.
+
+Запуск (из директории backend):
+    python -m benchmarks.run                                  # 10k, 100k, 1M строк
+    python -m benchmarks.run --sizes 10000 --repeat 5
+    python -m benchmarks.run --save-baseline                  # записать benchmarks/baseline.json
+    python -m benchmarks.run --baseline benchmarks/baseline.json --threshold 0.2
+
+Baseline не хранится в git: времена зависят от машины, поэтому его снимают через
+--save-baseline на той машине, где потом выполняется сравнение.
+
+Каждый прогон выполняется во временной рабочей директории (data/, config/ и БД
+создаются там же), результаты пишутся в JSON. При сравнении с baseline процесс
+завершается с кодом 1, если лучшее время какого-либо замера выросло больше порога.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "baseline.json"
+DEFAULT_RESULTS_DIR = Path(__file__).resolve().parent / "results"
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+
+
+@dataclass
+class Case:
+    name: str
+    # setup(rows) -> состояние для run; выполняется перед каждым повтором и не замеряется
+    setup: Callable[[int], Any]
+    run: Callable[[Any], Any]
+
+
+def _reset_data_dir() -> Path:
+    data_dir = Path("data")
+    shutil.rmtree(data_dir, ignore_errors=True)
+    data_dir.mkdir()
+    return data_dir
+
+
+# Периоды для сравнения ядер индикаторов (как в конфиге по умолчанию плюс короткий период)
+KERNEL_EMA_PERIODS = [12, 50, 200]
+KERNEL_RSI_PERIOD = 14
+
+
+def run_numpy_kernels(closes: Any) -> Dict[str, Any]:
+    from app.utils import indicator_kernels
+
+    return {
+        "ema": indicator_kernels.ema(closes, KERNEL_EMA_PERIODS),
+        "rsi": indicator_kernels.rsi(closes, KERNEL_RSI_PERIOD),
+    }
+
+
+def run_ta_indicators(closes: Any) -> Dict[str, Any]:
+    import numpy as np
+    import pandas as pd
+    from ta.momentum import RSIIndicator  # type: ignore
+    from ta.trend import EMAIndicator  # type: ignore
+
+    series = pd.Series(closes)
+    return {
+        "ema": np.vstack([EMAIndicator(series, window=p).ema_indicator().to_numpy() for p in KERNEL_EMA_PERIODS]),
+        "rsi": RSIIndicator(series, window=KERNEL_RSI_PERIOD).rsi().to_numpy(),
+    }
+
+
+def validate_kernels(rows: int, rtol: float = 1e-9) -> float:
+    """Максимальное относительное расхождение ядер NumPy с ta; исключение, если больше rtol"""
+    import numpy as np
+
+    from benchmarks.synthetic import generate_candles
+
+    closes = generate_candles(rows)["close"].to_numpy(dtype="float64")
+    ours, reference = run_numpy_kernels(closes), run_ta_indicators(closes)
+    worst = 0.0
+    for name in ("ema", "rsi"):
+        if not np.array_equal(np.isnan(ours[name]), np.isnan(reference[name])):
+            raise AssertionError(f"{name}: warm-up NaN positions differ from ta")
+        mask = ~np.isnan(reference[name])
+        if mask.any():
+            diff = np.abs(ours[name][mask] - reference[name][mask]) / np.maximum(np.abs(reference[name][mask]), 1.0)
+            worst = max(worst, float(diff.max()))
+    if worst > rtol:
+        raise AssertionError(f"Indicator kernels differ from ta by {worst:.3e} (> {rtol:.0e})")
+    return worst
+
+
+def build_cases(group_tickers: int) -> List[Case]:
+    # Импорты приложения - только после chdir во временную директорию
+    import pandas as pd
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+    from app.utils.data_processing import (
+        calculate_indicators,
+        process_candlestick_data,
+        process_linear_data,
+        recompute_ticker_indicators,
+        save_indicators_to_json,
+        save_json_data,
+    )
+    from benchmarks.synthetic import (
+        START_DATE,
+        generate_candles,
+        generate_linear,
+        make_dates,
+        ticker_names,
+        write_json_store,
+    )
+
+    # Без lifespan: чтение графиков не требует авторизации и БД
+    client = TestClient(app)
+
+    def setup_linear(rows: int) -> Any:
+        _reset_data_dir()
+        return generate_linear(rows, "SYN000")
+
+    def setup_candles(rows: int) -> Any:
+        _reset_data_dir()
+        return generate_candles(rows)
+
+    def setup_records(rows: int) -> Any:
+        _reset_data_dir()
+        return generate_candles(rows).to_dict(orient="records")
+
+    def setup_append(rows: int) -> Any:
+        data_dir = _reset_data_dir()
+        write_json_store(data_dir, ["SYN000"], rows)
+        tail = generate_candles(100, seed=1)
+        tail["date"] = make_dates(100, start=START_DATE + rows)
+        return tail.to_dict(orient="records")
+
+    def setup_frame(rows: int) -> Any:
+        _reset_data_dir()
+        return pd.DataFrame(generate_candles(rows).to_dict(orient="records"))
+
+    def setup_store(rows: int) -> Any:
+        write_json_store(_reset_data_dir(), ["SYN000"], rows)
+        return None
+
+    def setup_group(rows: int) -> Any:
+        data_dir = _reset_data_dir()
+        write_json_store(data_dir, ticker_names(group_tickers), max(rows // group_tickers, 1), group="BENCH")
+        return None
+
+    def setup_indicator_file(rows: int) -> Any:
+        data_dir = _reset_data_dir()
+        write_json_store(data_dir, ["SYN000"], rows)
+        df = pd.DataFrame(generate_candles(rows).to_dict(orient="records"))
+        save_indicators_to_json("SYN000", df, calculate_indicators(df.copy()))
+        return None
+
+    def setup_closes(rows: int) -> Any:
+        return generate_candles(rows)["close"].to_numpy(dtype="float64")
+
+    def get(path: str, **params: Any) -> None:
+        response = client.get(path, params=params)
+        response.raise_for_status()
+
+    return [
+        Case("process_linear_data", setup_linear, lambda df: process_linear_data(df)),
+        Case("process_candlestick_data", setup_candles, lambda df: process_candlestick_data(df, "SYN000")),
+        Case("save_json_data", setup_records, lambda data: save_json_data(data, "SYN000", "SYN000", "candlestick")),
+        Case("save_json_data_append_100", setup_append, lambda data: save_json_data(data, "SYN000", "SYN000", "candlestick")),
+        Case("calculate_indicators", setup_frame, lambda df: calculate_indicators(df)),
+        Case("recompute_ticker_indicators", setup_store, lambda _: recompute_ticker_indicators("SYN000")),
+        Case("indicator_kernels_numpy", setup_closes, lambda closes: run_numpy_kernels(closes)),
+        Case("indicator_kernels_ta", setup_closes, lambda closes: run_ta_indicators(closes)),
+        Case("get_chart_data_group", setup_group, lambda _: get("/charts/api/chart-data", group="BENCH")),
+        Case("get_indicator", setup_indicator_file, lambda _: get("/charts/indicators/SYN000", indicator="rsi", period=14)),
+    ]
+
+
+def time_case(case: Case, rows: int, repeat: int) -> Dict[str, Any]:
+    runs: List[float] = []
+    for _ in range(repeat):
+        state = case.setup(rows)
+        gc.collect()
+        start = time.perf_counter()
+        case.run(state)
+        runs.append(time.perf_counter() - start)
+    return {
+        "case": case.name,
+        "rows": rows,
+        "runs": runs,
+        "min": min(runs),
+        "median": statistics.median(runs),
+        "mean": statistics.fmean(runs),
+    }
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[Dict[str, Any]]:
+    """Сравнивает лучшие времена (min менее шумный, чем медиана) с baseline; ratio > 1 + threshold - регрессия"""
+    report: List[Dict[str, Any]] = []
+    for key, current in results["results"].items():
+        base = baseline.get("results", {}).get(key)
+        if base is None:
+            continue
+        ratio = current["min"] / base["min"] if base["min"] else float("inf")
+        report.append({
+            "key": key,
+            "baseline_min": base["min"],
+            "min": current["min"],
+            "ratio": ratio,
+            "regression": ratio > 1.0 + threshold,
+        })
+    return report
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except Exception:
+        return None
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Backend performance benchmarks")
+    parser.add_argument("--sizes", type=lambda s: [int(x) for x in s.split(",")], default=DEFAULT_SIZES,
+                        help="Comma-separated row counts (default: 10000,100000,1000000)")
+    parser.add_argument("--cases", type=lambda s: s.split(","), default=None, help="Comma-separated case names")
+    parser.add_argument("--repeat", type=int, default=3, help="Repeats per case (1M rows always run once)")
+    parser.add_argument("--group-tickers", type=int, default=10, help="Tickers per group for chart-data reads")
+    parser.add_argument("--output", type=Path, default=None, help="Results JSON path")
+    parser.add_argument("--baseline", type=Path, default=None, help="Baseline JSON to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help=f"Also write results to {DEFAULT_BASELINE}")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed slowdown vs baseline (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    output: Path = (args.output or DEFAULT_RESULTS_DIR / f"bench-{datetime.now():%Y%m%d-%H%M%S}.json").resolve()
+    baseline_path: Optional[Path] = args.baseline.resolve() if args.baseline else None
+    if baseline_path and not baseline_path.exists():
+        parser.error(f"baseline {baseline_path} not found, run with --save-baseline first")
+
+    sys.path.insert(0, str(BACKEND_DIR))
+    workdir = Path(tempfile.mkdtemp(prefix="bench-"))
+    os.chdir(workdir)
+
+    try:
+        cases = build_cases(args.group_tickers)
+        if args.cases:
+            cases = [c for c in cases if c.name in set(args.cases)]
+
+        results: Dict[str, Any] = {
+            "meta": {
+                "timestamp": datetime.now().isoformat(),
+                "commit": _git_commit(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "sizes": args.sizes,
+                "group_tickers": args.group_tickers,
+            },
+            "results": {},
+        }
+
+        if any(c.name.startswith("indicator_kernels") for c in cases):
+            for rows in args.sizes:
+                worst = validate_kernels(rows)
+                print(f"{'indicator kernels vs ta':<28} {rows:>9} rows  max rel. diff {worst:.2e}", flush=True)
+                results["meta"].setdefault("kernel_max_rel_diff", {})[str(rows)] = worst
+
+        for rows in args.sizes:
+            repeat = 1 if rows >= 1_000_000 else args.repeat
+            for case in cases:
+                result = time_case(case, rows, repeat)
+                results["results"][f"{case.name}[{rows}]"] = result
+                print(f"{case.name:<28} {rows:>9} rows  median {result['median']:.4f}s  min {result['min']:.4f}s", flush=True)
+    finally:
+        os.chdir(BACKEND_DIR)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2), encoding="utf-8")
+    print(f"Results written to {output}")
+
+    if args.save_baseline:
+        DEFAULT_BASELINE.write_text(json.dumps(results, indent=2), encoding="utf-8")
+        print(f"Baseline written to {DEFAULT_BASELINE}")
+
+    if baseline_path:
+        report = compare(results, json.loads(baseline_path.read_text(encoding="utf-8")), args.threshold)
+        for row in report:
+            flag = "REGRESSION" if row["regression"] else "ok"
+            print(f"{row['key']:<40} x{row['ratio']:.2f}  {flag}")
+        results["comparison"] = report
+        output.write_text(json.dumps(results, indent=2), encoding="utf-8")
+        if any(row["regression"] for row in report):
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
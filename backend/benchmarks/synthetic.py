@@ -0,0 +1,137 @@
+# backend/benchmarks/synthetic.py
+"""
+Генератор синтетических данных для бенчмарков.
+
+Создает воспроизводимые (по seed) ряды в форматах загрузки (xlsx) и хранилища (JSON).
+
+Пример:
+    python -m benchmarks.synthetic --tickers 5 --rows 10000 --sheets 5 --out fixtures
+"""
+import argparse
+import json
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# Дневные бары начиная с этой даты. Для 1M строк даты уходят далеко в будущее,
+# поэтому даты формируются через datetime64[D], а не pd.date_range (лимит 2262 года)
+START_DATE = np.datetime64("1900-01-01", "D")
+
+
+def make_dates(rows: int, start: np.datetime64 = START_DATE) -> List[str]:
+    return np.datetime_as_string(start + np.arange(rows), unit="D").tolist()
+
+
+def generate_candles(rows: int, seed: int = 0, start: np.datetime64 = START_DATE) -> pd.DataFrame:
+    """Свечи (date, open, high, low, close, volume) по геометрическому случайному блужданию"""
+    rng = np.random.default_rng(seed)
+    close = 100.0 * np.exp(np.cumsum(rng.normal(0.0, 0.01, rows)))
+    open_ = close * np.exp(rng.normal(0.0, 0.003, rows))
+    spread = np.abs(rng.normal(0.0, 0.005, rows)) * close
+    high = np.maximum(open_, close) + spread
+    low = np.maximum(np.minimum(open_, close) - spread, 0.01)
+    volume = rng.integers(1_000, 1_000_000, rows).astype(float)
+    return pd.DataFrame({
+        "date": make_dates(rows, start),
+        "open": open_,
+        "high": high,
+        "low": low,
+        "close": close,
+        "volume": volume,
+    })
+
+
+def generate_linear(rows: int, ticker: str, seed: int = 0, start: np.datetime64 = START_DATE) -> pd.DataFrame:
+    """Линейные данные (date, ticker, volume, price) для одного тикера"""
+    candles = generate_candles(rows, seed, start)
+    return pd.DataFrame({
+        "date": candles["date"],
+        "ticker": ticker,
+        "volume": candles["volume"],
+        "price": candles["close"],
+    })
+
+
+def ticker_names(count: int, prefix: str = "SYN") -> List[str]:
+    return [f"{prefix}{i:03d}" for i in range(count)]
+
+
+def write_candlestick_xlsx(
+    path: Path, tickers: List[str], rows: int, seed: int = 0, start: np.datetime64 = START_DATE
+) -> Path:
+    """Книга Excel с листом на каждый тикер (формат /charts/upload-candlestick)"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with pd.ExcelWriter(path) as writer:
+        for i, ticker in enumerate(tickers):
+            generate_candles(rows, seed + i, start).to_excel(writer, sheet_name=ticker[:31], index=False)
+    return path
+
+
+def write_linear_xlsx(path: Path, tickers: List[str], rows: int, seed: int = 0) -> Path:
+    """Один лист со всеми тикерами (формат /charts/upload)"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    frames = [generate_linear(rows, ticker, seed + i) for i, ticker in enumerate(tickers)]
+    pd.concat(frames, ignore_index=True).to_excel(path, index=False)
+    return path
+
+
+def write_json_store(
+    data_dir: Path,
+    tickers: List[str],
+    rows: int,
+    group: Optional[str] = None,
+    data_type: str = "candlestick",
+    seed: int = 0,
+) -> Dict[str, Any]:
+    """
+    Готовое хранилище data/ (файлы тикеров + каталог), как после загрузки.
+    Если group не задан, группа = тикер (как у свечных данных). Существующий каталог дополняется.
+    """
+    from app.utils.catalog import all_entries, put_entries
+
+    data_dir.mkdir(parents=True, exist_ok=True)
+    meta: Dict[str, Any] = {}
+    for i, ticker in enumerate(tickers):
+        if data_type == "line":
+            df = generate_linear(rows, ticker, seed + i).drop(columns=["ticker"])
+        else:
+            df = generate_candles(rows, seed + i)
+        records = df.to_dict(orient="records")
+        (data_dir / f"{ticker}.json").write_text(
+            json.dumps(records, ensure_ascii=False, indent=2), encoding="utf-8"
+        )
+        meta[ticker] = {
+            "ticker": ticker,
+            "group": group or ticker,
+            "type": data_type,
+            "last_updated": "1970-01-01T00:00:00",
+            "total_records": rows,
+            "date_range": [records[0]["date"], records[-1]["date"]] if records else None,
+        }
+    put_entries(meta, data_dir)
+    return all_entries(data_dir)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generate synthetic xlsx/JSON fixtures")
+    parser.add_argument("--tickers", type=int, default=3, help="Number of tickers")
+    parser.add_argument("--rows", type=int, default=1000, help="History length per ticker (bars)")
+    parser.add_argument("--sheets", type=int, default=None, help="Sheets per candlestick workbook (default: one per ticker)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", type=Path, default=Path("fixtures"))
+    args = parser.parse_args()
+
+    tickers = ticker_names(args.tickers)
+    sheets = args.sheets or len(tickers)
+    for start in range(0, len(tickers), sheets):
+        chunk = tickers[start:start + sheets]
+        write_candlestick_xlsx(args.out / f"candlestick_{start // sheets:03d}.xlsx", chunk, args.rows, args.seed + start)
+    write_linear_xlsx(args.out / "linear.xlsx", tickers, args.rows, args.seed)
+    write_json_store(args.out / "data", tickers, args.rows, seed=args.seed)
+    print(f"Fixtures written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
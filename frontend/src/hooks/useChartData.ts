@@ -5,16 +5,82 @@
  */
 
 import { useRef, useState, useCallback, useEffect } from 'react';
-import { GroupChartData } from '@/types/api';
+import {
+  ApiTickerData,
+  DataChangeEvent,
+  GroupChartData,
+  VolumeStackResponse,
+} from '@/types/api';
 import { SeriesInfo, VolumeStackPoint } from '@/types/charts';
 import { apiService } from '@/services/api';
-import { adaptGroupChartData } from '@/services/adapter';
-import { aggregateVolumeStack } from '@/utils/math';
+import {
+  adaptBinaryChartData,
+  adaptGroupChartData,
+  adaptVolumeStack,
+  decodeBinaryChartData,
+} from '@/services/adapter';
 import { BASE_COLORS } from '@/utils/color';
+import { isoDateToUnixTime } from '@/utils/date';
+
+/**
+ * Серии группы: бинарный колоночный формат, при ошибке запроса или разбора -
+ * построчный JSON
+ */
+async function loadGroupSeries(group: string): Promise<SeriesInfo[]> {
+  try {
+    const buffer = await apiService.getChartDataBinary(group);
+    return adaptBinaryChartData(decodeBinaryChartData(buffer));
+  } catch (e: any) {
+    if (e.name === 'CanceledError' || e.name === 'AbortError') {
+      throw e;
+    }
+    console.warn(
+      `⚠️ [useChartData] Бинарный формат недоступен для группы ${group}, загрузка JSON:`,
+      e
+    );
+    const data: GroupChartData = await apiService.getChartData(group);
+    return adaptGroupChartData(data);
+  }
+}
+
+// Цвет тикера - по индексу серии, как и на основном графике
+function seriesColors(seriesInfo: SeriesInfo[]): Record<string, string> {
+  const colors: Record<string, string> = {};
+  seriesInfo.forEach((s, index) => {
+    colors[s.ticker] = BASE_COLORS[index % BASE_COLORS.length] as string;
+  });
+  return colors;
+}
+
+/**
+ * Накладывает дельту тикера на серию: full - замена целиком, иначе точки
+ * с from_date заменяются строками дельты
+ */
+function mergeTickerDelta(current: SeriesInfo, delta: ApiTickerData): SeriesInfo {
+  const [adapted] = adaptGroupChartData({ [delta.ticker]: delta });
+  const version = delta.version ?? current.version;
+  if (delta.full) {
+    return { ...current, data: adapted!.data, version };
+  }
+  if (delta.from_date == null) {
+    return { ...current, version };
+  }
+  const fromTime = isoDateToUnixTime(delta.from_date);
+  const kept = (current.data as Array<{ time: number }>).filter(
+    (point) => point.time < fromTime
+  );
+  return {
+    ...current,
+    data: [...kept, ...adapted!.data] as SeriesInfo['data'],
+    version,
+  };
+}
 
 export function useChartData(group: string) {
   const abortRef = useRef<AbortController | null>(null);
   const seqRef = useRef<number>(0);
+  // Текущие серии для обработчика событий (версии тикеров для дельта-запросов)
+  const seriesRef = useRef<SeriesInfo[]>([]);
 
   const [series, setSeries] = useState<SeriesInfo[]>([]);
   const [volumeStack, setVolumeStack] = useState<VolumeStackPoint[]>([]);
@@ -30,7 +96,12 @@ export function useChartData(group: string) {
 
       try {
         console.log(`📊 [useChartData] Загрузка данных для группы: ${group}`);
-        const data: GroupChartData = await apiService.getChartData(group);
+        // Стек объемов агрегируется на сервере при загрузке данных
+        const [seriesInfo, volumeStackData]: [SeriesInfo[], VolumeStackResponse] =
+          await Promise.all([
+            loadGroupSeries(group),
+            apiService.getVolumeStack(group),
+          ]);
 
         if (seqRef.current !== seqToken) {
           console.log(
@@ -41,45 +112,18 @@ export function useChartData(group: string) {
 
         console.log(`✅ [useChartData] Данные получены, адаптация...`);
 
-        // Адаптируем данные графика
-        const seriesInfo = adaptGroupChartData(data);
+        seriesRef.current = seriesInfo;
         setSeries(seriesInfo);
 
-        // Подготавливаем данные для агрегации объемов с цветами
-        const volumeData: Record<
-          string,
-          Array<{ time: number; volume: number; color: string }>
-        > = {};
-
-        seriesInfo.forEach((s, index) => {
-          // Гарантируем, что цвет всегда строка
-          const color = BASE_COLORS[index % BASE_COLORS.length] as string;
-
-          volumeData[s.ticker] = (s.data as any[]).map((d) => ({
-            time: d.time,
-            volume: d.volume ?? 0,
-            color: color,
-          }));
-        });
-
-        console.log(
-          `📈 [useChartData] Агрегация объемов для ${Object.keys(volumeData).length} тикеров`
+        const adaptedVolumeStack = adaptVolumeStack(
+          volumeStackData,
+          seriesColors(seriesInfo)
         );
-
-        // Агрегируем объемы с улучшенной структурой
-        const aggregatedVolumeStack = aggregateVolumeStack(volumeData);
-
-        // Дополнительно сортируем части в каждом баре по убыванию объема
-        const sortedVolumeStack = aggregatedVolumeStack.map((point) => ({
-          ...point,
-          parts: [...point.parts].sort((a, b) => b.volume - a.volume),
-        }));
-
-        setVolumeStack(sortedVolumeStack);
+        setVolumeStack(adaptedVolumeStack);
 
         console.log(`✅ [useChartData] Данные готовы:`, {
           series: seriesInfo.length,
-          volumePoints: sortedVolumeStack.length,
+          volumePoints: adaptedVolumeStack.length,
           tickers: seriesInfo.map((s) => s.ticker),
         });
 
@@ -114,6 +158,7 @@ export function useChartData(group: string) {
       // Очистка при размонтировании или смене группы
       console.log(`🧹 [useChartData] Очистка для группы: ${group}`);
       abortRef.current?.abort();
+      seriesRef.current = [];
       setSeries([]); // Очищаем серии
       setVolumeStack([]); // Очищаем объемы
     };
@@ -127,5 +172,103 @@ export function useChartData(group: string) {
     fetchData(seqRef.current);
   }, [fetchData, group]);
 
+  // Новые строки одного тикера: дозапрашиваем только его изменения и стек объемов
+  const updateTicker = useCallback(
+    async (event: DataChangeEvent) => {
+      const ticker = event.ticker as string;
+      const current = seriesRef.current.find((s) => s.ticker === ticker);
+      if (!current) {
+        refresh(); // новый тикер группы
+        return;
+      }
+      if (
+        current.version !== undefined &&
+        event.new_version != null &&
+        current.version >= event.new_version
+      ) {
+        return; // изменение уже загружено
+      }
+      const since =
+        current.version !== undefined
+          ? { since_version: current.version }
+          : event.date_range
+            ? { since_date: event.date_range[0] }
+            : null;
+      if (!since) {
+        refresh();
+        return;
+      }
+
+      const seqToken = seqRef.current;
+      try {
+        const [delta, volumeStackData] = await Promise.all([
+          apiService.getTickerChartDelta(ticker, since),
+          apiService.getVolumeStack(group),
+        ]);
+        if (seqRef.current !== seqToken) {
+          return; // идет полная перезагрузка группы
+        }
+        const next = seriesRef.current.map((s) =>
+          s.ticker === ticker &&
+          !(
+            s.version !== undefined &&
+            delta.version !== undefined &&
+            s.version > delta.version
+          )
+            ? mergeTickerDelta(s, delta)
+            : s
+        );
+        seriesRef.current = next;
+        setSeries(next);
+        setVolumeStack(adaptVolumeStack(volumeStackData, seriesColors(next)));
+        console.log(
+          `✅ [useChartData] Тикер ${ticker} обновлен до версии ${delta.version}`
+        );
+      } catch (e) {
+        console.error(
+          `❌ [useChartData] Ошибка дозагрузки тикера ${ticker}, перезагрузка группы:`,
+          e
+        );
+        refresh();
+      }
+    },
+    [group, refresh]
+  );
+
+  // Изменения данных группы от сервера: новые строки тикера - дозагрузка этого
+  // тикера, удаление и resync - перезагрузка группы. Пересчет индикаторов
+  // строк графика не меняет - запоминаются только новые версии тикеров.
+  useEffect(() => {
+    const unsubscribe = apiService.subscribeDataEvents((event) => {
+      if (event.type === 'indicators') {
+        const versions = event.versions ?? {};
+        seriesRef.current = seriesRef.current.map((s) =>
+          versions[s.ticker] !== undefined
+            ? { ...s, version: versions[s.ticker] }
+            : s
+        );
+        return;
+      }
+      if (event.type === 'data' && event.group === group && event.ticker) {
+        console.log(
+          `📡 [useChartData] Новые данные тикера ${event.ticker} группы: ${group}`
+        );
+        updateTicker(event);
+        return;
+      }
+      const affectsGroup =
+        event.type === 'resync' ||
+        event.group === group ||
+        (event.type === 'reset' && event.ticker === null);
+      if (affectsGroup) {
+        console.log(
+          `📡 [useChartData] Событие ${event.type} для группы: ${group}`
+        );
+        refresh();
+      }
+    });
+    return unsubscribe;
+  }, [group, refresh, updateTicker]);
+
   return { series, volumeStack, isLoading, error, refresh };
 }
@@ -1,13 +1,16 @@
 import {
   GroupChartData,
   ApiTickerData,
+  BinaryTickerColumns,
   IndicatorApiResponse,
+  VolumeStackResponse,
 } from '@/types/api';
 import {
   SeriesInfo,
   CandlestickPoint,
   LinePoint,
   IndicatorData,
+  VolumeStackPoint,
 } from '@/types/charts';
 import { isoDateToUnixTime } from '@/utils/date';
 
@@ -24,7 +27,7 @@ export function adaptGroupChartData(
   groupChartData: GroupChartData
 ): SeriesInfo[] {
   return Object.values(groupChartData).map((tickerData: ApiTickerData) => {
-    const { ticker, group, type, data } = tickerData;
+    const { ticker, group, type, version, data } = tickerData;
     if (type === 'line') {
       const linePoints: LinePoint[] = (data as any[]).map((point) => ({
         time: isoDateToUnixTime(point.date),
@@ -36,6 +39,7 @@ export function adaptGroupChartData(
         ticker,
         group,
         type,
+        version,
         data: linePoints,
       };
     }
@@ -53,6 +57,7 @@ export function adaptGroupChartData(
         ticker,
         group,
         type,
+        version,
         data: candlePoints,
       };
     }
@@ -60,6 +65,127 @@ export function adaptGroupChartData(
   });
 }
 
+const SECONDS_PER_DAY = 86400;
+
+/**
+ * Разбирает ответ chart-data в формате binary:
+ * "CHB1" | uint32 LE длина заголовка | JSON-заголовок | буферы
+ * (каждый буфер выровнен на 8 байт)
+ */
+export function decodeBinaryChartData(
+  buffer: ArrayBuffer
+): BinaryTickerColumns[] {
+  const view = new DataView(buffer);
+  const magic = new TextDecoder().decode(new Uint8Array(buffer, 0, 4));
+  if (magic !== 'CHB1') {
+    throw new Error(`Unknown binary chart format: ${magic}`);
+  }
+  const headerLength = view.getUint32(4, true);
+  const header = JSON.parse(
+    new TextDecoder().decode(new Uint8Array(buffer, 8, headerLength))
+  );
+  const base = 8 + headerLength;
+
+  return header.tickers.map((entry: any) => {
+    const columns: Record<string, Float64Array> = {};
+    let date = new Int32Array(0);
+    for (const [name, column] of Object.entries<any>(entry.columns)) {
+      if (column.dtype === 'int32') {
+        date = new Int32Array(buffer, base + column.offset, column.length);
+      } else {
+        columns[name] = new Float64Array(
+          buffer,
+          base + column.offset,
+          column.length
+        );
+      }
+    }
+    return {
+      ticker: entry.ticker,
+      group: entry.group,
+      type: entry.type,
+      length: entry.length,
+      version: entry.version,
+      date,
+      columns,
+    };
+  });
+}
+
+/**
+ * Преобразует колонки из бинарного ответа в SeriesInfo (без разбора дат-строк)
+ */
+export function adaptBinaryChartData(
+  tickers: BinaryTickerColumns[]
+): SeriesInfo[] {
+  return tickers.map(({ ticker, group, type, length, version, date, columns }) => {
+    const volume = columns.volume;
+    if (type === 'line') {
+      const price = columns.price as Float64Array;
+      const linePoints: LinePoint[] = new Array(length);
+      for (let i = 0; i < length; i++) {
+        linePoints[i] = {
+          time: (date[i] as number) * SECONDS_PER_DAY,
+          value: price[i] as number,
+          volume: volume?.[i],
+        };
+      }
+      return {
+        id: `${group}-${ticker}-line`,
+        ticker,
+        group,
+        type,
+        version,
+        data: linePoints,
+      };
+    }
+    if (type === 'candlestick') {
+      const { open, high, low, close } = columns as Record<
+        string,
+        Float64Array
+      >;
+      const candlePoints: CandlestickPoint[] = new Array(length);
+      for (let i = 0; i < length; i++) {
+        candlePoints[i] = {
+          time: (date[i] as number) * SECONDS_PER_DAY,
+          open: open![i] as number,
+          high: high![i] as number,
+          low: low![i] as number,
+          close: close![i] as number,
+          volume: volume?.[i],
+        };
+      }
+      return {
+        id: `${group}-${ticker}-candlestick`,
+        ticker,
+        group,
+        type,
+        version,
+        data: candlePoints,
+      };
+    }
+    throw new Error(`Unknown type: ${type}`);
+  });
+}
+
+/**
+ * Преобразует стек объемов с сервера в VolumeStackPoint, назначая цвета тикерам
+ */
+export function adaptVolumeStack(
+  response: VolumeStackResponse,
+  colors: Record<string, string>
+): VolumeStackPoint[] {
+  return response.data.map((point) => ({
+    time: isoDateToUnixTime(point.date),
+    total: point.total,
+    parts: point.parts.map((part) => ({
+      ticker: part.ticker,
+      volume: part.volume,
+      color: colors[part.ticker] ?? '#888888',
+    })),
+  }));
+}
+
 /**
  * Преобразует IndicatorApiResponse в IndicatorData
  */
@@ -15,6 +15,11 @@ import {
   IndicatorSettingsResponse,
   LoginResponse,
 } from '../types';
+import {
+  ApiTickerData,
+  DataChangeEvent,
+  VolumeStackResponse,
+} from '../types/api';
 
 // const API_BASE_URL = 'http://localhost:8000';
 
@@ -146,6 +151,63 @@ export const apiService = {
     return response.data;
   },
 
+  // Данные группы в бинарном формате (typed arrays, см. decodeBinaryChartData)
+  getChartDataBinary: async (group: string): Promise<ArrayBuffer> => {
+    console.log(`📊 [API] Запрос бинарных данных графика для группы: ${group}`);
+    const response = await api.get('/charts/api/chart-data', {
+      params: { group, format: 'binary' },
+      responseType: 'arraybuffer',
+    });
+    console.log(
+      `✅ [API] Получены бинарные данные группы ${group}: ${response.data.byteLength} байт`
+    );
+    return response.data;
+  },
+
+  // Изменившиеся строки тикера: после версии since_version или с даты since_date
+  getTickerChartDelta: async (
+    ticker: string,
+    since: { since_version?: number; since_date?: string }
+  ): Promise<ApiTickerData> => {
+    console.log(`📊 [API] Запрос изменений тикера ${ticker}:`, since);
+    const response = await api.get('/charts/api/chart-data', {
+      params: { ticker, ...since },
+    });
+    console.log(
+      `✅ [API] Изменения тикера ${ticker}: ${response.data.data.length} записей, версия ${response.data.version}`
+    );
+    return response.data;
+  },
+
+  getVolumeStack: async (group: string): Promise<VolumeStackResponse> => {
+    console.log(`📊 [API] Запрос стека объемов для группы: ${group}`);
+    const response = await api.get('/charts/api/volume-stack', {
+      params: { group },
+    });
+    console.log(
+      `✅ [API] Получен стек объемов группы ${group}: ${response.data.data.length} точек`
+    );
+    return response.data;
+  },
+
+  // Подписка на события изменения данных; возвращает функцию отписки
+  subscribeDataEvents: (
+    onEvent: (event: DataChangeEvent) => void
+  ): (() => void) => {
+    const source = new EventSource(`${API_BASE_URL}/charts/api/events`);
+    const handler = (message: MessageEvent) => {
+      onEvent(JSON.parse(message.data) as DataChangeEvent);
+    };
+    const types: DataChangeEvent['type'][] = [
+      'data',
+      'reset',
+      'indicators',
+      'resync',
+    ];
+    types.forEach((type) => source.addEventListener(type, handler));
+    return () => source.close();
+  },
+
   // ИНДИКАТОРЫ
   getIndicatorSettings: async (): Promise<IndicatorSettingsResponse> => {
     console.log(`⚙️ [API] Получение настроек индикаторов`);
@@ -65,6 +65,70 @@ export interface ApiCandlestickDataPoint {
   volume: number;
 }
 
+/**
+ * Колонки тикера из бинарного ответа chart-data (format=binary).
+ * Массивы - представления поверх буфера ответа, без копирования.
+ * @interface BinaryTickerColumns
+ */
+export interface BinaryTickerColumns {
+  /** Название тикера */
+  ticker: string;
+  /** Название группы */
+  group: string;
+  /** Тип данных */
+  type: 'line' | 'candlestick';
+  /** Количество баров */
+  length: number;
+  /** Версия данных тикера (data_version каталога) */
+  version?: number;
+  /** Дни от 1970-01-01 */
+  date: Int32Array;
+  /** Числовые колонки (open/high/low/close/volume или price/volume) */
+  columns: Record<string, Float64Array>;
+}
+
+/**
+ * Стек объемов группы, рассчитанный на сервере (/charts/api/volume-stack).
+ * Части в каждой точке отсортированы по убыванию объема.
+ * @interface VolumeStackResponse
+ */
+export interface VolumeStackResponse {
+  /** Название группы */
+  group: string;
+  /** Тикеры группы в порядке серий chart-data */
+  tickers: string[];
+  /** Точки по датам */
+  data: Array<{
+    /** Дата в формате YYYY-MM-DD */
+    date: string;
+    /** Общий объем */
+    total: number;
+    /** Разбивка по тикерам */
+    parts: Array<{ ticker: string; volume: number }>;
+  }>;
+}
+
+/**
+ * Событие изменения данных из потока /charts/api/events (SSE)
+ * @interface DataChangeEvent
+ */
+export interface DataChangeEvent {
+  /** Порядковый номер события */
+  id: number;
+  /** data - новые строки, reset - удаление, indicators - пересчет, resync - перечитать все */
+  type: 'data' | 'reset' | 'indicators' | 'resync';
+  /** Тикер (null при полном сбросе) */
+  ticker?: string | null;
+  /** Группа тикера */
+  group?: string | null;
+  /** Новая версия данных тикера */
+  new_version?: number;
+  /** Диапазон дат добавленных строк [от, до] */
+  date_range?: [string, string];
+  /** indicators: новые версии данных тикеров после пересчета */
+  versions?: Record<string, number>;
+}
+
 /**
  * Данные тикера из API
  * @interface ApiTickerData
@@ -76,6 +140,12 @@ export interface ApiTickerData {
   group: string;
   /** Тип данных */
   type: 'line' | 'candlestick';
+  /** Версия данных тикера (data_version каталога) */
+  version?: number;
+  /** Дельта-запрос: true - отданы все строки */
+  full?: boolean;
+  /** Дельта-запрос: строки с этой даты заменяют имеющиеся (null - изменений нет) */
+  from_date?: string | null;
   /** Массив данных */
   data: ApiLineDataPoint[] | ApiCandlestickDataPoint[];
 }
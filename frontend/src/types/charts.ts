@@ -50,6 +50,8 @@ export interface SeriesInfo {
   type: 'line' | 'candlestick';
   /** Данные точек */
   data: CandlestickPoint[] | LinePoint[];
+  /** Версия данных тикера - для дельта-запросов */
+  version?: number;
   /** Цвет серии (опционально) */
   color?: string;
 }
@@ -7,40 +7,6 @@
 import { VolumeStackPoint } from '@/types/charts';
 import { addAlphaToHex } from './color';
 
-/**
- * Суммирует объемы для всех тикеров по каждой дате и разбивает по тикерам
- * @param volumeData - Map ticker -> Array<{time, volume, color}>
- * @returns Array<VolumeStackPoint>
- */
-export const aggregateVolumeStack = (
-  volumeData: Record<
-    string,
-    Array<{ time: number; volume: number; color: string }>
-  >
-): VolumeStackPoint[] => {
-  const timeMap: Record<string, VolumeStackPoint> = {};
-
-  Object.entries(volumeData).forEach(([ticker, points]) => {
-    points.forEach(({ time, volume, color }) => {
-      if (!timeMap[time]) {
-        timeMap[time] = {
-          time,
-          total: 0,
-          parts: [],
-        };
-      }
-      timeMap[time].total += volume;
-      timeMap[time].parts.push({
-        ticker,
-        volume,
-        color,
-      });
-    });
-  });
-
-  return Object.values(timeMap).sort((a, b) => a.time - b.time);
-};
-
 /**
  * Сортирует части объемов по убыванию для корректного stacked отображения
  */